@@ -2,19 +2,38 @@
 """ Balance Bot Main Routine """
 
 import asyncio
+import math
 import time
 from typing import Callable, Protocol, Optional, Any
 
 from abc import abstractmethod
 from gpiozero import Motor
+import numpy as np
 
 from src import robot_listener
 from src.motor_simulator import MotorSim
 from src.encoder.encoder_sensor_digital import EncoderDigital
-from tests.encoder_simulator import EncoderSim
+from src.encoder.encoder_sensor_cdev import EncoderCdev
+from src.encoder.gpio_edge_events import EdgeEventReader, GpiodEdgeEventSource
+from src.encoder.encoder_bank import DISTANCE_COL, EncoderBank
+from src.encoder.encoder_sensor_general import LONG_RUN_SUMMARY_TIERS
+from src.robot_math.attitude_estimator import (
+    ComplementaryPitchEstimator,
+    KalmanPitchEstimator,
+    accel_pitch,
+)
+from src.robot_math.balance_state_estimator import (
+    PITCH,
+    PITCH_RATE,
+    WHEEL_VELOCITY,
+    BalanceStateEstimator,
+)
+from tests.simulators.encoder_simulator import EncoderSim
 from src.bb_9dof_sensor_simulator import BB9DOFSensorSimulator
-from src.sensor.bb_bno055_sensor import BB_BNO055Sensor
+from src.sensor.bb_bno055_sensor import BB_BNO055Sensor_I2C
+from src.sensor.bno055_frame import Vector3
 from src.bluedot.bluedot_direction_control import BlueDotRobotController
+from src.robot_logging.logging_setup import bb_logger
 from config import cfg
 from event import EventHandler
 
@@ -128,11 +147,15 @@ class BalanceBot:
         enc_wheel_right: EncoderDigital | EncoderSim,
         enc_arm_left: Optional[EncoderDigital | EncoderSim],
         enc_arm_right: Optional[EncoderDigital | EncoderSim],
-        sensor9DOF: BB_BNO055Sensor | BB9DOFSensorSimulator,
+        sensor9DOF: BB_BNO055Sensor_I2C | BB9DOFSensorSimulator,
         start_prog: Optional[tuple[tuple[float, float, float]]] = None,
         repeat_prog: Optional[tuple[tuple[float, float, float]]] = None,
         manual_control_time: int = 0,  # Duration of manual control in seconds
         bluedot_control: Optional[BlueDotRobotController] = None,
+        state_estimator: Optional[BalanceStateEstimator] = None,
+        pitch_estimator: Optional[
+            ComplementaryPitchEstimator | KalmanPitchEstimator
+        ] = None,
         eh: EventHandler,
     ):
         """
@@ -145,6 +168,11 @@ class BalanceBot:
                     (duration (sec.),
                      forward speed or angle (-1 to +1),
                      right turn speed or angle (-1 to +1))
+            state_estimator (BalanceStateEstimator): Filters the pitch, pitch
+                rate and wheel velocity the PID acts on, a default one if None
+            pitch_estimator (ComplementaryPitchEstimator | KalmanPitchEstimator):
+                Pitch from the raw gyro and accelerometer, at the control
+                rate, or None for the sensor's fused Euler pitch
         Returns:
             Result: True if successful, False if not
         """
@@ -162,8 +190,33 @@ class BalanceBot:
         self._enc_wheel_right: Optional[EncoderDigital | EncoderSim] = enc_wheel_right
         self._enc_arm_left: Optional[EncoderDigital | EncoderSim] = enc_arm_left
         self._enc_arm_right: Optional[EncoderDigital | EncoderSim] = enc_arm_right
+        # All encoders' kinematics are read together, once per control tick
+        self._encoders: EncoderBank = EncoderBank(
+            encoders={
+                name: encoder
+                for name, encoder in (
+                    ("wheel_left", enc_wheel_left),
+                    ("wheel_right", enc_wheel_right),
+                    ("arm_left", enc_arm_left),
+                    ("arm_right", enc_arm_right),
+                )
+                if encoder is not None
+            },
+            logger=bb_logger,
+        )
+        # Wheel position and velocity, pitch and pitch rate, one array per tick
+        self._state_estimator: BalanceStateEstimator = (
+            state_estimator if state_estimator is not None else BalanceStateEstimator()
+        )
+        self._pitch_estimator: Optional[
+            ComplementaryPitchEstimator | KalmanPitchEstimator
+        ] = pitch_estimator
+        self._wheel_channels: tuple[int, int] = (
+            self._encoders.channel_index("wheel_left"),
+            self._encoders.channel_index("wheel_right"),
+        )
         # Initialize i2C Connection to sensor- need check/try?
-        self._sensor: BB9DOFSensorSimulator | BB_BNO055Sensor = sensor9DOF
+        self._sensor: BB9DOFSensorSimulator | BB_BNO055Sensor_I2C = sensor9DOF
         # Initialize BlueDot Controller if using
         if bluedot_control is not None and manual_control_time > 0:
             self._bluedot_control: Optional[BlueDotRobotController] = bluedot_control
@@ -245,19 +298,56 @@ class BalanceBot:
             if (time.time() * 1000 - lasttime_control) >= cfg.duration.control_update:
                 # exec every CONTROL_UPDATE_INTERVAL msec.
                 lasttime_control = TIME_S()
-                temp_euler: dict[str, float] = self._sensor.euler_angles
-                self._roll: float = temp_euler["x"]
-                self._pitch: float = temp_euler["y"]
-                self._yaw: float = temp_euler["z"]
-                fore_aft_error = self.pitch_setpoint_angle - self._pitch
+                self._sensor.refresh()  # one frame for every reading this tick
+                euler: Vector3 = self._sensor.euler_xyz()
+                self._roll: float = euler.x
+                self._pitch: float = euler.y
+                self._yaw: float = euler.z
+                gyro: Vector3 = self._sensor.gyro_xyz()
+                if self._pitch_estimator is not None:
+                    raw_accel: Vector3 = self._sensor.raw_accel_xyz()
+                    pitch_from_accel: float = float(
+                        accel_pitch(raw_accel.x, raw_accel.y, raw_accel.z)
+                    )
+                    self._pitch = self._pitch_estimator.update(
+                        gyro.y, pitch_from_accel
+                    )
+                # (channels, [distance, speed, accel, jerk]) of all encoders
+                self._encoder_kinematics = self._encoders.snapshot()
+                left, right = self._wheel_channels
+                state: np.ndarray = self._state_estimator.update(
+                    lasttime_control,
+                    (
+                        self._encoder_kinematics[left, DISTANCE_COL]
+                        + self._encoder_kinematics[right, DISTANCE_COL]
+                    )
+                    / 2,
+                    self._pitch,
+                    # gyro_xyz is in rad/s, the estimator takes deg/s
+                    math.degrees(gyro.y),
+                )
+                fore_aft_error = self.pitch_setpoint_angle - state[PITCH]
                 self._integral_term += cfg.pid_param.k_integral * fore_aft_error
                 # self._integral_term = max(self._integral_term, bbc.MOTOR_MIN)
                 # self._integral_term = min(self._integral_term, bbc.MOTOR_MAX)
-                derivative_term = cfg.pid_param.k_derivative * (
-                    self._pitch - self._pitch_last
+                # Filtered pitch rate over a control period, the scale of the
+                # pitch change per tick the derivative gain was tuned for
+                derivative_term = (
+                    cfg.pid_param.k_derivative
+                    * state[PITCH_RATE]
+                    * cfg.duration.control_update
+                    / 1000
                 )
                 proportional_term = cfg.pid_param.k_proportional * fore_aft_error
-                motor_output = proportional_term + self._integral_term + derivative_term
+                wheel_velocity_term = (
+                    cfg.pid_param.k_wheel_velocity * state[WHEEL_VELOCITY]
+                )
+                motor_output = (
+                    proportional_term
+                    + self._integral_term
+                    + derivative_term
+                    + wheel_velocity_term
+                )
 
                 motor_left_output = motor_output
                 motor_left_output = max(motor_left_output, cfg.wheel.left.motor.min)
@@ -293,13 +383,19 @@ def main():
     robot_listener.setup_general_logging_handler(eh=eh)
     robot_listener.setup_bluedot_handler(eh=eh)
 
+    # One event loop for startup calibration and BalanceBot's control loop,
+    # which gets it with asyncio.get_event_loop()
+    event_loop: asyncio.AbstractEventLoop = asyncio.new_event_loop()
+    asyncio.set_event_loop(event_loop)
+    # Reads the wheel encoders' edges if they come from the GPIO character device
+    edge_reader: Optional[EdgeEventReader] = None
+
     if os.name == "posix" and os.uname()[1] == "raspberrypi":
         # We're running on Raspberry Pi. Start robot.
         logger.info("Starting Balance Bot Robt")
         from gpiozero import Motor
         import board
         import busio
-        from bb_bno055_sensor import BB_BNO055Sensor
         from encoder_sensor_digital import EncoderDigital
         import bluedot_direction_control
 
@@ -320,19 +416,56 @@ def main():
         #     forward=cfg.arm.right.fwd, backward=cfg.arm.right.rwd, pwm=True
         # )
 
-        enc_wheel_left: EncoderGeneral = EncoderDigital(
-            signal_pin=cfg.wheel.left.encoder
-        )
-        enc_wheel_right: EncoderGeneral = EncoderDigital(
-            signal_pin=cfg.wheel.right.encoder
-        )
+        if cfg.wheel.encoder_source == "gpiozero":
+            enc_wheel_left: EncoderGeneral = EncoderDigital(
+                signal_pin=cfg.wheel.left.encoder, summary_tiers=LONG_RUN_SUMMARY_TIERS
+            )
+            enc_wheel_right: EncoderGeneral = EncoderDigital(
+                signal_pin=cfg.wheel.right.encoder,
+                summary_tiers=LONG_RUN_SUMMARY_TIERS,
+            )
+        elif cfg.wheel.encoder_source == "cdev":
+            # Kernel timestamped edges of both wheels, read by one thread
+            edge_reader = EdgeEventReader(
+                source=GpiodEdgeEventSource(
+                    pins=[cfg.wheel.left.encoder, cfg.wheel.right.encoder]
+                ),
+                logger=bb_logger,
+            )
+            enc_wheel_left: EncoderGeneral = EncoderCdev(
+                signal_pin=cfg.wheel.left.encoder,
+                edge_reader=edge_reader,
+                summary_tiers=LONG_RUN_SUMMARY_TIERS,
+                motor=motor_wheel_left,
+                logger=bb_logger,
+            )
+            enc_wheel_right: EncoderGeneral = EncoderCdev(
+                signal_pin=cfg.wheel.right.encoder,
+                edge_reader=edge_reader,
+                summary_tiers=LONG_RUN_SUMMARY_TIERS,
+                motor=motor_wheel_right,
+                logger=bb_logger,
+            )
+            enc_wheel_left.start()
+            enc_wheel_right.start()
+            edge_reader.start()
+        else:
+            raise ValueError(
+                f"Unknown wheel.encoder_source: {cfg.wheel.encoder_source}"
+            )
         # enc_arm_left: EncoderGeneral = RotationEncoder(signal_pin=cfg.arm.left.encoder)
         # enc_arm_right: EncoderGeneral = RotationEncoder(
         #     signal_pin=cfg.arm.right.encoder
         # )
 
-        i2c: busio.I2C = busio.I2C(board.SCL, board.SCA)
-        sensor9DOF: BB_BNO055Sensor = BB_BNO055Sensor(i2c, eh=eh)
+        i2c: busio.I2C = busio.I2C(board.SCL, board.SDA)
+        sensor9DOF: BB_BNO055Sensor_I2C = BB_BNO055Sensor_I2C(
+            i2c=i2c, logger=bb_logger
+        )
+        # Saved offsets if the sensor takes them, otherwise calibrate and save
+        event_loop.run_until_complete(sensor9DOF.calibrate_at_startup())
+        # Frames are read in the background, the control loop never waits
+        sensor9DOF.start_acquisition()
 
         try:
             bluedot_control: DirectionController | None = (
@@ -346,7 +479,6 @@ def main():
         # Running on Windows, start robot simulator.
         eh.post(event_type="log", message="INFO: Stating Robot Simulator")
         from motor_simulator import MotorSim
-        from encoder_simulator import EncoderSim
         from bb_9dof_sensor_simulator import BB9DOFSensorSimulator
 
         motor_wheel_left: MotorSim = MotorSim(eh=eh)
@@ -354,9 +486,18 @@ def main():
         # motor_arm_left: Motor_General = MotorSim()
         # motor_arm_right: Motor_General = MotorSim()
 
-        enc_wheel_left: EncoderSim = EncoderSim(motor=motor_wheel_left, eh=eh)
+        # Edges are simulated when the encoders are read, no task needed
+        enc_wheel_left: EncoderSim = EncoderSim(
+            summary_tiers=LONG_RUN_SUMMARY_TIERS,
+            motor=motor_wheel_left,
+            logger=bb_logger,
+        )
         enc_wheel_left.start()
-        enc_wheel_right: EncoderSim = EncoderSim(motor=motor_wheel_right, eh=eh)
+        enc_wheel_right: EncoderSim = EncoderSim(
+            summary_tiers=LONG_RUN_SUMMARY_TIERS,
+            motor=motor_wheel_right,
+            logger=bb_logger,
+        )
         enc_wheel_right.start()
         # enc_arm_left: Encoder_General = EncoderSim()
         # enc_arm_right: Encoder_General = EncoderSim()
@@ -372,20 +513,44 @@ def main():
 
     start_prog = [30, 0, 0]  # stand still for 30 seconds
 
-    robot = BalanceBot(  # type: ignore
-        motor_wheel_left=motor_wheel_left,
-        motor_wheel_right=motor_wheel_right,
-        # motor_arm_left=motor_arm_left,
-        # motor_arm_right=motor_arm_right,
-        enc_wheel_left=enc_wheel_left,
-        enc_wheel_right=enc_wheel_right,
-        # enc_arm_left=enc_arm_left,
-        # enc_arm_right=enc_arm_right,
-        sensor9DOF=sensor9DOF,
-        start_prog=start_prog,
-        repeat_prog=None,
-        bluedot_control=bluedot_control,
-    )
+    # Pitch and pitch rate for the PID, and wheel velocity, filtered together
+    state_estimator: BalanceStateEstimator = BalanceStateEstimator()
+    # Pitch from the sensor's fusion, or from its raw gyro and accelerometer
+    control_rate_hz: float = 1000 / cfg.duration.control_update
+    pitch_estimator: Optional[ComplementaryPitchEstimator | KalmanPitchEstimator]
+    if cfg.bno055_sensor.pitch_source == "fused":
+        pitch_estimator = None
+    elif cfg.bno055_sensor.pitch_source == "complementary":
+        pitch_estimator = ComplementaryPitchEstimator(rate_hz=control_rate_hz)
+    elif cfg.bno055_sensor.pitch_source == "kalman":
+        pitch_estimator = KalmanPitchEstimator(rate_hz=control_rate_hz)
+    else:
+        raise ValueError(
+            f"Unknown bno055_sensor.pitch_source: {cfg.bno055_sensor.pitch_source}"
+        )
+
+    try:
+        robot = BalanceBot(  # type: ignore
+            motor_wheel_left=motor_wheel_left,
+            motor_wheel_right=motor_wheel_right,
+            # motor_arm_left=motor_arm_left,
+            # motor_arm_right=motor_arm_right,
+            enc_wheel_left=enc_wheel_left,
+            enc_wheel_right=enc_wheel_right,
+            # enc_arm_left=enc_arm_left,
+            # enc_arm_right=enc_arm_right,
+            sensor9DOF=sensor9DOF,
+            start_prog=start_prog,
+            repeat_prog=None,
+            bluedot_control=bluedot_control,
+            state_estimator=state_estimator,
+            pitch_estimator=pitch_estimator,
+        )
+    finally:
+        if isinstance(sensor9DOF, BB_BNO055Sensor_I2C):
+            sensor9DOF.stop_acquisition()  # logs the acquisition counters
+        if edge_reader is not None:
+            edge_reader.close()  # logs the edge counters, releases the lines
 
 
 if __name__ == "__main__":
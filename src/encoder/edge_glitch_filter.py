@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""Software Glitch Filter for Encoder Edges"""
+
+import threading
+
+
+class EdgeGlitchFilter:
+    """
+    Rejects encoder pulses shorter than a minimum width.
+
+    An edge is only accepted once the level it sets has lasted at least
+    min_pulse_width_us, i.e. no other edge arrived within that time. Until
+    then it is held as a candidate: the next edge, or a flush at read time,
+    decides it. A candidate followed too soon by an edge back to the accepted
+    level was a glitch and both edges are dropped. Accepted edges keep the
+    time of the edge itself, so the filter delays when an edge is reported,
+    not its timestamp.
+
+    With min_pulse_width_us = 0 every change of level is accepted at once.
+    Repeated edges to the level already accepted are always rejected.
+
+    Attributes:
+        no_accepted: int: edges passed on
+        no_rejected: int: glitch pulses and repeated edges dropped
+
+    Methods:
+        edge: int | None: Time of an edge accepted by this edge, if any
+        flush: int | None: Time of the candidate edge if now old enough
+        reset: None: Forget the candidate and counts
+    """
+
+    def __init__(
+        self, *, min_pulse_width_us: float = 0, initial_level: bool | None = None
+    ) -> None:
+        if min_pulse_width_us < 0:
+            raise ValueError(
+                f"min_pulse_width_us must not be negative, got {min_pulse_width_us}"
+            )
+        self._min_pulse_width_ns: int = int(min_pulse_width_us * 1_000)
+        self._initial_level: bool | None = initial_level
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._accepted_level: bool | None = self._initial_level
+            self._candidate_time_ns: int | None = None
+            self._candidate_level: bool = False
+            self.no_accepted: int = 0
+            self.no_rejected: int = 0
+
+    def _accept_candidate(self) -> int:
+        time_ns: int = self._candidate_time_ns
+        self._accepted_level = self._candidate_level
+        self._candidate_time_ns = None
+        self.no_accepted += 1
+        return time_ns
+
+    def edge(self, time_ns: int, level: bool) -> int | None:
+        """
+        Add an edge to level at monotonic time_ns. Returns the time of the
+        edge accepted as a result, if any (this edge when there is no minimum
+        pulse width, otherwise the previous candidate).
+        """
+        with self._lock:
+            accepted_time_ns: int | None = None
+            if self._candidate_time_ns is not None:
+                if time_ns - self._candidate_time_ns >= self._min_pulse_width_ns:
+                    accepted_time_ns = self._accept_candidate()
+                else:  # candidate pulse too short, drop it
+                    self._candidate_time_ns = None
+                    if level == self._accepted_level:
+                        self.no_rejected += 1
+                        return None
+            if level == self._accepted_level:
+                self.no_rejected += 1
+                return accepted_time_ns
+            self._candidate_time_ns = time_ns
+            self._candidate_level = level
+            if self._min_pulse_width_ns == 0:
+                accepted_time_ns = self._accept_candidate()
+            return accepted_time_ns
+
+    def flush(self, now_ns: int) -> int | None:
+        """Accept the candidate edge if it has lasted the minimum pulse width by now_ns"""
+        with self._lock:
+            if (
+                self._candidate_time_ns is None
+                or now_ns - self._candidate_time_ns < self._min_pulse_width_ns
+            ):
+                return None
+            return self._accept_candidate()
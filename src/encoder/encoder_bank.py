@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""Kinematics of All Encoders (Wheels and Arms) from One Array"""
+
+from logging import Logger
+
+import numpy as np
+import numpy.typing as npt
+
+from src.encoder.encoder_sensor_general import (
+    HISTORY_ACCEL_COL,
+    HISTORY_CUM_ACCEL_COL,
+    HISTORY_CUM_JERK_COL,
+    HISTORY_CUM_SPEED_COL,
+    HISTORY_DISTANCE_COL,
+    HISTORY_JERK_COL,
+    HISTORY_NUM_MEMORY_COLS,
+    HISTORY_SPEED_COL,
+    HISTORY_TIME_COL,
+    EncoderGeneral,
+)
+
+# Columns of EncoderBank.snapshot()
+DISTANCE_COL: int = 0
+SPEED_COL: int = 1
+ACCEL_COL: int = 2
+JERK_COL: int = 3
+SNAPSHOT_NUM_COLS: int = 4
+
+
+class EncoderBank:
+    """
+    Keeps the position history of every encoder in one array, one channel per
+    encoder, and reads the kinematics of all of them at once.
+
+    Each encoder still adds its own positions, into its channel of the
+    shared (channels, rows, columns) array. snapshot() binary searches for
+    the average_duration window of all channels together, then gathers the
+    latest and window rows of all channels with single fancy-indexing reads,
+    so a control tick costs one call rather than a round of property reads
+    per encoder.
+
+    Attributes:
+        channels: tuple[str, ...]: encoder names, in snapshot row order
+
+    Methods:
+        snapshot: np.ndarray: (channels, 4) distance, speed, accel. and jerk
+        channel_index: int: Row of an encoder in the snapshot
+    """
+
+    def __init__(
+        self,
+        *,
+        encoders: dict[str, EncoderGeneral],  # name: encoder, e.g. "wheel_left"
+        logger: Logger,
+    ) -> None:
+        if not encoders:
+            raise ValueError("encoders must not be empty")
+        self._channels: tuple[str, ...] = tuple(encoders)
+        self._encoders: tuple[EncoderGeneral, ...] = tuple(encoders.values())
+        self._logger: Logger = logger
+
+        self._VALUE_COLS: list[int] = [
+            HISTORY_SPEED_COL,
+            HISTORY_ACCEL_COL,
+            HISTORY_JERK_COL,
+        ]
+        self._CUM_COLS: list[int] = [
+            HISTORY_CUM_SPEED_COL,
+            HISTORY_CUM_ACCEL_COL,
+            HISTORY_CUM_JERK_COL,
+        ]
+
+        no_channels: int = len(self._encoders)
+        self._storage: npt.NDArray[np.float64] = np.zeros(
+            shape=(
+                no_channels,
+                2 * max(encoder.history_capacity for encoder in self._encoders),
+                HISTORY_NUM_MEMORY_COLS,
+            ),
+            dtype=float,
+        )
+        for channel, encoder in enumerate(self._encoders):
+            encoder.use_history_storage(
+                self._storage[channel, : 2 * encoder.history_capacity]
+            )
+
+        self._channel_rows: npt.NDArray[np.intp] = np.arange(no_channels)
+        self._average_durations: npt.NDArray[np.float64] = np.array(
+            [encoder.average_duration for encoder in self._encoders]
+        )
+        self._start_rows: npt.NDArray[np.intp] = np.zeros(no_channels, dtype=np.intp)
+        self._end_rows: npt.NDArray[np.intp] = np.zeros(no_channels, dtype=np.intp)
+        self._history_lens: npt.NDArray[np.int64] = np.zeros(
+            no_channels, dtype=np.int64
+        )
+        self._logger.info(
+            msg=f"encoder sensor: Created encoder bank of {', '.join(self._channels)}"
+        )
+
+    @property
+    def channels(self) -> tuple[str, ...]:
+        return self._channels
+
+    def channel_index(self, name: str) -> int:
+        """Row of the encoder called name in the snapshot"""
+        return self._channels.index(name)
+
+    def snapshot(self) -> npt.NDArray[np.float64]:
+        """
+        Distance, and speed, accel. and jerk averaged over each encoder's
+        average_duration, as a (channels, 4) array with a row per encoder in
+        channels order and columns DISTANCE_COL, SPEED_COL, ACCEL_COL and
+        JERK_COL. Same values as each encoder's snapshot().
+        """
+        for channel, encoder in enumerate(self._encoders):
+            encoder.flush()
+            self._start_rows[channel], self._end_rows[channel] = (
+                encoder.history_bounds()
+            )
+            self._history_lens[channel] = encoder.history_len
+
+        last_rows: npt.NDArray[np.float64] = self._storage[
+            self._channel_rows, self._end_rows - 1
+        ]
+        first_row_indices: npt.NDArray[np.intp] = self._window_starts(
+            last_rows[:, HISTORY_TIME_COL] - self._average_durations
+        )
+        first_rows: npt.NDArray[np.float64] = self._storage[
+            self._channel_rows, first_row_indices
+        ]
+        window_sums: npt.NDArray[np.float64] = (
+            last_rows[:, self._CUM_COLS]
+            - first_rows[:, self._CUM_COLS]
+            + first_rows[:, self._VALUE_COLS]
+        )
+        kinematics: npt.NDArray[np.float64] = np.empty(
+            shape=(len(self._encoders), SNAPSHOT_NUM_COLS), dtype=float
+        )
+        kinematics[:, DISTANCE_COL] = last_rows[:, HISTORY_DISTANCE_COL]
+        kinematics[:, SPEED_COL:] = (
+            window_sums / (self._end_rows - first_row_indices)[:, np.newaxis]
+        )
+        # Same minimum number of points as EncoderGeneral's speed, accel, jerk
+        kinematics[self._history_lens < 3, SPEED_COL:] = 0
+        kinematics[self._history_lens < 4, JERK_COL] = 0
+        return kinematics
+
+    def _window_starts(
+        self, start_times: npt.NDArray[np.float64]
+    ) -> npt.NDArray[np.intp]:
+        """
+        Storage row index, per channel, of the first row with a time at or
+        after the channel's start time, by a binary search of all channels at
+        once. The most recent row of each channel is always at or after it.
+        """
+        low: npt.NDArray[np.intp] = self._start_rows.copy()
+        high: npt.NDArray[np.intp] = self._end_rows - 1
+        while (low < high).any():
+            middle: npt.NDArray[np.intp] = (low + high) // 2
+            at_or_after: npt.NDArray[np.bool_] = (
+                self._storage[self._channel_rows, middle, HISTORY_TIME_COL]
+                >= start_times
+            )
+            high = np.where(at_or_after, middle, high)
+            low = np.where(at_or_after, low, middle + 1)
+        return low
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""Encoder Sensor reading kernel timestamped edges from the GPIO Character Device"""
+
+from logging import Logger
+from typing import Protocol
+
+import numpy as np
+import numpy.typing as npt
+
+from src.encoder.encoder_sensor_general import EncoderGeneral
+from src.encoder.gpio_edge_events import EdgeEventReader
+from src.save_position_history import (
+    position_history_recorder,
+    save_position_history,
+)
+
+
+class MotorGeneral(Protocol):
+    @property
+    def value(self) -> float:
+        raise NotImplementedError
+
+
+class EncoderCdev(EncoderGeneral):
+    """
+    A two-state digital encoder, like EncoderDigital, whose edges are read
+    by a shared EdgeEventReader rather than gpiozero callbacks.
+
+    Each edge is stored with its kernel timestamp as it arrives, and the
+    position history is derived in bulk when distance, speed, etc. are read.
+
+    Attributes:
+        position: float: number and fractions of distance
+        moving_forward: bool: True if moving forward, False if moving backwards
+
+    Methods:
+        speed: float: Returns average speed over a give time duration
+        accel: float: Returns average acceleration over a give time duration
+        jerk: float: Returns average jerk over a give time duration
+        add_edge_times: None: Called by the EdgeEventReader with new edges
+    """
+
+    def __init__(
+        self,
+        *,
+        signal_pin: int | str,  # RaspberriPi Logical Pin connected to Sensor output Pin
+        edge_reader: EdgeEventReader,
+        slots_per_rev: int = 20,
+        max_no_position_points: int = 10_000,
+        average_duration: float = 1,  # seconds, duration to take averages over
+        sd_mode_forgetting_factor: float = 1.0,  # 1 = whole history, <1 = recent
+        compact_history: bool = False,  # store history as integer ticks
+        record_history: bool = False,  # stream history to file, for whole run queries
+        summary_tiers: tuple[tuple[float, int], ...] = (),  # for summaries()
+        motor: MotorGeneral,
+        logger: Logger,
+    ):
+        super().__init__(
+            max_no_position_points=max_no_position_points,
+            average_duration=average_duration,
+            sd_mode_forgetting_factor=sd_mode_forgetting_factor,
+            history_revs_per_tick=1 / slots_per_rev / 2 if compact_history else None,
+            summary_tiers=summary_tiers,
+            motor=motor,
+            logger=logger,
+        )
+        self._enable_raw_edge_capture(revs_per_edge=1 / slots_per_rev / 2)
+        self._edge_reader: EdgeEventReader = edge_reader
+        self.position: float = 0
+
+        self._record_history: bool = record_history
+        self._signal_pin = signal_pin
+        self._logger.info(
+            f"encoder sensor: Created Character Device Sensor on pin {signal_pin}"
+        )
+
+    def add_edge_times(self, times_ns: npt.NDArray[np.int64]) -> None:
+        """Stores a batch of edges. Runs in the EdgeEventReader thread."""
+        if not self._running:
+            return
+        self._capture_raw_edges(times_ns)
+
+    def start(self) -> None:
+        super().start()
+        self._edge_reader.add_encoder(pin=self._signal_pin, encoder=self)
+        self._running = True
+        self._logger.info(
+            f"encoder sensor: Started Character Device Sensor {self._signal_pin}"
+        )
+        if self._record_history and self._recorder is None:
+            self.record_history(position_history_recorder(logger=self._logger))
+
+    def stop(self) -> None:
+        self._edge_reader.remove_encoder(pin=self._signal_pin)
+        self._running = False
+        self._logger.info(
+            f"encoder sensor: Stopped Character Device Sensor on pin {self._signal_pin}"
+        )
+
+    def close(self) -> None:
+        self.stop()
+        self._logger.info(
+            f"encoder sensor: Character Device Sensor Destroyed on pin {self._signal_pin}"
+        )
+        if self._recorder is not None:
+            self._add_pending_positions()
+            self._recorder.close()
+        else:
+            save_position_history(pos_history=self.position_history_rows())
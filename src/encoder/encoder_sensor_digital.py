@@ -3,13 +3,16 @@
 
 import time
 from logging import Logger
-from typing import Any, Callable, Protocol
+from typing import Callable, Protocol
 
-import numpy as np
-from gpiozero import LineSensor
+from gpiozero import DigitalInputDevice, LineSensor
 
+from src.encoder.edge_glitch_filter import EdgeGlitchFilter
 from src.encoder.encoder_sensor_general import EncoderGeneral
-from src.save_position_history import save_position_history
+from src.save_position_history import (
+    position_history_recorder,
+    save_position_history,
+)
 
 
 class MotorGeneral(Protocol):
@@ -34,6 +37,7 @@ class EncoderDigital(EncoderGeneral):
     Attributes:
         position: float: number and fractions of distance
         moving_forward: bool: True if moving forward, False if moving backwards
+        rejected_edges: int: edges dropped by the glitch filter since start
 
     Methods:
         speed: float: Returns average speed over a give time duration
@@ -51,26 +55,56 @@ class EncoderDigital(EncoderGeneral):
         slots_per_rev: int = 20,
         max_no_position_points: int = 10_000,
         average_duration: float = 1,  # seconds, duration to take averages over
+        sd_mode_forgetting_factor: float = 1.0,  # 1 = whole history, <1 = recent
+        compact_history: bool = False,  # store history as integer ticks
+        record_history: bool = False,  # stream history to file, for whole run queries
+        summary_tiers: tuple[tuple[float, int], ...] = (),  # for summaries()
+        capture_raw_edges: bool = False,  # defer kinematics until they are read
+        edge_detection: str = "averaged",  # "averaged" or "direct"
+        min_pulse_width_us: float = 0,  # shorter pulses are glitches, 0 = no filter
         motor: MotorGeneral,
         logger: Logger,
     ):
         """
         Constructs all the necessary attributes for the Rotation_Encoder
-        object using LineSensor class from gpiozero.
+        object using gpiozero input devices.
+
+        edge_detection "averaged" uses a LineSensor averaging the last 5
+        samples before an edge is seen. "direct" uses a DigitalInputDevice,
+        so an edge is seen on the first sample.
+
+        With capture_raw_edges, the sensor callback only stores the time and
+        direction of each edge. The position history is then derived in bulk
+        when distance, speed, etc. are read, or the history is saved. A glitch
+        filter (min_pulse_width_us > 0) only confirms an edge after the pulse
+        width, so it always uses raw edge capture.
         """
         super().__init__(
             max_no_position_points=max_no_position_points,
             average_duration=average_duration,
+            sd_mode_forgetting_factor=sd_mode_forgetting_factor,
+            history_revs_per_tick=1 / slots_per_rev / 2 if compact_history else None,
+            summary_tiers=summary_tiers,
             motor=motor,
             logger=logger,
         )
 
-        self._sensor: LineSensor = LineSensor(
-            pin=signal_pin,
-            pull_up=True,
-            queue_len=5,
-            # sample_rate=self._sample_freq,
-            partial=True,
+        if edge_detection == "averaged":
+            self._sensor: LineSensor | DigitalInputDevice = LineSensor(
+                pin=signal_pin,
+                pull_up=True,
+                queue_len=5,
+                # sample_rate=self._sample_freq,
+                partial=True,
+            )
+        elif edge_detection == "direct":
+            self._sensor = DigitalInputDevice(pin=signal_pin, pull_up=True)
+        else:
+            raise ValueError(
+                f'edge_detection must be "averaged" or "direct", got {edge_detection!r}'
+            )
+        self._glitch_filter: EdgeGlitchFilter = EdgeGlitchFilter(
+            min_pulse_width_us=min_pulse_width_us
         )
         self._revs_per_half_slot: Callable[[], float] = (
             lambda: 1 / slots_per_rev / 2
@@ -81,8 +115,10 @@ class EncoderDigital(EncoderGeneral):
             lambda: 1 / slots_per_rev if self.moving_forward else -1 / slots_per_rev
         )
         self.position: float
-        self._position_history: Any
+        if capture_raw_edges or min_pulse_width_us > 0:
+            self._enable_raw_edge_capture(revs_per_edge=1 / slots_per_rev / 2)
 
+        self._record_history: bool = record_history
         self._signal_pin = signal_pin
         self._logger.info(f"encoder sensor: Created Digital Sensor on pin {signal_pin}")
 
@@ -93,10 +129,9 @@ class EncoderDigital(EncoderGeneral):
         """
         if not self._running:
             return
-        move_time = time.time()  # seconds
+        move_time = self._clock()  # seconds
         self.position = (
-            self._position_history[self._current_history_len - 1, 2]
-            + self._revs_per_half_slot()
+            self._position_history.last[self._DIST_COL] + self._revs_per_half_slot()
         )
         self.add_position(a_time=move_time, position=self.position)
 
@@ -107,32 +142,66 @@ class EncoderDigital(EncoderGeneral):
         """
         if not self._running:
             return
-        move_time = time.time()  # seconds
+        move_time = self._clock()  # seconds
         self.position = (
-            self._position_history[self._current_history_len - 1, 2]
-            + self._revs_per_slot()
+            self._position_history.last[self._DIST_COL] + self._revs_per_slot()
         )
         self.add_position(a_time=move_time, position=self.position)
 
+    def _on_edge(self, level: bool) -> None:
+        """
+        Passes the edge through the glitch filter. An accepted edge is
+        stored as a raw edge, or added to the position history at once.
+        Runs in the sensor callback thread, so does as little as possible.
+        """
+        if not self._running:
+            return
+        edge_time_ns: int | None = self._glitch_filter.edge(time.monotonic_ns(), level)
+        if edge_time_ns is None:
+            return
+        if self._raw_edges is not None:
+            self._capture_raw_edge(edge_time_ns)
+        else:
+            self._move_a_half_slot()
+
+    def _on_activated(self) -> None:
+        self._on_edge(True)
+
+    def _on_deactivated(self) -> None:
+        self._on_edge(False)
+
+    def _add_pending_positions(self) -> None:
+        if self._raw_edges is not None:
+            edge_time_ns: int | None = self._glitch_filter.flush(time.monotonic_ns())
+            if edge_time_ns is not None:
+                self._capture_raw_edge(edge_time_ns)
+        super()._add_pending_positions()
+
+    @property
+    def rejected_edges(self) -> int:
+        return self._glitch_filter.no_rejected
+
     def start(self):
         super().start()
-        self._sensor.when_line = (
-            self._move_a_half_slot
-        )  # sets function to be run when line is detected
-        self._sensor.when_no_line = (
-            self._move_a_half_slot
-        )  # sets function to be run when no line is detected
+        self._glitch_filter.reset()
+        # sets functions to be run when line / no line is detected
+        self._sensor.when_activated = self._on_activated
+        self._sensor.when_deactivated = self._on_deactivated
 
         self._running = True
         self._logger.info(f"encoder sensor: Started Digital Sensor {self._signal_pin}")
         self.reset_history()
+        if self._record_history and self._recorder is None:
+            self.record_history(position_history_recorder(logger=self._logger))
 
     def stop(self):
-        self._sensor.when_line = None
-        self._sensor.when_no_line = None
+        self._sensor.when_activated = None
+        self._sensor.when_deactivated = None
         self._running = False
         self._logger.info(
-            f"encoder sensor: Stopped Digital Sensor on pin {self._signal_pin}"
+            f"encoder sensor: Stopped Digital Sensor on pin {self._signal_pin}, "
+            f"edges accepted: {self._glitch_filter.no_accepted}, "
+            f"rejected: {self._glitch_filter.no_rejected}"
         )
 
     def close(self):  # releases pins from use by encoder sensor
@@ -140,9 +209,9 @@ class EncoderDigital(EncoderGeneral):
             f"encoder sensor: Digital Sensor Destroyed on pin {self._signal_pin}"
         )
 
-        # Strip history of all empty rows
-        temp_history = self._position_history[
-            ~np.all(self._position_history == 0, axis=1)
-        ]
-        save_position_history(pos_history=temp_history)
+        if self._recorder is not None:
+            self._add_pending_positions()
+            self._recorder.close()
+        else:
+            save_position_history(pos_history=self.position_history_rows())
         self._sensor.close()
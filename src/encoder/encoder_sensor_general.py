@@ -3,13 +3,23 @@
 
 import time
 from logging import Logger
-from typing import Any, Protocol
+from typing import Callable, NamedTuple, Protocol
 
 import numpy as np
 import numpy.typing as npt
 
+from src.encoder.history_ring_buffer import TICK_DTYPE, HistoryRingBuffer
+from src.encoder.position_history_recorder import PositionHistoryRecorder
+from src.encoder.raw_edge_buffer import RawEdgeBuffer
+from src.encoder.tiered_history import TieredHistory
 from src.robot_math.cumulative_average import cumulative_average
-from src.robot_math.find_mode import find_gamma_mode
+from src.robot_math.least_squares_kinematics import (
+    DEFAULT_WINDOW_POINTS,
+    Kinematics,
+    fitted_derivatives,
+)
+from src.robot_math.streaming_gamma_mode import StreamingGammaMode
+from src.robot_math.time_alignment import interpolate_rows
 
 
 class EventHandlerTemplate(Protocol):
@@ -32,6 +42,39 @@ class MotorGeneral(Protocol):
         raise NotImplementedError
 
 
+# Columns of the position history rows, e.g. from history_between. The first
+# HISTORY_NUM_COLS are saved in position history files.
+HISTORY_TIME_COL: int = 0
+HISTORY_TIME_SINCE_START_COL: int = 1
+HISTORY_STEP_DURATION_COL: int = 2
+HISTORY_SD_MODE_COL: int = 3
+HISTORY_SD_MODE_AVG_COL: int = 4
+HISTORY_DISTANCE_COL: int = 5
+HISTORY_SPEED_COL: int = 6
+HISTORY_ACCEL_COL: int = 7
+HISTORY_JERK_COL: int = 8
+HISTORY_NUM_COLS: int = 9
+# Running (prefix) sums of speed, accel. and jerk since reset, so the sum over
+# any window is the difference of two rows. Kept in memory, not saved.
+HISTORY_CUM_SPEED_COL: int = 9
+HISTORY_CUM_ACCEL_COL: int = 10
+HISTORY_CUM_JERK_COL: int = 11
+HISTORY_NUM_MEMORY_COLS: int = 12
+
+# Summary tiers for a whole run: 1 s buckets for an hour, 1 min for a day
+LONG_RUN_SUMMARY_TIERS: tuple[tuple[float, int], ...] = ((1, 3_600), (60, 1_440))
+
+
+class EncoderSnapshot(NamedTuple):
+    time: float  # time of latest position point
+    distance: float  # revolutions
+    speed: float  # revolutions per second, averaged over average_duration
+    accel: float  # averaged over average_duration
+    jerk: float  # averaged over average_duration
+    window_distance: float  # revolutions moved during average_duration
+    period_speed: float  # speed from the last step, decaying once overdue
+
+
 class EncoderGeneral:
     """
     A class to represent a general encoder for tracking changes in position
@@ -39,11 +82,28 @@ class EncoderGeneral:
     Attributes:
         position: float: number and fractions of rotations
         moving_forward: bool: True if moving forward, False if moving backwards
+        history_capacity: int: Number of full position history rows kept
+        start_time: float: Time of the last history reset, or of the first
+                           point imported
+        history_len: int: Number of position points since then, including
+                          those no longer held
+        average_duration: float: Window of speed, accel. and jerk averages
 
     Methods:
         speed: float: Returns average speed over a give time duration
+        period_speed: float: Returns speed from the time between the last
+                             steps, decaying to zero when no step arrives
         accel: float: Returns average acceleration over a give time duration
         jerk: float: Returns average jerk over a give time duration
+        snapshot: EncoderSnapshot: Returns distance, speed, accel and jerk together
+        fitted_kinematics: Kinematics: Returns distance and derivatives from a
+                                       least squares fit
+        flush: None: Adds positions captured but not yet in the history
+        use_history_storage: None: Keeps the position history in a given array
+        history_bounds: tuple[int, int]: Storage indices of the history rows
+        history_between: np.ndarray: Returns history rows within a time range
+        interpolate: tuple: Returns distance and speed at arbitrary times
+        summaries: np.ndarray: Returns downsampled speed and distance summaries
         reset_history: None: Clears position history and calls current
                               position zero.
         motor: Motor_General: Motor object to detect direction of movement
@@ -56,32 +116,73 @@ class EncoderGeneral:
         rearward: int = 0,
         max_no_position_points: int = 10_000,
         average_duration: float = 1,  # seconds - for calc. speed, accel, etc.
+        sd_mode_forgetting_factor: float = 1.0,  # 1 = whole history, <1 = recent
+        stall_timeout: float = 0.5,  # seconds without a step before speed is 0
+        history_revs_per_tick: float | None = None,  # store history as ticks
+        compact_recent_points: int = 256,  # full rows kept when storing ticks
+        # (bucket duration in seconds, number of buckets kept) for summaries(),
+        # () for none, e.g. LONG_RUN_SUMMARY_TIERS where trends are wanted
+        summary_tiers: tuple[tuple[float, int], ...] = (),
         motor: MotorGeneral,  # Motor object to detect direction of movement
         logger: Logger,
+        clock: Callable[[], float] = time.time,  # seconds, time of position points
     ):
         """Constructs all the necessary attributes for the EncoderGeneral"""
-        self._T_COL: int = 0  # Time Column
-        self._T_SINCE_START_COL: int = 1
-        self._S_D_COL: int = 2  # Step Distance Column
-        self._S_D_MODE_COL: int = 3
-        self._S_D_MODE_AVG_COL: int = 4
-        self._DIST_COL: int = 5
-        self._SPEED_COL: int = 6
-        self._ACCEL_COL: int = 7
-        self._JERK_COL: int = 8
-        self._TOT_NUM_COLS: int = 9
+        self._T_COL: int = HISTORY_TIME_COL  # Time Column
+        self._T_SINCE_START_COL: int = HISTORY_TIME_SINCE_START_COL
+        self._S_D_COL: int = HISTORY_STEP_DURATION_COL  # Step Distance Column
+        self._S_D_MODE_COL: int = HISTORY_SD_MODE_COL
+        self._S_D_MODE_AVG_COL: int = HISTORY_SD_MODE_AVG_COL
+        self._DIST_COL: int = HISTORY_DISTANCE_COL
+        self._SPEED_COL: int = HISTORY_SPEED_COL
+        self._ACCEL_COL: int = HISTORY_ACCEL_COL
+        self._JERK_COL: int = HISTORY_JERK_COL
+        self._TOT_NUM_COLS: int = HISTORY_NUM_COLS  # saved in history files
+        self._CUM_SPEED_COL: int = HISTORY_CUM_SPEED_COL
+        self._CUM_ACCEL_COL: int = HISTORY_CUM_ACCEL_COL
+        self._CUM_JERK_COL: int = HISTORY_CUM_JERK_COL
+        self._TOT_NUM_HISTORY_COLS: int = HISTORY_NUM_MEMORY_COLS
 
         self._max_no_position_points: int = max_no_position_points
+        # Compact history: every position point is kept as an integer time
+        # (ns) and position (ticks of history_revs_per_tick revolutions), and
+        # only the most recent compact_recent_points as full rows of floats.
+        # The full rows of the whole history are derived when saved.
+        self._revs_per_tick: float | None = history_revs_per_tick
+        self._compact_recent_points: int = compact_recent_points
+        # Min, max and mean speed and distance per 1 s, 1 min, etc. bucket,
+        # for trends over longer than the position history holds
+        self._summaries: TieredHistory | None = (
+            TieredHistory(tiers=summary_tiers) if summary_tiers else None
+        )
 
         # time in seconds speed, accel and jerk are averaged over
         self._average_duration: float = average_duration
+        # Step duration mode estimate, updated in O(1) for each new position
+        self._sd_mode_forgetting_factor: float = sd_mode_forgetting_factor
+        self._sd_mode_estimator: StreamingGammaMode = StreamingGammaMode(
+            forgetting_factor=sd_mode_forgetting_factor
+        )
+        self._stall_timeout: float = stall_timeout
         self._motor: MotorGeneral = motor
         self._logger: Logger = logger
+        self._clock: Callable[[], float] = clock
         self._running = False
 
+        # Raw edge capture, for sensors that only store edge times as they
+        # happen (see _enable_raw_edge_capture). Edge times are monotonic ns,
+        # converted to epoch seconds with the offset taken at reset.
+        self._raw_edges: RawEdgeBuffer | None = None
+        self._revs_per_raw_edge: float = 0
+        self._monotonic_to_epoch: float = 0
+        # Optional streaming recorder of every history row (record_history)
+        self._recorder: PositionHistoryRecorder | None = None
+        # Array the position history is kept in, when shared with other
+        # encoders (see EncoderBank), None for an array of its own
+        self._history_storage: npt.NDArray[np.float64] | None = None
+
     def start(self) -> None:
         self.reset_history()
-        self._position_history[0, self._T_COL] = time.time()
 
     def stop(self) -> None:
         raise NotImplementedError
@@ -90,6 +191,65 @@ class EncoderGeneral:
     def moving_forward(self) -> bool:
         return self._motor.value >= 0
 
+    @property
+    def average_duration(self) -> float:
+        """Duration (sec.) speed, accel. and jerk are averaged over"""
+        return self._average_duration
+
+    @property
+    def start_time(self) -> float:
+        """Time of the last history reset, or of the first point imported"""
+        return self._start_time
+
+    @property
+    def history_len(self) -> int:
+        """
+        Number of position points since start_time, including those no longer
+        held. Pending positions are not counted until flush().
+        """
+        return self._current_history_len
+
+    def flush(self) -> None:
+        """
+        Add to the history the positions captured but not yet added, e.g.
+        raw edges. The getters do this themselves; call it before reading
+        history_len, or several encoders' histories at one time.
+        """
+        self._add_pending_positions()
+
+    @property
+    def history_capacity(self) -> int:
+        """Number of full position history rows kept"""
+        if self._revs_per_tick is None:
+            return self._max_no_position_points
+        return min(self._max_no_position_points, self._compact_recent_points)
+
+    def use_history_storage(self, storage: npt.NDArray[np.float64]) -> None:
+        """
+        Keep the position history in storage, a (2 * history_capacity,
+        HISTORY_NUM_MEMORY_COLS) array, e.g. a channel of an EncoderBank,
+        rather than an array of its own. Rows already held are moved to it.
+        """
+        self._history_storage = storage
+        old_history: HistoryRingBuffer | None = getattr(self, "_position_history", None)
+        if old_history is None:  # not started, reset_history will use storage
+            return
+        self._position_history = HistoryRingBuffer(
+            capacity=self.history_capacity,
+            num_cols=self._TOT_NUM_HISTORY_COLS,
+            time_col=self._T_COL,
+            buffer=storage,
+        )
+        self._position_history.extend(old_history.view())
+
+    def history_bounds(self) -> tuple[int, int]:
+        """
+        Indices into the history storage of the oldest row held and one past
+        the most recent row, e.g. for an EncoderBank to read the rows of its
+        channel. Call flush() first for the latest positions.
+        """
+        return self._position_history.bounds()
+
     def reset_history(self) -> None:
         """
         Clear history of position, setting current position as zero.
@@ -113,122 +273,473 @@ class EncoderGeneral:
               7            0           0              0            0             0             0        0         0           0
               8            0           0              0            0             0             0        0         0           0
               9            0           0              0            0             0             0        0         0           0
+          Once max_no_position_points are held, each new point overwrites
+          the oldest one (HistoryRingBuffer). time_since_start stays measured
+          from the reset and is never recalculated.
+          With history_revs_per_tick, max_no_position_points applies to
+          _tick_history, (time_ns, ticks) records, and _position_history
+          holds only the most recent compact_recent_points rows.
         """
 
-        self._position_history: Any = np.zeros(  # type: ignore
-            shape=(self._max_no_position_points, self._TOT_NUM_COLS), dtype=float
-        )  # (time, time_since_start, step_duration, sd_mode, sd_mode_run_avg, position, speed, acceleration, jerk)
+        self._start_time: float = self._clock()
+        self._tick_history: HistoryRingBuffer | None = None
+        if self._revs_per_tick is not None:
+            self._tick_history = HistoryRingBuffer(
+                capacity=self._max_no_position_points,
+                dtype=TICK_DTYPE,
+                time_col="time_ns",
+                mirrored=False,  # only read whole, when saved
+            )
+            self._tick_history.append((round(self._start_time * 1e9), 0))
+        self._position_history: HistoryRingBuffer = HistoryRingBuffer(
+            capacity=self.history_capacity,
+            num_cols=self._TOT_NUM_HISTORY_COLS,
+            time_col=self._T_COL,
+            buffer=self._history_storage,
+        )  # (time, time_since_start, step_duration, sd_mode, sd_mode_run_avg, position, speed, acceleration, jerk, cum. speed, cum. accel, cum. jerk)
+        self._new_row: npt.NDArray[np.float64] = np.zeros(
+            shape=self._TOT_NUM_HISTORY_COLS, dtype=float
+        )
+        self._new_row[self._T_COL] = self._start_time
+        self._position_history.append(self._new_row)
+        if self._recorder is not None:
+            self._recorder.record(self._new_row)
+        # Number of points added since reset, including the starting point.
+        # Unlike len(self._position_history), this keeps counting once the
+        # history is full and the oldest points are being overwritten.
         self._current_history_len: int = 1
+        self._sd_mode_estimator.reset()
+        if self._summaries is not None:
+            self._summaries.clear()
+        if self._raw_edges is not None:
+            self._raw_edges.take()  # edges before the reset are not wanted
+            self._monotonic_to_epoch = self._clock() - time.monotonic()
         self._logger.info(msg=f"encoder sensor: Encoder Sensor history reset")
 
     def add_position(self, a_time: float, position: float) -> None:
         self._current_history_len += 1
-
-        # Check if max history length exceeded. Roll if so
-        if self._current_history_len > self._max_no_position_points:
-            self._current_history_len = self._max_no_position_points
-            self._position_history = np.roll(self._position_history, -1)
-            # first position point will roll to last but be overwritten with new data
-
-            # Calculate time_since_start column since we have new baseline
-            # zero time at beginning of remaining history
-            self._position_history[0:, self._T_SINCE_START_COL] = (
-                self._position_history[0:, self._T_COL]
-                - self._position_history[0, self._T_COL]
-            )
-
-        # Add New data to the position history
+        prev_row: npt.NDArray[np.float64] = self._position_history.last
+        new_row: npt.NDArray[np.float64] = self._new_row
 
         # Add current time for new position point (Column T_COL)
-        self._position_history[self._current_history_len - 1, self._T_COL] = a_time
+        new_row[self._T_COL] = a_time
 
         # Calculate time_since_start for new position point (Column T_SINCE_START_COL)
-        self._position_history[
-            self._current_history_len - 1, self._T_SINCE_START_COL
-        ] = (
-            self._position_history[self._current_history_len - 1, self._T_COL]
-            - self._position_history[0, self._T_COL]
-        )
+        new_row[self._T_SINCE_START_COL] = a_time - self._start_time
 
         # Calculate step duration for new position point (Column S_D_COL)
-        self._position_history[self._current_history_len - 1, self._S_D_COL] = (
-            self._position_history[
-                self._current_history_len - 1, self._T_SINCE_START_COL
-            ]
-            - self._position_history[
-                self._current_history_len - 2, self._T_SINCE_START_COL
-            ]
-        )
+        new_row[self._S_D_COL] = a_time - prev_row[self._T_COL]
 
         # Calculate mode of step duration up to latest history point (Column S_D_MODE_COL)
-        self._position_history[
-            self._current_history_len - 1, self._S_D_MODE_COL
-        ] = find_gamma_mode(
-            data=self._position_history[: self._current_history_len, self._S_D_COL]
+        new_row[self._S_D_MODE_COL] = self._sd_mode_estimator.update(
+            new_row[self._S_D_COL]
         )
 
         # Calculate step duration mode cumulative average for new position point (Column S_D_MODE_AVG_COL)
-        self._position_history[
-            self._current_history_len - 1, self._S_D_MODE_AVG_COL
-        ] = cumulative_average(
-            prev_cumulative_average=self._position_history[
-                self._current_history_len - 2, self._S_D_MODE_AVG_COL
-            ],
-            new_value=self._position_history[
-                self._current_history_len - 1, self._S_D_MODE_COL
-            ],
+        new_row[self._S_D_MODE_AVG_COL] = cumulative_average(
+            prev_cumulative_average=prev_row[self._S_D_MODE_AVG_COL],
+            new_value=new_row[self._S_D_MODE_COL],
             number_of_history_points=self._current_history_len,
         )
 
         # Add position for new position point (Column POS_COL)
-        self._position_history[self._current_history_len - 1, self._DIST_COL] = position
-
-        # Add speed for new position point (Column SPEED_COL)
-        self._position_history[self._current_history_len - 1, self._SPEED_COL] = (
-            self._position_history[self._current_history_len - 1, self._DIST_COL]
-            - self._position_history[self._current_history_len - 2, self._DIST_COL]
-        ) / self._position_history[self._current_history_len - 1, self._S_D_COL]
-
-        # Add acceleration for new position point (Column ACCEL_COL)
-        if self._current_history_len >= 3:
-            self._position_history[self._current_history_len - 1, self._ACCEL_COL] = (
-                self._position_history[self._current_history_len - 1, self._SPEED_COL]
-                - self._position_history[self._current_history_len - 2, self._SPEED_COL]
-            ) / self._position_history[self._current_history_len - 1, self._S_D_COL]
-        else:
-            self._position_history[self._current_history_len - 1, self._ACCEL_COL] = 0
-
-        # Add jerk for new position point (Column JERK_COL)
-        if self._current_history_len >= 4:
-            self._position_history[self._current_history_len - 1, self._JERK_COL] = (
-                self._position_history[self._current_history_len - 1, self._ACCEL_COL]
-                - self._position_history[self._current_history_len - 2, self._ACCEL_COL]
-            ) / self._position_history[self._current_history_len - 1, self._S_D_COL]
+        new_row[self._DIST_COL] = position
+
+        if new_row[self._S_D_COL] <= 0:
+            # Two points at the same time. Keep last speed rather than an inf
+            # that would stay in the running sums until the next reset.
+            new_row[self._SPEED_COL] = prev_row[self._SPEED_COL]
+            new_row[self._ACCEL_COL] = 0
+            new_row[self._JERK_COL] = 0
         else:
-            self._position_history[self._current_history_len - 1, self._JERK_COL] = 0
+            # Add speed for new position point (Column SPEED_COL)
+            new_row[self._SPEED_COL] = (
+                new_row[self._DIST_COL] - prev_row[self._DIST_COL]
+            ) / new_row[self._S_D_COL]
+
+            # Add acceleration for new position point (Column ACCEL_COL)
+            if self._current_history_len >= 3:
+                new_row[self._ACCEL_COL] = (
+                    new_row[self._SPEED_COL] - prev_row[self._SPEED_COL]
+                ) / new_row[self._S_D_COL]
+            else:
+                new_row[self._ACCEL_COL] = 0
+
+            # Add jerk for new position point (Column JERK_COL)
+            if self._current_history_len >= 4:
+                new_row[self._JERK_COL] = (
+                    new_row[self._ACCEL_COL] - prev_row[self._ACCEL_COL]
+                ) / new_row[self._S_D_COL]
+            else:
+                new_row[self._JERK_COL] = 0
+
+        # Add running sums for new position point (Columns CUM_..._COL)
+        new_row[self._CUM_SPEED_COL] = (
+            prev_row[self._CUM_SPEED_COL] + new_row[self._SPEED_COL]
+        )
+        new_row[self._CUM_ACCEL_COL] = (
+            prev_row[self._CUM_ACCEL_COL] + new_row[self._ACCEL_COL]
+        )
+        new_row[self._CUM_JERK_COL] = (
+            prev_row[self._CUM_JERK_COL] + new_row[self._JERK_COL]
+        )
+
+        self._position_history.append(new_row)
+        if self._recorder is not None:
+            self._recorder.record(new_row)
+        if self._summaries is not None:
+            self._summaries.add_point(a_time, new_row[self._SPEED_COL], position)
+        if self._tick_history is not None:
+            self._tick_history.append(
+                (round(a_time * 1e9), round(position / self._revs_per_tick))
+            )
+
+        # lazy arguments: no string is built per edge unless debugging
+        self._logger.debug(
+            "encoder sensor: Added position: time: %s, pos.: %s", a_time, position
+        )
+
+    def add_positions(self, a_times: npt.ArrayLike, positions: npt.ArrayLike) -> None:
+        """
+        Add a block of position points at once. Gives the same history as
+        calling add_position for each point, but the derived columns are
+        calculated with vectorized passes over the whole block.
+        """
+        a_times = np.asarray(a_times, dtype=float)
+        positions = np.asarray(positions, dtype=float)
+        no_points: int = len(a_times)
+        if no_points == 0:
+            return
+        # number of history points, including each new one, as in add_position
+        history_lens: npt.NDArray[np.int64] = self._current_history_len + np.arange(
+            1, no_points + 1
+        )
+        self._current_history_len += no_points
+        new_rows: npt.NDArray[np.float64] = self._derived_rows(
+            prev_row=self._position_history.last.copy(),
+            a_times=a_times,
+            positions=positions,
+            history_lens=history_lens,
+            sd_mode_estimator=self._sd_mode_estimator,
+        )
+        self._position_history.extend(new_rows)
+        if self._recorder is not None:
+            self._recorder.record(new_rows)
+        if self._summaries is not None:
+            self._summaries.add_points(a_times, new_rows[:, self._SPEED_COL], positions)
+        if self._tick_history is not None:
+            new_ticks: npt.NDArray[np.void] = np.empty(no_points, dtype=TICK_DTYPE)
+            new_ticks["time_ns"] = np.rint(a_times * 1e9)
+            new_ticks["ticks"] = np.rint(positions / self._revs_per_tick)
+            self._tick_history.extend(new_ticks)
+
+        self._logger.debug(
+            "encoder sensor: Added %d positions: last time: %s, pos.: %s",
+            no_points,
+            a_times[-1],
+            positions[-1],
+        )
+
+    def _derived_rows(
+        self,
+        *,
+        prev_row: npt.NDArray[np.float64],
+        a_times: npt.NDArray[np.float64],
+        positions: npt.NDArray[np.float64],
+        history_lens: npt.NDArray[np.int64],
+        sd_mode_estimator: StreamingGammaMode,
+    ) -> npt.NDArray[np.float64]:
+        """
+        History rows for position points following prev_row, calculated as
+        add_position would one by one. history_lens: number of history points
+        up to and including each new point.
+        """
+        no_points: int = len(a_times)
+        new_rows: npt.NDArray[np.float64] = np.zeros(
+            shape=(no_points, self._TOT_NUM_HISTORY_COLS), dtype=float
+        )
+        new_rows[:, self._T_COL] = a_times
+        new_rows[:, self._T_SINCE_START_COL] = a_times - self._start_time
+        step_durations: npt.NDArray[np.float64] = np.diff(
+            a_times, prepend=prev_row[self._T_COL]
+        )
+        new_rows[:, self._S_D_COL] = step_durations
 
-        self._logger.info(
-            msg=f"encoder sensor: Added position: time: {a_time}, pos.: {position}"
+        sd_modes: npt.NDArray[np.float64] = np.array(
+            [
+                sd_mode_estimator.update(step_duration)
+                for step_duration in step_durations.tolist()
+            ]
+        )
+        new_rows[:, self._S_D_MODE_COL] = sd_modes
+        new_rows[:, self._S_D_MODE_AVG_COL] = (
+            prev_row[self._S_D_MODE_AVG_COL] * (history_lens[0] - 1)
+            + np.cumsum(sd_modes)
+        ) / history_lens
+
+        new_rows[:, self._DIST_COL] = positions
+
+        # Points at the same time as the one before keep the last speed and
+        # have no accel. or jerk, as in add_position
+        moved: npt.NDArray[np.bool_] = step_durations > 0
+        safe_step_durations: npt.NDArray[np.float64] = np.where(
+            moved, step_durations, 1
         )
+        speeds: npt.NDArray[np.float64] = (
+            np.diff(positions, prepend=prev_row[self._DIST_COL]) / safe_step_durations
+        )
+        if not moved.all():
+            last_moved_row: npt.NDArray[np.int64] = np.maximum.accumulate(
+                np.where(moved, np.arange(no_points), -1)
+            )
+            speeds = np.where(
+                last_moved_row >= 0, speeds[last_moved_row], prev_row[self._SPEED_COL]
+            )
+        new_rows[:, self._SPEED_COL] = speeds
 
-    def _row_with_cumulative_time_greater_than_target(self, target: float) -> int:
-        # find the row number of the first data point with cumulative time > _average_duration
-        history_lines_to_use = int(np.argmax(self._position_history[:, 0] >= target))
+        accels: npt.NDArray[np.float64] = (
+            np.diff(speeds, prepend=prev_row[self._SPEED_COL]) / safe_step_durations
+        )
+        accels[~moved | (history_lens < 3)] = 0
+        new_rows[:, self._ACCEL_COL] = accels
 
-        # If we don't have enough for average duration, use all we have
-        if history_lines_to_use == 0:
-            history_lines_to_use = self._current_history_len
+        jerks: npt.NDArray[np.float64] = (
+            np.diff(accels, prepend=prev_row[self._ACCEL_COL]) / safe_step_durations
+        )
+        jerks[~moved | (history_lens < 4)] = 0
+        new_rows[:, self._JERK_COL] = jerks
+
+        new_rows[:, self._CUM_SPEED_COL] = prev_row[self._CUM_SPEED_COL] + np.cumsum(
+            speeds
+        )
+        new_rows[:, self._CUM_ACCEL_COL] = prev_row[self._CUM_ACCEL_COL] + np.cumsum(
+            accels
+        )
+        new_rows[:, self._CUM_JERK_COL] = prev_row[self._CUM_JERK_COL] + np.cumsum(
+            jerks
+        )
 
-        return history_lines_to_use
+        return new_rows
+
+    def position_history_rows(self) -> npt.NDArray[np.float64]:
+        """
+        Every position history point held, in the columns saved to position
+        history files. With compact history the rows are derived from the
+        ticks; if the oldest points have been overwritten, the derived
+        columns of the first rows differ from those calculated at the time.
+        """
+        self._add_pending_positions()
+        if self._tick_history is None:
+            return self._position_history.view()[:, : self._TOT_NUM_COLS]
+        return self._materialized_rows(self._tick_history.view())[
+            :, : self._TOT_NUM_COLS
+        ]
+
+    def _materialized_rows(
+        self,
+        ticks: npt.NDArray[np.void],
+        sd_mode_estimator: StreamingGammaMode | None = None,
+    ) -> npt.NDArray[np.float64]:
+        """All history columns for the last len(ticks) position points"""
+        a_times: npt.NDArray[np.float64] = ticks["time_ns"] * 1e-9
+        positions: npt.NDArray[np.float64] = ticks["ticks"] * self._revs_per_tick
+        rows: npt.NDArray[np.float64] = np.zeros(
+            shape=(len(ticks), self._TOT_NUM_HISTORY_COLS), dtype=float
+        )
+        rows[0, self._T_COL] = a_times[0]
+        rows[0, self._T_SINCE_START_COL] = a_times[0] - self._start_time
+        rows[0, self._DIST_COL] = positions[0]
+        if len(ticks) > 1:
+            first_history_len: int = self._current_history_len - len(ticks) + 1
+            rows[1:] = self._derived_rows(
+                prev_row=rows[0],
+                a_times=a_times[1:],
+                positions=positions[1:],
+                history_lens=first_history_len + np.arange(1, len(ticks)),
+                sd_mode_estimator=(
+                    StreamingGammaMode(
+                        forgetting_factor=self._sd_mode_forgetting_factor
+                    )
+                    if sd_mode_estimator is None
+                    else sd_mode_estimator
+                ),
+            )
+        return rows
+
+    def record_history(self, recorder: PositionHistoryRecorder | None) -> None:
+        """
+        Stream every history row added from now on (and those held now) to
+        recorder, or stop if None. The recorder is started if need be and its
+        rows are the columns saved to position history files.
+        """
+        self._add_pending_positions()
+        self._recorder = recorder
+        if recorder is None:
+            return
+        recorder.start()
+        recorder.record(self._position_history.view())
+
+    def history_between(
+        self, start_time: float, end_time: float = np.inf
+    ) -> npt.NDArray[np.float64]:
+        """
+        Rows, in the columns saved to position history files, with
+        start_time <= time <= end_time. Served from the in memory history if
+        it still holds start_time, otherwise from the recording (see
+        record_history) as a zero-copy memory map. Without a recording, only
+        the rows still in memory are returned.
+        """
+        self._add_pending_positions()
+        history: npt.NDArray[np.float64] = self._position_history.view()
+        history_from_start: bool = self._current_history_len == len(history)
+        if (
+            self._recorder is not None
+            and not history_from_start
+            and start_time < history[0, self._T_COL]
+        ):
+            return self._recorder.between(start_time, end_time, time_col=self._T_COL)
+        times: npt.NDArray[np.float64] = history[:, self._T_COL]
+        return history[
+            np.searchsorted(times, start_time, side="left") : np.searchsorted(
+                times, end_time, side="right"
+            ),
+            : self._TOT_NUM_COLS,
+        ]
+
+    def interpolate(
+        self, times: npt.ArrayLike
+    ) -> tuple[npt.NDArray[np.float64], npt.NDArray[np.float64]]:
+        """
+        Distance and speed linearly interpolated at each of times, e.g. the
+        times of sensor readings. Times before the in memory history are
+        served from the recording, if there is one. Times outside the history
+        get the first or latest values.
+        """
+        self._add_pending_positions()
+        times = np.asarray(times, dtype=float)
+        history: npt.NDArray[np.float64] = self._position_history.view()
+        if (
+            self._recorder is not None
+            and len(times)
+            and self._current_history_len != len(history)
+            and times.min() < history[0, self._T_COL]
+        ):
+            history = self._recorder.recorded_rows()
+        values: npt.NDArray[np.float64] = interpolate_rows(
+            history, times, [self._DIST_COL, self._SPEED_COL], time_col=self._T_COL
+        )
+        return values[:, 0], values[:, 1]
+
+    def summaries(
+        self, start_time: float = -np.inf, end_time: float = np.inf
+    ) -> npt.NDArray[np.float64]:
+        """
+        Downsampled history from start_time to end_time: one row per bucket of
+        the finest summary tier still holding start_time, with columns as in
+        src.encoder.tiered_history (start, count, speed min, max, mean,
+        distance min, max, last).
+        """
+        self._add_pending_positions()
+        if self._summaries is None:
+            raise ValueError("encoder sensor: no summary tiers")
+        return self._summaries.summaries(start_time, end_time)
+
+    def export_tick_history(self) -> bytes:
+        """Compact history as raw TICK_DTYPE records, oldest first"""
+        self._add_pending_positions()
+        if self._tick_history is None:
+            raise ValueError("encoder sensor: history is not stored as ticks")
+        return self._tick_history.view().tobytes()
+
+    def import_tick_history(self, data: bytes) -> None:
+        """Replace the history with TICK_DTYPE records from export_tick_history"""
+        if self._revs_per_tick is None:
+            raise ValueError("encoder sensor: history is not stored as ticks")
+        ticks: npt.NDArray[np.void] = np.frombuffer(data, dtype=TICK_DTYPE)
+        if len(ticks) == 0:
+            raise ValueError("encoder sensor: no ticks to import")
+        self.reset_history()
+        # start the history from the first record instead of now
+        self._start_time = float(ticks["time_ns"][0] * 1e-9)
+        self._tick_history.clear()
+        self._tick_history.extend(ticks)
+        self._current_history_len = len(ticks)
+        self._position_history.clear()
+        self._position_history.extend(
+            self._materialized_rows(ticks, sd_mode_estimator=self._sd_mode_estimator)
+        )
+
+    def _enable_raw_edge_capture(self, *, revs_per_edge: float) -> None:
+        """
+        Store only the time and direction of each edge as it happens
+        (_capture_raw_edge(s)) and add the positions to the history in bulk
+        when it is next read.
+        """
+        self._raw_edges = RawEdgeBuffer()
+        self._revs_per_raw_edge = revs_per_edge
+
+    def _capture_raw_edge(self, time_ns: int) -> None:
+        """Store an edge at monotonic time_ns, in the current direction"""
+        self._raw_edges.append(time_ns, 1 if self.moving_forward else -1)
+
+    def _capture_raw_edges(self, times_ns: npt.NDArray[np.int64]) -> None:
+        """Store a batch of edges at monotonic times_ns, in the current direction"""
+        self._raw_edges.extend(times_ns, 1 if self.moving_forward else -1)
+
+    def _add_pending_positions(self) -> None:
+        """
+        Add to the history the positions of all raw edges captured since the
+        last call, in one block. Called before the history is read.
+        """
+        if self._raw_edges is None:
+            return
+        times_ns, directions = self._raw_edges.take()
+        if len(times_ns) == 0:
+            return
+        move_times = times_ns * 1e-9 + self._monotonic_to_epoch
+        positions = (
+            self._position_history.last[self._DIST_COL]
+            + np.cumsum(directions) * self._revs_per_raw_edge
+        )
+        self.position = float(positions[-1])
+        self.add_positions(move_times, positions)
+
+    def _average_duration_window(self) -> tuple[npt.NDArray[np.float64], int]:
+        """
+        All history and the index of its first point within _average_duration
+        of the latest point, found by binary search of the time column. If we
+        don't have enough for average duration, the first point we have.
+        """
+        history: npt.NDArray[np.float64] = self._position_history.view()
+        first_row: int = int(
+            np.searchsorted(
+                history[:, self._T_COL],
+                history[-1, self._T_COL] - self._average_duration,
+                side="left",
+            )
+        )
+        return history, first_row
+
+    def _window_average(
+        self,
+        history: npt.NDArray[np.float64],
+        first_row: int,
+        col: int,
+        cum_col: int,
+    ) -> float:
+        """Average of col from first_row to the end of history in O(1)"""
+        window_sum: float = (
+            history[-1, cum_col] - history[first_row, cum_col] + history[first_row, col]
+        )
+        return float(window_sum / (len(history) - first_row))
 
     @property
     def distance(self) -> float:
         """
         Getter for Distance Encoder has observed
         """
-        distance: float = self._position_history[
-            self._current_history_len - 1, self._DIST_COL
-        ]
+        self._add_pending_positions()
+        distance: float = self._position_history.last[self._DIST_COL]
         self._logger.debug(msg=f"encoder sensor: Distance: {distance:.2f}")
         return distance
 
@@ -238,45 +749,67 @@ class EncoderGeneral:
         Getter for speed Encoder has observed, averaged by time over the
         duration specified.
         """
+        self._add_pending_positions()
         if self._current_history_len < 3:
             return 0
 
-        # find the row number of the first data point with cumulative time > _average_duration
-        self._history_lines_to_use = self._row_with_cumulative_time_greater_than_target(
-            self._average_duration
+        avg_speed: float = self._window_average(
+            *self._average_duration_window(), self._SPEED_COL, self._CUM_SPEED_COL
         )
-
-        speeds_list: npt.ArrayLike = self._position_history[
-            self._current_history_len
-            - self._history_lines_to_use : self._current_history_len,
-            self._SPEED_COL,
-        ]
-
-        avg_speed: float = float(np.average(speeds_list))  # type: ignore
         self._logger.debug(msg=f"encoder sensor: Speed: {avg_speed:.2f}")
         return avg_speed
 
+    def _period_speed(self, history: npt.NDArray[np.float64], now: float) -> float:
+        """
+        Speed of the last step. Once more time has passed since the last step
+        than the step took, the wheel can have moved at most one step in that
+        time, so speed is bounded by step distance / time since the last step
+        and decays toward zero. It is zero after stall_timeout with no step.
+        """
+        if len(history) < 2:
+            return 0
+        time_since_step: float = now - history[-1, self._T_COL]
+        if time_since_step >= self._stall_timeout:
+            return 0
+        last_speed: float = float(history[-1, self._SPEED_COL])
+        step_distance: float = abs(
+            history[-1, self._DIST_COL] - history[-2, self._DIST_COL]
+        )
+        if step_distance == 0 or time_since_step <= history[-1, self._S_D_COL]:
+            return last_speed
+        return float(
+            np.copysign(
+                min(abs(last_speed), step_distance / time_since_step), last_speed
+            )
+        )
+
+    @property
+    def period_speed(self) -> float:
+        """
+        Getter for speed from the time between the last two steps, falling
+        toward zero when the next step is overdue. Responds to a stall
+        without waiting for the next step, unlike the averaged speed.
+        """
+        self._add_pending_positions()
+        period_speed: float = self._period_speed(
+            self._position_history.last_n(2), self._clock()
+        )
+        self._logger.debug(msg=f"encoder sensor: Period Speed: {period_speed:.2f}")
+        return period_speed
+
     @property
     def accel(self) -> float:
         """
         Getter for acceleration Encoder has observed, averaged by time over
         the duration specified.
         """
+        self._add_pending_positions()
         if self._current_history_len < 3:
             return 0
 
-        # find the row number of the first data point with cumulative time > _average_duration
-        self._history_lines_to_use = self._row_with_cumulative_time_greater_than_target(
-            self._average_duration
+        avg_accel: float = self._window_average(
+            *self._average_duration_window(), self._ACCEL_COL, self._CUM_ACCEL_COL
         )
-
-        accels_list: npt.ArrayLike = self._position_history[
-            self._current_history_len
-            - self._history_lines_to_use : self._current_history_len,
-            self._ACCEL_COL,
-        ]
-
-        avg_accel: float = float(np.average(accels_list))  # type: ignore
         self._logger.debug(f"encoder sensor: Accel: {avg_accel:.2f}")
         return avg_accel
 
@@ -286,21 +819,76 @@ class EncoderGeneral:
         Getter for jerk Encoder has observed, averaged by time over
         the duration specifieda.
         """
+        self._add_pending_positions()
         if self._current_history_len < 4:
             return 0
 
-        # find the row number of the first data point with cumulative time > _average_duration
-        self._history_lines_to_use = self._row_with_cumulative_time_greater_than_target(
-            self._average_duration
+        avg_jerk: float = self._window_average(
+            *self._average_duration_window(), self._JERK_COL, self._CUM_JERK_COL
         )
-
-        jerks_list: npt.ArrayLike = self._position_history[
-            self._current_history_len
-            - self._history_lines_to_use : self._current_history_len,
-            self._JERK_COL,
-        ]
-
-        avg_jerk: float = float(np.average(jerks_list))  # type: ignore
         self._logger.debug(msg=f"encoder sensor: Jerk: {avg_jerk:.2f}")
 
         return avg_jerk
+
+    def fitted_kinematics(
+        self, window_points: int = DEFAULT_WINDOW_POINTS
+    ) -> Kinematics:
+        """
+        Distance, speed, accel. and jerk at the latest point from a cubic
+        least squares fit to the positions over the duration specified,
+        rather than averaged first differences. Less amplified edge timing
+        noise; all derivatives come from one matrix product.
+        """
+        self._add_pending_positions()
+        history, first_row = self._average_duration_window()
+        # From the point before the window, so it is covered from its start
+        window: npt.NDArray[np.float64] = history[max(first_row - 1, 0) :]
+        derivatives: npt.NDArray[np.float64] = fitted_derivatives(
+            window[:, self._T_COL],
+            window[:, self._DIST_COL],
+            duration=self._average_duration,
+            window_points=window_points,
+        )
+        return Kinematics(*derivatives.tolist())
+
+    def snapshot(self) -> EncoderSnapshot:
+        """
+        Distance, and speed, accel. and jerk averaged over the duration
+        specified, from a single binary search of the history. Cheaper than
+        reading the distance, speed, accel and jerk properties one by one.
+        """
+        self._add_pending_positions()
+        history, first_row = self._average_duration_window()
+        last_row: npt.NDArray[np.float64] = history[-1]
+        enough_for_speed: bool = self._current_history_len >= 3
+        encoder_snapshot = EncoderSnapshot(
+            time=float(last_row[self._T_COL]),
+            distance=float(last_row[self._DIST_COL]),
+            speed=(
+                self._window_average(
+                    history, first_row, self._SPEED_COL, self._CUM_SPEED_COL
+                )
+                if enough_for_speed
+                else 0
+            ),
+            accel=(
+                self._window_average(
+                    history, first_row, self._ACCEL_COL, self._CUM_ACCEL_COL
+                )
+                if enough_for_speed
+                else 0
+            ),
+            jerk=(
+                self._window_average(
+                    history, first_row, self._JERK_COL, self._CUM_JERK_COL
+                )
+                if self._current_history_len >= 4
+                else 0
+            ),
+            window_distance=float(
+                last_row[self._DIST_COL] - history[first_row, self._DIST_COL]
+            ),
+            period_speed=self._period_speed(history[-2:], self._clock()),
+        )
+        self._logger.debug(msg=f"encoder sensor: Snapshot: {encoder_snapshot}")
+        return encoder_snapshot
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Encoder Edge Events from the Linux GPIO Character Device
+
+A single EdgeEventReader thread waits on one request for all encoder lines
+(wheels and arms) and, each time it wakes, reads every edge event queued by
+the kernel and hands them to the encoders in per-line batches. Event times
+are the kernel's CLOCK_MONOTONIC timestamps taken at the interrupt, so step
+durations do not include Python thread wake-up latency.
+"""
+
+import threading
+from datetime import timedelta
+from logging import Logger
+from typing import NamedTuple, Protocol
+
+import numpy as np
+import numpy.typing as npt
+
+DEFAULT_GPIO_CHIP: str = "/dev/gpiochip0"
+
+
+class EdgeEvent(NamedTuple):
+    line: int  # line offset on the GPIO chip (BCM GPIO number on a Raspberry Pi)
+    time_ns: int  # kernel CLOCK_MONOTONIC timestamp
+    rising: bool
+
+
+class EdgeEventSource(Protocol):
+    def wait_edge_events(self, timeout: float) -> bool:
+        """True if events are ready to read within timeout seconds"""
+        raise NotImplementedError
+
+    def read_edge_events(self) -> list[EdgeEvent]:
+        """All events ready, oldest first"""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        raise NotImplementedError
+
+
+class EdgeEventSink(Protocol):
+    def add_edge_times(self, times_ns: npt.NDArray[np.int64]) -> None:
+        raise NotImplementedError
+
+
+def gpio_line_offset(pin: int | str) -> int:
+    """Line offset of a pin given as a number or gpiozero style "GPIO26" name"""
+    if isinstance(pin, str):
+        pin = pin.upper().removeprefix("BCM").removeprefix("GPIO")
+    return int(pin)
+
+
+class GpiodEdgeEventSource:
+    """
+    Edge events for a set of lines of a GPIO chip, read with libgpiod v2
+    (the gpiod package, imported on first use).
+
+    Lines are pulled up, report both edges and are timestamped with
+    CLOCK_MONOTONIC, the clock of time.monotonic_ns().
+    """
+
+    def __init__(
+        self,
+        *,
+        pins: list[int | str],
+        chip_path: str = DEFAULT_GPIO_CHIP,
+        debounce_us: int = 0,
+        consumer: str = "balance_bot_encoders",
+    ) -> None:
+        import gpiod
+        from gpiod.line import Bias, Clock, Edge
+
+        self._Rising = gpiod.EdgeEvent.Type.RISING_EDGE
+        settings = gpiod.LineSettings(
+            edge_detection=Edge.BOTH,
+            bias=Bias.PULL_UP,
+            event_clock=Clock.MONOTONIC,
+            debounce_period=timedelta(microseconds=debounce_us),
+        )
+        self._request = gpiod.request_lines(
+            chip_path,
+            consumer=consumer,
+            config={tuple(gpio_line_offset(pin) for pin in pins): settings},
+        )
+
+    def wait_edge_events(self, timeout: float) -> bool:
+        return self._request.wait_edge_events(timedelta(seconds=timeout))
+
+    def read_edge_events(self) -> list[EdgeEvent]:
+        return [
+            EdgeEvent(
+                line=event.line_offset,
+                time_ns=event.timestamp_ns,
+                rising=event.event_type == self._Rising,
+            )
+            for event in self._request.read_edge_events()
+        ]
+
+    def close(self) -> None:
+        self._request.release()
+
+
+class EdgeEventReader:
+    """
+    Reads edge events for every registered encoder in one thread.
+
+    Methods:
+        add_encoder: None: Send the edges of a line to an encoder
+        remove_encoder: None: Stop sending the edges of a line
+        read_batch: int: Wait up to timeout for events and dispatch them
+        start: None: Start the reading thread
+        stop: None: Stop the reading thread
+        close: None: Stop and release the event source
+    """
+
+    def __init__(
+        self,
+        *,
+        source: EdgeEventSource,
+        poll_timeout: float = 0.1,  # seconds, how often stop() is noticed
+        logger: Logger,
+    ) -> None:
+        self._source: EdgeEventSource = source
+        self._poll_timeout: float = poll_timeout
+        self._logger: Logger = logger
+        self._encoders: dict[int, EdgeEventSink] = {}
+        self._thread: threading.Thread | None = None
+        self._stop_event = threading.Event()
+        self.no_batches: int = 0
+        self.no_events: int = 0
+        self.no_unclaimed_events: int = 0  # events on lines with no encoder
+
+    def add_encoder(self, *, pin: int | str, encoder: EdgeEventSink) -> None:
+        self._encoders[gpio_line_offset(pin)] = encoder
+
+    def remove_encoder(self, *, pin: int | str) -> None:
+        self._encoders.pop(gpio_line_offset(pin), None)
+
+    def read_batch(self, timeout: float) -> int:
+        """Dispatch all events ready within timeout seconds. Returns number read."""
+        if not self._source.wait_edge_events(timeout):
+            return 0
+        events: list[EdgeEvent] = self._source.read_edge_events()
+        if not events:
+            return 0
+        lines: npt.NDArray[np.int64] = np.fromiter(
+            (event.line for event in events), dtype=np.int64, count=len(events)
+        )
+        times_ns: npt.NDArray[np.int64] = np.fromiter(
+            (event.time_ns for event in events), dtype=np.int64, count=len(events)
+        )
+        for line in np.unique(lines).tolist():
+            encoder: EdgeEventSink | None = self._encoders.get(line)
+            if encoder is None:
+                self.no_unclaimed_events += int(np.count_nonzero(lines == line))
+                continue
+            encoder.add_edge_times(times_ns[lines == line])
+        self.no_batches += 1
+        self.no_events += len(events)
+        return len(events)
+
+    def _run(self) -> None:
+        while not self._stop_event.is_set():
+            try:
+                self.read_batch(self._poll_timeout)
+            except Exception as e:
+                self._logger.error(msg=f"encoder sensor: Edge event reader error: {e}")
+                self._stop_event.wait(self._poll_timeout)
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="encoder_edge_events", daemon=True
+        )
+        self._thread.start()
+        self._logger.info(msg="encoder sensor: Started edge event reader")
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stop_event.set()
+        self._thread.join()
+        self._thread = None
+        self._logger.info(
+            msg=f"encoder sensor: Stopped edge event reader: {self.no_events} events in {self.no_batches} batches"
+        )
+
+    def close(self) -> None:
+        self.stop()
+        self._source.close()
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""Preallocated Ring Buffer for Encoder Position History"""
+
+from typing import Any
+
+import numpy as np
+import numpy.typing as npt
+
+
+class HistoryRingBuffer:
+    """
+    A fixed-capacity, time-ordered history of rows with O(1) append.
+
+    Rows are either num_cols floats, or single records of a structured dtype
+    (num_cols None), e.g. TICK_DTYPE, with time_col the name of a field.
+
+    Every row is written twice, at index i and at index i + capacity of a
+    (2 * capacity, num_cols) array. The most recent n rows are therefore
+    always one contiguous block of the array, so "last n rows" and "last T
+    seconds" can be returned as zero-copy views even after the buffer has
+    wrapped around. The price is twice the memory of the rows held: the
+    speed, accel. and jerk getters read such a window every control tick,
+    and a single-copy ring would have to copy most of them once wrapped.
+
+    A history that is only read whole and rarely, e.g. one saved to a file,
+    can be kept once (mirrored False) in a (capacity, num_cols) array. Its
+    windows are then copies when they wrap around the end of the array, and
+    bounds_since is unavailable.
+
+    The array can be supplied as buffer, e.g. a slice of a larger array
+    shared with other buffers, rather than allocated.
+
+    Attributes:
+        capacity: int: maximum number of rows kept
+        num_cols: int | None: number of columns in each row, None if records
+        nbytes: int: memory used by the buffer
+
+    Methods:
+        append: None: Adds a row, overwriting the oldest row when full
+        extend: None: Adds a block of rows, overwriting the oldest rows when full
+        last: np.ndarray: View of the most recent row
+        last_n: np.ndarray: View of the most recent n rows, oldest first
+        since: np.ndarray: View of all rows with time >= a given time
+        bounds: tuple[int, int]: Buffer indices of all rows held
+        bounds_since: tuple[int, int]: Buffer indices of the rows since a given time
+        view: np.ndarray: View of all rows held, oldest first
+        mirrored: bool: Whether every row is kept twice
+        clear: None: Forget all rows
+    """
+
+    def __init__(
+        self,
+        *,
+        capacity: int,
+        num_cols: int | None = None,
+        dtype: npt.DTypeLike = float,
+        time_col: int | str = 0,
+        buffer: npt.NDArray[Any] | None = None,  # array to use, None to allocate
+        mirrored: bool = True,  # keep every row twice, for zero-copy windows
+    ) -> None:
+        if capacity < 1:
+            raise ValueError(f"capacity must be at least 1, got {capacity}")
+        self._capacity: int = capacity
+        self._num_cols: int | None = num_cols
+        self._time_col: int | str = time_col
+        self._mirrored: bool = mirrored
+        no_slots: int = 2 * capacity if mirrored else capacity
+        shape: tuple[int, ...] = (
+            (no_slots,) if num_cols is None else (no_slots, num_cols)
+        )
+        if buffer is None:
+            buffer = np.zeros(shape=shape, dtype=dtype)
+        elif buffer.shape != shape:
+            raise ValueError(f"buffer shape must be {shape}, got {buffer.shape}")
+        self._buffer: npt.NDArray[Any] = buffer
+        self._head: int = 0  # index of the slot the next row is written to
+        self._len: int = 0
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    @property
+    def num_cols(self) -> int | None:
+        return self._num_cols
+
+    @property
+    def mirrored(self) -> bool:
+        return self._mirrored
+
+    @property
+    def nbytes(self) -> int:
+        """Memory used by the buffer"""
+        return self._buffer.nbytes
+
+    def __len__(self) -> int:
+        return self._len
+
+    def clear(self) -> None:
+        """Forget all rows. The buffer itself is reused, not reallocated."""
+        self._head = 0
+        self._len = 0
+
+    def append(self, row: npt.ArrayLike) -> None:
+        """Add a row to the end of the history in O(1)"""
+        self._buffer[self._head] = row
+        if self._mirrored:
+            self._buffer[self._head + self._capacity] = row
+        self._head += 1
+        if self._head == self._capacity:
+            self._head = 0
+        if self._len < self._capacity:
+            self._len += 1
+
+    def extend(self, rows: npt.ArrayLike) -> None:
+        """Add a block of rows to the end of the history, oldest first"""
+        rows = np.asarray(rows, dtype=self._buffer.dtype)
+        if len(rows) > self._capacity:
+            rows = rows[-self._capacity :]
+        no_rows: int = len(rows)
+        first_part: int = min(no_rows, self._capacity - self._head)
+        end: int = self._head + first_part
+        self._buffer[self._head : end] = rows[:first_part]
+        wrapped_part: int = no_rows - first_part
+        if wrapped_part:
+            self._buffer[:wrapped_part] = rows[first_part:]
+        if self._mirrored:
+            self._buffer[self._head + self._capacity : end + self._capacity] = rows[
+                :first_part
+            ]
+            if wrapped_part:
+                self._buffer[self._capacity : self._capacity + wrapped_part] = rows[
+                    first_part:
+                ]
+        self._head = (self._head + no_rows) % self._capacity
+        self._len = min(self._len + no_rows, self._capacity)
+
+    @property
+    def last(self) -> npt.NDArray[Any]:
+        """View of the most recent row"""
+        if self._len == 0:
+            raise IndexError("history is empty")
+        return self._buffer[self._head - 1]  # index -1 is the end of the array
+
+    def last_n(self, n: int) -> npt.NDArray[Any]:
+        """
+        View of the most recent n rows (fewer if not yet available), oldest
+        first. If not mirrored, a copy when the rows wrap around.
+        """
+        n = max(0, min(n, self._len))
+        if self._mirrored:
+            end: int = self._head + self._capacity
+            return self._buffer[end - n : end]
+        start: int = self._head - n
+        if start >= 0:
+            return self._buffer[start : self._head]
+        if self._head == 0:
+            return self._buffer[start:]
+        return np.concatenate((self._buffer[start:], self._buffer[: self._head]))
+
+    def view(self) -> npt.NDArray[Any]:
+        """View of every row held, oldest first"""
+        return self.last_n(self._len)
+
+    def bounds(self) -> tuple[int, int]:
+        """
+        Indices into the buffer array of the oldest row and one past the most
+        recent row. The rows between are contiguous.
+        """
+        if not self._mirrored:
+            raise ValueError("bounds needs a mirrored buffer")
+        end: int = self._head + self._capacity
+        return end - self._len, end
+
+    def bounds_since(self, a_time: float) -> tuple[int, int]:
+        """
+        Indices into the buffer array of the first row with a time at or after
+        a_time and one past the most recent row. The rows between are contiguous.
+        """
+        if not self._mirrored:
+            raise ValueError("bounds_since needs a mirrored buffer")
+        end: int = self._head + self._capacity
+        return end - self._len + self._no_rows_before(self.view(), a_time), end
+
+    def _no_rows_before(self, rows: npt.NDArray[Any], a_time: float) -> int:
+        times: npt.NDArray[Any] = (
+            rows[self._time_col] if self._num_cols is None else rows[:, self._time_col]
+        )
+        return int(np.searchsorted(times, a_time, side="left"))
+
+    def since(self, a_time: float) -> npt.NDArray[Any]:
+        """
+        View of the rows with a time at or after a_time, oldest first. If not
+        mirrored, a copy when the rows wrap around.
+        """
+        rows: npt.NDArray[Any] = self.view()
+        return rows[self._no_rows_before(rows, a_time) :]
+
+
+# Encoder edge as an integer time and position, 12 bytes rather than a row
+# of floats. Position is in ticks (steps of the encoder, e.g. half slots).
+TICK_DTYPE: np.dtype = np.dtype([("time_ns", np.int64), ("ticks", np.int32)])
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""Differential Drive Odometry from the Wheel Encoders"""
+
+import math
+from logging import Logger
+from typing import NamedTuple
+
+import numpy as np
+import numpy.typing as npt
+
+from src.encoder.encoder_sensor_general import (
+    HISTORY_DISTANCE_COL,
+    HISTORY_TIME_COL,
+    EncoderGeneral,
+)
+from src.encoder.history_ring_buffer import HistoryRingBuffer
+
+# Columns of the pose history
+T_COL: int = 0
+X_COL: int = 1
+Y_COL: int = 2
+HEADING_COL: int = 3
+PATH_COL: int = 4  # signed distance travelled along the path
+LINEAR_VEL_COL: int = 5
+ANGULAR_VEL_COL: int = 6
+NUM_COLS: int = 7
+
+
+class Pose(NamedTuple):
+    time: float  # of the latest encoder edge used
+    x: float  # metres, forward from the start
+    y: float  # metres, left of the start
+    heading: float  # radians, anticlockwise from the start
+    linear_vel: float  # metres per second, averaged over average_duration
+    angular_vel: float  # radians per second, averaged over average_duration
+
+
+def wrap_angle(angle: float) -> float:
+    """Angle in radians wrapped to [-pi, pi)"""
+    return (angle + math.pi) % (2 * math.pi) - math.pi
+
+
+class DiffDriveOdometry:
+    """
+    Dead reckoning of a two wheeled robot from its wheel encoders.
+
+    Each update() takes the position points the wheel encoders have added
+    since the last update, merges them in time order and integrates the pose
+    over every edge (midpoint arc steps), in one block of array operations.
+    The cost per edge is constant however long the run. If an encoder's
+    history is reset, e.g. by EncoderDigital.start() or import_tick_history,
+    its distances are measured from its new history, keeping the pose.
+
+    The encoder heading can be blended with an absolute yaw, e.g. the BNO055
+    euler angle, with add_imu_yaw: the heading is moved yaw_blend of the way
+    toward it, so the gyro/magnetometer corrects wheel slip without the
+    encoders' per-edge resolution being lost.
+
+    Attributes:
+        track_width: float: metres between the wheels' contact points
+
+    Methods:
+        update: None: Integrate edges added since the last update
+        pose: Pose: Latest pose, updated first
+        add_imu_yaw: None: Blend the heading with an absolute yaw
+        pose_history: np.ndarray: View of recent pose rows since a given time
+        reset: None: Set the pose to zero at the current encoder positions
+    """
+
+    def __init__(
+        self,
+        *,
+        enc_wheel_left: EncoderGeneral,
+        enc_wheel_right: EncoderGeneral,
+        wheel_diameter: float,  # metres
+        track_width: float,  # metres between the wheels' contact points
+        average_duration: float = 0.25,  # seconds, for linear and angular vel.
+        yaw_blend: float = 0.02,  # 0 = encoders only, 1 = IMU yaw only
+        max_no_pose_points: int = 10_000,
+        logger: Logger,
+    ) -> None:
+        if not 0 <= yaw_blend <= 1:
+            raise ValueError(f"yaw_blend must be in [0, 1], got {yaw_blend}")
+        self._enc_wheel_left: EncoderGeneral = enc_wheel_left
+        self._enc_wheel_right: EncoderGeneral = enc_wheel_right
+        self._metres_per_rev: float = math.pi * wheel_diameter
+        self._track_width: float = track_width
+        self._average_duration: float = average_duration
+        self._yaw_blend: float = yaw_blend
+        self._logger: Logger = logger
+        self._history: HistoryRingBuffer = HistoryRingBuffer(
+            capacity=max_no_pose_points, num_cols=NUM_COLS, time_col=T_COL
+        )
+        self.reset()
+
+    @property
+    def track_width(self) -> float:
+        return self._track_width
+
+    def reset(self) -> None:
+        """Zero the pose. Encoder distances from now on are measured from here."""
+        left: npt.NDArray[np.float64] = self._enc_wheel_left.history_between(-np.inf)
+        right: npt.NDArray[np.float64] = self._enc_wheel_right.history_between(-np.inf)
+        self._last_left_time: float = float(left[-1, HISTORY_TIME_COL])
+        self._last_right_time: float = float(right[-1, HISTORY_TIME_COL])
+        self._left_revs: float = float(left[-1, HISTORY_DISTANCE_COL])
+        self._right_revs: float = float(right[-1, HISTORY_DISTANCE_COL])
+        self._imu_yaw_offset: float | None = None
+        self._no_points: tuple[int, int] = (
+            self._enc_wheel_left.history_len,
+            self._enc_wheel_right.history_len,
+        )
+        self._start_times: tuple[float, float] = (
+            self._enc_wheel_left.start_time,
+            self._enc_wheel_right.start_time,
+        )
+        self._history.clear()
+        self._last_row: npt.NDArray[np.float64] = np.zeros(NUM_COLS)
+        self._last_row[T_COL] = max(self._last_left_time, self._last_right_time)
+        self._history.append(self._last_row)
+        self._logger.info(msg="odometry: Pose reset to zero")
+
+    def _new_points(
+        self, encoder: EncoderGeneral, last_time: float
+    ) -> tuple[npt.NDArray[np.float64], npt.NDArray[np.float64]]:
+        """Times and distances (revs) of an encoder's points after last_time"""
+        rows: npt.NDArray[np.float64] = encoder.history_between(
+            np.nextafter(last_time, np.inf)
+        )
+        return rows[:, HISTORY_TIME_COL], rows[:, HISTORY_DISTANCE_COL]
+
+    def _baseline(self, encoder: EncoderGeneral) -> tuple[float, float]:
+        """
+        Time and distance (revs) to measure an encoder's points from after its
+        history was reset: its start, or if its history (e.g. one imported)
+        goes past the latest pose, its last row at or before that pose.
+        """
+        rows: npt.NDArray[np.float64] = encoder.history_between(-np.inf)
+        times: npt.NDArray[np.float64] = rows[:, HISTORY_TIME_COL]
+        since: float = max(float(times[0]), float(self._last_row[T_COL]))
+        row: npt.NDArray[np.float64] = rows[
+            np.searchsorted(times, since, side="right") - 1
+        ]
+        self._logger.info(msg="odometry: Encoder history reset, distance re-based")
+        return float(row[HISTORY_TIME_COL]), float(row[HISTORY_DISTANCE_COL])
+
+    def update(self) -> None:
+        """Integrate the pose over every wheel encoder edge since the last update"""
+        self._enc_wheel_left.flush()
+        self._enc_wheel_right.flush()
+        no_points: tuple[int, int] = (
+            self._enc_wheel_left.history_len,
+            self._enc_wheel_right.history_len,
+        )
+        start_times: tuple[float, float] = (
+            self._enc_wheel_left.start_time,
+            self._enc_wheel_right.start_time,
+        )
+        if no_points == self._no_points and start_times == self._start_times:
+            return  # no new edges, the usual case
+        # A history reset restarts the encoder's distances and point count
+        if start_times[0] != self._start_times[0] or no_points[0] < self._no_points[0]:
+            self._last_left_time, self._left_revs = self._baseline(self._enc_wheel_left)
+        if start_times[1] != self._start_times[1] or no_points[1] < self._no_points[1]:
+            self._last_right_time, self._right_revs = self._baseline(
+                self._enc_wheel_right
+            )
+        self._no_points = no_points
+        self._start_times = start_times
+        left_times, left_revs = self._new_points(
+            self._enc_wheel_left, self._last_left_time
+        )
+        right_times, right_revs = self._new_points(
+            self._enc_wheel_right, self._last_right_time
+        )
+        if len(left_times) == 0 and len(right_times) == 0:
+            return
+
+        # Both wheels' distances at every edge of either wheel, in time order.
+        # A wheel's distance holds from its previous edge.
+        times: npt.NDArray[np.float64] = np.concatenate((left_times, right_times))
+        order: npt.NDArray[np.intp] = np.argsort(times, kind="stable")
+        times = times[order]
+        is_left: npt.NDArray[np.bool_] = order < len(left_times)
+        left_at: npt.NDArray[np.float64] = np.concatenate(
+            ([self._left_revs], left_revs)
+        )[np.cumsum(is_left)]
+        right_at: npt.NDArray[np.float64] = np.concatenate(
+            ([self._right_revs], right_revs)
+        )[np.cumsum(~is_left)]
+        # Edges of both wheels at the same time are one step, not a turn and back
+        last_at_time: npt.NDArray[np.bool_] = np.append(times[1:] != times[:-1], True)
+        times, left_at, right_at = (
+            times[last_at_time],
+            left_at[last_at_time],
+            right_at[last_at_time],
+        )
+
+        left_steps: npt.NDArray[np.float64] = (
+            np.diff(left_at, prepend=self._left_revs) * self._metres_per_rev
+        )
+        right_steps: npt.NDArray[np.float64] = (
+            np.diff(right_at, prepend=self._right_revs) * self._metres_per_rev
+        )
+        path_steps: npt.NDArray[np.float64] = (left_steps + right_steps) / 2
+        heading_steps: npt.NDArray[np.float64] = (
+            right_steps - left_steps
+        ) / self._track_width
+
+        rows: npt.NDArray[np.float64] = np.empty(shape=(len(times), NUM_COLS))
+        rows[:, T_COL] = times
+        rows[:, HEADING_COL] = self._last_row[HEADING_COL] + np.cumsum(heading_steps)
+        mid_headings: npt.NDArray[np.float64] = rows[:, HEADING_COL] - heading_steps / 2
+        rows[:, X_COL] = self._last_row[X_COL] + np.cumsum(
+            path_steps * np.cos(mid_headings)
+        )
+        rows[:, Y_COL] = self._last_row[Y_COL] + np.cumsum(
+            path_steps * np.sin(mid_headings)
+        )
+        rows[:, PATH_COL] = self._last_row[PATH_COL] + np.cumsum(path_steps)
+        self._add_velocities(rows)
+        self._history.extend(rows)
+
+        self._last_row = rows[-1].copy()
+        if len(left_times):
+            self._last_left_time = float(left_times[-1])
+            self._left_revs = float(left_revs[-1])
+        if len(right_times):
+            self._last_right_time = float(right_times[-1])
+            self._right_revs = float(right_revs[-1])
+
+    def _add_velocities(self, rows: npt.NDArray[np.float64]) -> None:
+        """
+        Linear and angular velocity of each new row, from the change in path
+        distance and heading since the first row within average_duration
+        before it, in the history or earlier in rows
+        """
+        history: npt.NDArray[np.float64] = self._history.view()
+        thresholds: npt.NDArray[np.float64] = rows[:, T_COL] - self._average_duration
+        # New rows are all after the history, so the first row at or after a
+        # threshold is in the history if any row there is, else in rows
+        in_history: npt.NDArray[np.intp] = np.searchsorted(
+            history[:, T_COL], thresholds
+        )
+        in_rows: npt.NDArray[np.intp] = np.searchsorted(rows[:, T_COL], thresholds)
+        first_rows: npt.NDArray[np.float64] = np.where(
+            (in_history < len(history))[:, np.newaxis],
+            history[np.minimum(in_history, len(history) - 1)],
+            rows[in_rows],
+        )
+        durations: npt.NDArray[np.float64] = rows[:, T_COL] - first_rows[:, T_COL]
+        moving: npt.NDArray[np.bool_] = durations > 0
+        rows[:, LINEAR_VEL_COL:] = 0
+        rows[moving, LINEAR_VEL_COL] = (
+            rows[moving, PATH_COL] - first_rows[moving, PATH_COL]
+        ) / durations[moving]
+        rows[moving, ANGULAR_VEL_COL] = (
+            rows[moving, HEADING_COL] - first_rows[moving, HEADING_COL]
+        ) / durations[moving]
+
+    def pose(self) -> Pose:
+        """Latest pose, after integrating any new encoder edges"""
+        self.update()
+        return Pose(
+            time=float(self._last_row[T_COL]),
+            x=float(self._last_row[X_COL]),
+            y=float(self._last_row[Y_COL]),
+            heading=float(self._last_row[HEADING_COL]),
+            linear_vel=float(self._last_row[LINEAR_VEL_COL]),
+            angular_vel=float(self._last_row[ANGULAR_VEL_COL]),
+        )
+
+    def add_imu_yaw(self, yaw: float) -> None:
+        """
+        Blend the heading with an absolute yaw, in degrees clockwise as the
+        BNO055 euler angle z. The first yaw given sets the offset between the
+        two, so yaw need not be zero at the start.
+        """
+        self.update()
+        imu_heading: float = -math.radians(yaw)
+        if self._imu_yaw_offset is None:
+            self._imu_yaw_offset = self._last_row[HEADING_COL] - imu_heading
+            return
+        heading: float = self._last_row[HEADING_COL]
+        error: float = wrap_angle(imu_heading + self._imu_yaw_offset - heading)
+        if self._yaw_blend == 0 or error == 0:
+            return
+        # A row at the same time with the corrected heading, so the history
+        # keeps the pose the control loop was given
+        self._last_row = self._last_row.copy()
+        self._last_row[HEADING_COL] = heading + self._yaw_blend * error
+        self._history.append(self._last_row)
+
+    def pose_history(self, start_time: float = -np.inf) -> npt.NDArray[np.float64]:
+        """View of pose rows (columns as the module's *_COL) from start_time"""
+        self.update()
+        return self._history.since(start_time)
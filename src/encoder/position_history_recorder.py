@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Append-only Binary Recording of Encoder Position History
+
+Rows are written as they are added, by a background thread, so a crash
+loses at most the last flush interval rather than the whole run. The file
+is a 64 byte header followed by raw little-endian float64 rows; a partly
+written last row is ignored when read. to_csv converts a recording to the
+position history CSV layout written by save_position_history.
+
+Usage:
+    python -m src.encoder.position_history_recorder "logs/*_position_history.pos"
+"""
+
+import argparse
+import glob
+import os
+import threading
+from logging import Logger
+
+import numpy as np
+import numpy.typing as npt
+
+MAGIC: bytes = b"BBPOSHIST"
+FORMAT_VERSION: int = 1
+HEADER_LEN: int = 64
+ROW_DTYPE: np.dtype = np.dtype("<f8")
+
+
+def _header(num_cols: int) -> bytes:
+    header: bytes = MAGIC + f" v{FORMAT_VERSION} cols={num_cols} dtype=<f8\n".encode()
+    return header.ljust(HEADER_LEN, b" ")
+
+
+def _num_cols_from_header(header: bytes, fname: str) -> int:
+    if not header.startswith(MAGIC) or len(header) < HEADER_LEN:
+        raise ValueError(f"{fname} is not a position history recording")
+    fields: dict[str, str] = dict(
+        field.split("=", 1) for field in header.decode().split() if "=" in field
+    )
+    return int(fields["cols"])
+
+
+def load_recording(fname: str, mmap: bool = False) -> npt.NDArray[np.float64]:
+    """
+    All complete rows of a recording, as (rows, cols) float64. With mmap,
+    a read-only memory map of the file, so only the pages used are read.
+    """
+    with open(fname, "rb") as f:
+        num_cols: int = _num_cols_from_header(f.read(HEADER_LEN), fname)
+    no_rows: int = (
+        (os.path.getsize(fname) - HEADER_LEN) // ROW_DTYPE.itemsize // num_cols
+    )
+    if not mmap:
+        data: npt.NDArray[np.float64] = np.fromfile(
+            fname, dtype=ROW_DTYPE, count=no_rows * num_cols, offset=HEADER_LEN
+        )
+        return data.reshape(no_rows, num_cols)
+    if no_rows == 0:  # an empty file cannot be mapped
+        return np.zeros(shape=(0, num_cols), dtype=ROW_DTYPE)
+    return np.memmap(
+        fname, dtype=ROW_DTYPE, mode="r", offset=HEADER_LEN, shape=(no_rows, num_cols)
+    )
+
+
+def to_csv(fname: str, fname_csv: str | None = None) -> str:
+    """Write a recording in the position history CSV layout. Returns CSV file name."""
+    if fname_csv is None:
+        fname_csv = os.path.splitext(fname)[0] + ".csv"
+    np.savetxt(fname=fname_csv, X=load_recording(fname), fmt="%.7f", delimiter=",")
+    return fname_csv
+
+
+class PositionHistoryRecorder:
+    """
+    Records position history rows to a binary file from a background thread.
+
+    record() only copies the rows into a preallocated buffer under a lock;
+    the writer thread swaps it with a spare buffer and appends the rows to the
+    file every flush_interval seconds, or sooner once flush_every_points rows
+    are waiting.
+
+    Methods:
+        record: None: Queue rows to be written
+        start: None: Open the file and start the writer thread
+        flush: None: Write all queued rows now
+        recorded_rows: np.memmap: Memory map of every row recorded
+        between: np.memmap: Memory map of rows recorded within a time range
+        close: None: Write all queued rows, stop the thread and close the file
+    """
+
+    def __init__(
+        self,
+        *,
+        fname: str,
+        num_cols: int = 9,  # columns saved in position history files
+        flush_every_points: int = 1_000,
+        flush_interval: float = 1.0,  # seconds
+        logger: Logger,
+    ) -> None:
+        self._fname: str = fname
+        self._num_cols: int = num_cols
+        self._flush_every_points: int = flush_every_points
+        self._flush_interval: float = flush_interval
+        self._logger: Logger = logger
+
+        self._lock = threading.Lock()
+        self._rows: npt.NDArray[np.float64] = np.zeros(
+            shape=(2 * flush_every_points, num_cols), dtype=ROW_DTYPE
+        )
+        self._spare_rows: npt.NDArray[np.float64] = np.zeros_like(self._rows)
+        self._len: int = 0
+        self._write_lock = threading.Lock()
+        self._flush_now = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._file = None
+        self.no_rows_written: int = 0
+        self._mmap_rows: npt.NDArray[np.float64] | None = None
+
+    @property
+    def fname(self) -> str:
+        return self._fname
+
+    def record(self, rows: npt.NDArray[np.float64]) -> None:
+        """Queue a row, or block of rows, to be written. Only the first num_cols are kept."""
+        rows = np.atleast_2d(rows)
+        no_rows: int = len(rows)
+        with self._lock:
+            end: int = self._len + no_rows
+            if end > len(self._rows):
+                self._rows = np.resize(
+                    self._rows, (max(end, 2 * len(self._rows)), self._num_cols)
+                )
+            self._rows[self._len : end] = rows[:, : self._num_cols]
+            self._len = end
+        if end >= self._flush_every_points:
+            self._flush_now.set()
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        os.makedirs(os.path.dirname(self._fname) or ".", exist_ok=True)
+        self._file = open(self._fname, "wb")
+        self._file.write(_header(self._num_cols))
+        self._file.flush()
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="position_history_recorder", daemon=True
+        )
+        self._thread.start()
+        self._logger.info(
+            msg=f"encoder sensor: Recording position history to {self._fname}"
+        )
+
+    def flush(self) -> None:
+        """Append all queued rows to the file"""
+        with self._write_lock:  # keeps rows in order if flushed from two threads
+            with self._lock:
+                rows, no_rows = self._rows, self._len
+                if len(self._spare_rows) < len(rows):
+                    self._spare_rows = np.zeros_like(rows)
+                self._rows, self._spare_rows = self._spare_rows, rows
+                self._len = 0
+            if no_rows == 0 or self._file is None:
+                return
+            self._file.write(rows[:no_rows].tobytes())
+            self._file.flush()
+            self.no_rows_written += no_rows
+
+    def recorded_rows(self) -> npt.NDArray[np.float64]:
+        """
+        Every row recorded so far, including those still queued, as a
+        read-only memory map of the file. Memory use does not grow with the
+        length of the run: pages are only read when used and can be dropped.
+        """
+        self.flush()
+        if self._mmap_rows is None or len(self._mmap_rows) != self.no_rows_written:
+            self._mmap_rows = load_recording(self._fname, mmap=True)
+        return self._mmap_rows
+
+    def between(
+        self, start_time: float, end_time: float = np.inf, time_col: int = 0
+    ) -> npt.NDArray[np.float64]:
+        """Zero-copy rows recorded with start_time <= time <= end_time"""
+        rows: npt.NDArray[np.float64] = self.recorded_rows()
+        times: npt.NDArray[np.float64] = rows[:, time_col]
+        return rows[
+            np.searchsorted(times, start_time, side="left") : np.searchsorted(
+                times, end_time, side="right"
+            )
+        ]
+
+    def _run(self) -> None:
+        while not self._stop_event.is_set():
+            self._flush_now.wait(self._flush_interval)
+            self._flush_now.clear()
+            try:
+                self.flush()
+            except OSError as e:
+                self._logger.error(
+                    msg=f"encoder sensor: Position history recording error: {e}"
+                )
+
+    def close(self) -> None:
+        if self._thread is not None:
+            self._stop_event.set()
+            self._flush_now.set()
+            self._thread.join()
+            self._thread = None
+        if self._file is not None:
+            self.flush()
+            self._file.close()
+            self._file = None
+            self._logger.info(
+                msg=f"encoder sensor: Recorded {self.no_rows_written} position history rows to {self._fname}"
+            )
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Convert position history recordings to CSV"
+    )
+    parser.add_argument(
+        "files",
+        nargs="*",
+        default=[os.path.join("logs", "*_position_history.pos")],
+        help="position history recordings or glob patterns",
+    )
+    args = parser.parse_args(argv)
+
+    fnames: list[str] = sorted(
+        {fname for pattern in args.files for fname in glob.glob(pattern)}
+    )
+    if not fnames:
+        print(f"No position history recordings found matching: {args.files}")
+        return
+    for fname in fnames:
+        print(f"{fname} -> {to_csv(fname)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""Minimal-Cost Capture of Raw Encoder Edges for Later, Bulk Processing"""
+
+import threading
+
+import numpy as np
+import numpy.typing as npt
+
+
+class RawEdgeBuffer:
+    """
+    Preallocated store of encoder edges (monotonic time in ns, direction)
+    written from the sensor callback thread and taken in bulk by the reader.
+
+    Two buffers are used in turn: append() writes into the active one,
+    take() swaps it with the spare one and returns the edges it holds, so the
+    callback only ever does two array writes and an increment under a lock.
+    If more edges arrive between two take() calls than the buffer can hold,
+    the buffer is doubled rather than dropping edges (and losing position).
+
+    Methods:
+        append: None: Store an edge
+        extend: None: Store a batch of edges in the same direction
+        take: (np.ndarray, np.ndarray): Times and directions of every edge
+              stored since the last take, oldest first
+    """
+
+    def __init__(self, *, capacity: int = 4096) -> None:
+        self._lock = threading.Lock()
+        self._times_ns: npt.NDArray[np.int64] = np.zeros(capacity, dtype=np.int64)
+        self._directions: npt.NDArray[np.int8] = np.zeros(capacity, dtype=np.int8)
+        self._spare_times_ns: npt.NDArray[np.int64] = np.zeros(capacity, dtype=np.int64)
+        self._spare_directions: npt.NDArray[np.int8] = np.zeros(capacity, dtype=np.int8)
+        self._len: int = 0
+
+    def __len__(self) -> int:
+        return self._len
+
+    def append(self, time_ns: int, direction: int) -> None:
+        """Store an edge. direction: +1 forward, -1 backward"""
+        with self._lock:
+            if self._len == len(self._times_ns):
+                self._times_ns = np.resize(self._times_ns, 2 * self._len)
+                self._directions = np.resize(self._directions, 2 * self._len)
+            self._times_ns[self._len] = time_ns
+            self._directions[self._len] = direction
+            self._len += 1
+
+    def extend(self, times_ns: npt.NDArray[np.int64], direction: int) -> None:
+        """Store a batch of edges, all in the same direction"""
+        no_edges: int = len(times_ns)
+        with self._lock:
+            end: int = self._len + no_edges
+            if end > len(self._times_ns):
+                new_capacity: int = max(end, 2 * len(self._times_ns))
+                self._times_ns = np.resize(self._times_ns, new_capacity)
+                self._directions = np.resize(self._directions, new_capacity)
+            self._times_ns[self._len : end] = times_ns
+            self._directions[self._len : end] = direction
+            self._len = end
+
+    def take(self) -> tuple[npt.NDArray[np.int64], npt.NDArray[np.int8]]:
+        """
+        Times (ns) and directions of the edges stored since the last take.
+        The arrays returned are only valid until the next take.
+        """
+        with self._lock:
+            times_ns, directions, no_edges = (
+                self._times_ns,
+                self._directions,
+                self._len,
+            )
+            if len(self._spare_times_ns) < len(times_ns):
+                self._spare_times_ns = np.zeros(len(times_ns), dtype=np.int64)
+                self._spare_directions = np.zeros(len(times_ns), dtype=np.int8)
+            self._times_ns, self._directions = (
+                self._spare_times_ns,
+                self._spare_directions,
+            )
+            self._len = 0
+        self._spare_times_ns, self._spare_directions = times_ns, directions
+        return times_ns[:no_edges], directions[:no_edges]
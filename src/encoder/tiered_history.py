@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""Downsampled Summaries of Encoder History for Long Term Trends"""
+
+import math
+
+import numpy as np
+import numpy.typing as npt
+
+from src.encoder.history_ring_buffer import HistoryRingBuffer
+
+# Columns of a summary bucket
+START_COL: int = 0  # time the bucket starts, a multiple of its duration
+COUNT_COL: int = 1  # number of position points in the bucket
+SPEED_MIN_COL: int = 2
+SPEED_MAX_COL: int = 3
+SPEED_MEAN_COL: int = 4
+DIST_MIN_COL: int = 5
+DIST_MAX_COL: int = 6
+DIST_LAST_COL: int = 7  # distance at the last point in the bucket
+NUM_COLS: int = 8
+
+
+class SummaryTier:
+    """
+    Summaries of position points in fixed duration, time-aligned buckets.
+
+    Points (add_point) or finer buckets (add_bucket) are folded into the
+    open bucket as they arrive. When one arrives for a later bucket, the
+    open bucket is closed into a HistoryRingBuffer and returned, so it can
+    be folded into the next coarser tier.
+
+    Methods:
+        add_point: np.ndarray | None: Adds a point, returns a closed bucket
+        add_bucket: np.ndarray | None: Adds a finer bucket, returns a closed bucket
+        summaries: np.ndarray: Buckets within a time range, open bucket last
+        clear: None: Forget all buckets
+    """
+
+    def __init__(self, *, bucket_duration: float, capacity: int) -> None:
+        self._bucket_duration: float = bucket_duration
+        self._buckets: HistoryRingBuffer = HistoryRingBuffer(
+            capacity=capacity, num_cols=NUM_COLS, time_col=START_COL
+        )
+        self._open: npt.NDArray[np.float64] = np.zeros(NUM_COLS, dtype=float)
+        self._open_start: float = -math.inf
+        self._count: int = 0
+        self._speed_sum: float = 0
+        self._closed: npt.NDArray[np.float64] = np.zeros(NUM_COLS, dtype=float)
+
+    @property
+    def bucket_duration(self) -> float:
+        return self._bucket_duration
+
+    def clear(self) -> None:
+        self._buckets.clear()
+        self._open_start = -math.inf
+        self._count = 0
+
+    def _close_open_bucket(self) -> npt.NDArray[np.float64] | None:
+        if self._count == 0:
+            return None
+        self._open[COUNT_COL] = self._count
+        self._open[SPEED_MEAN_COL] = self._speed_sum / self._count
+        self._buckets.append(self._open)
+        self._closed[:] = self._open
+        self._count = 0
+        return self._closed
+
+    def add_point(
+        self, a_time: float, speed: float, distance: float
+    ) -> npt.NDArray[np.float64] | None:
+        """Fold a point into its bucket. Returns the bucket closed by it, if any."""
+        closed: npt.NDArray[np.float64] | None = None
+        if a_time >= self._open_start + self._bucket_duration:
+            closed = self._close_open_bucket()
+            self._open_start = (
+                math.floor(a_time / self._bucket_duration) * self._bucket_duration
+            )
+            self._open[START_COL] = self._open_start
+        open_row = self._open
+        if self._count == 0:
+            open_row[SPEED_MIN_COL] = open_row[SPEED_MAX_COL] = speed
+            open_row[DIST_MIN_COL] = open_row[DIST_MAX_COL] = distance
+            self._speed_sum = 0
+        else:
+            if speed < open_row[SPEED_MIN_COL]:
+                open_row[SPEED_MIN_COL] = speed
+            elif speed > open_row[SPEED_MAX_COL]:
+                open_row[SPEED_MAX_COL] = speed
+            if distance < open_row[DIST_MIN_COL]:
+                open_row[DIST_MIN_COL] = distance
+            elif distance > open_row[DIST_MAX_COL]:
+                open_row[DIST_MAX_COL] = distance
+        open_row[DIST_LAST_COL] = distance
+        self._speed_sum += speed
+        self._count += 1
+        return closed
+
+    def add_bucket(
+        self, bucket: npt.NDArray[np.float64]
+    ) -> npt.NDArray[np.float64] | None:
+        """Fold a finer bucket into its bucket. Returns the bucket closed by it, if any."""
+        closed: npt.NDArray[np.float64] | None = None
+        if bucket[START_COL] >= self._open_start + self._bucket_duration:
+            closed = self._close_open_bucket()
+            self._open_start = (
+                math.floor(bucket[START_COL] / self._bucket_duration)
+                * self._bucket_duration
+            )
+            self._open[START_COL] = self._open_start
+        open_row = self._open
+        if self._count == 0:
+            open_row[SPEED_MIN_COL : DIST_LAST_COL + 1] = bucket[
+                SPEED_MIN_COL : DIST_LAST_COL + 1
+            ]
+            self._speed_sum = 0
+        else:
+            open_row[SPEED_MIN_COL] = min(
+                open_row[SPEED_MIN_COL], bucket[SPEED_MIN_COL]
+            )
+            open_row[SPEED_MAX_COL] = max(
+                open_row[SPEED_MAX_COL], bucket[SPEED_MAX_COL]
+            )
+            open_row[DIST_MIN_COL] = min(open_row[DIST_MIN_COL], bucket[DIST_MIN_COL])
+            open_row[DIST_MAX_COL] = max(open_row[DIST_MAX_COL], bucket[DIST_MAX_COL])
+            open_row[DIST_LAST_COL] = bucket[DIST_LAST_COL]
+        self._speed_sum += bucket[SPEED_MEAN_COL] * bucket[COUNT_COL]
+        self._count += int(bucket[COUNT_COL])
+        return closed
+
+    def oldest_start(self) -> float:
+        """Start time of the oldest bucket held, inf if none"""
+        if len(self._buckets):
+            return float(self._buckets.view()[0, START_COL])
+        return self._open_start if self._count else math.inf
+
+    def open_buckets(
+        self, finer_open_buckets: npt.NDArray[np.float64] | None = None
+    ) -> npt.NDArray[np.float64]:
+        """
+        The open bucket, with the open buckets of finer tiers (not yet folded
+        in) folded into a copy of it, or into a new bucket if they start one.
+        """
+        rows: list[npt.NDArray[np.float64]] = []
+        if self._count:
+            open_row = self._open.copy()
+            open_row[COUNT_COL] = self._count
+            open_row[SPEED_MEAN_COL] = self._speed_sum / self._count
+            rows.append(open_row)
+        if finer_open_buckets is not None:
+            for finer_row in finer_open_buckets:
+                bucket_start: float = (
+                    math.floor(finer_row[START_COL] / self._bucket_duration)
+                    * self._bucket_duration
+                )
+                if rows and rows[-1][START_COL] == bucket_start:
+                    rows[-1] = _merged_buckets(rows[-1], finer_row)
+                else:
+                    rows.append(finer_row.copy())
+                    rows[-1][START_COL] = bucket_start
+        return np.array(rows).reshape(-1, NUM_COLS)
+
+    def summaries(
+        self,
+        start_time: float = -math.inf,
+        end_time: float = math.inf,
+        finer_open_buckets: npt.NDArray[np.float64] | None = None,
+    ) -> npt.NDArray[np.float64]:
+        """
+        Buckets overlapping start_time to end_time, oldest first, the open
+        bucket (including finer_open_buckets, see open_buckets) last.
+        """
+        buckets: npt.NDArray[np.float64] = self._buckets.view()
+        first_row: int = int(
+            np.searchsorted(
+                buckets[:, START_COL], start_time - self._bucket_duration, side="right"
+            )
+        )
+        last_row: int = int(
+            np.searchsorted(buckets[:, START_COL], end_time, side="right")
+        )
+        open_rows: npt.NDArray[np.float64] = self.open_buckets(finer_open_buckets)
+        open_rows = open_rows[
+            (open_rows[:, START_COL] > start_time - self._bucket_duration)
+            & (open_rows[:, START_COL] <= end_time)
+        ]
+        if len(open_rows) == 0:
+            return buckets[first_row:last_row]
+        return np.vstack((buckets[first_row:last_row], open_rows))
+
+
+def _merged_buckets(
+    bucket: npt.NDArray[np.float64], later_bucket: npt.NDArray[np.float64]
+) -> npt.NDArray[np.float64]:
+    """One bucket summarising the points of two, later_bucket's points after bucket's"""
+    merged: npt.NDArray[np.float64] = bucket.copy()
+    count: float = bucket[COUNT_COL] + later_bucket[COUNT_COL]
+    merged[COUNT_COL] = count
+    merged[SPEED_MIN_COL] = min(bucket[SPEED_MIN_COL], later_bucket[SPEED_MIN_COL])
+    merged[SPEED_MAX_COL] = max(bucket[SPEED_MAX_COL], later_bucket[SPEED_MAX_COL])
+    merged[SPEED_MEAN_COL] = (
+        bucket[SPEED_MEAN_COL] * bucket[COUNT_COL]
+        + later_bucket[SPEED_MEAN_COL] * later_bucket[COUNT_COL]
+    ) / count
+    merged[DIST_MIN_COL] = min(bucket[DIST_MIN_COL], later_bucket[DIST_MIN_COL])
+    merged[DIST_MAX_COL] = max(bucket[DIST_MAX_COL], later_bucket[DIST_MAX_COL])
+    merged[DIST_LAST_COL] = later_bucket[DIST_LAST_COL]
+    return merged
+
+
+class TieredHistory:
+    """
+    Summary tiers of increasing bucket duration, e.g. 1 s and 1 min. Each
+    point is folded into the finest tier only; a closed bucket is folded into
+    the next tier, so adding a point is O(1) however many tiers there are.
+
+    Methods:
+        add_point: None: Add a position point
+        add_points: None: Add a block of position points
+        summaries: np.ndarray: Buckets of the finest tier covering a time range
+        clear: None: Forget all buckets
+    """
+
+    def __init__(self, *, tiers: tuple[tuple[float, int], ...]) -> None:
+        """tiers: (bucket duration in seconds, number of buckets kept), finest first"""
+        self._tiers: list[SummaryTier] = [
+            SummaryTier(bucket_duration=bucket_duration, capacity=capacity)
+            for bucket_duration, capacity in tiers
+        ]
+
+    @property
+    def tiers(self) -> list[SummaryTier]:
+        return self._tiers
+
+    def clear(self) -> None:
+        for tier in self._tiers:
+            tier.clear()
+
+    def _cascade(self, closed: npt.NDArray[np.float64] | None, tier_no: int) -> None:
+        while closed is not None and tier_no < len(self._tiers):
+            closed = self._tiers[tier_no].add_bucket(closed)
+            tier_no += 1
+
+    def add_point(self, a_time: float, speed: float, distance: float) -> None:
+        self._cascade(self._tiers[0].add_point(a_time, speed, distance), 1)
+
+    def add_points(
+        self,
+        a_times: npt.NDArray[np.float64],
+        speeds: npt.NDArray[np.float64],
+        distances: npt.NDArray[np.float64],
+    ) -> None:
+        """Add time ordered points, reduced per bucket with vectorized passes"""
+        if len(a_times) == 0:
+            return
+        finest: SummaryTier = self._tiers[0]
+        bucket_starts: npt.NDArray[np.float64] = (
+            np.floor(a_times / finest.bucket_duration) * finest.bucket_duration
+        )
+        first_rows: npt.NDArray[np.int64] = np.flatnonzero(
+            np.diff(bucket_starts, prepend=-np.inf)
+        )
+        buckets: npt.NDArray[np.float64] = np.zeros(
+            shape=(len(first_rows), NUM_COLS), dtype=float
+        )
+        buckets[:, START_COL] = bucket_starts[first_rows]
+        buckets[:, COUNT_COL] = np.diff(first_rows, append=len(a_times))
+        buckets[:, SPEED_MIN_COL] = np.minimum.reduceat(speeds, first_rows)
+        buckets[:, SPEED_MAX_COL] = np.maximum.reduceat(speeds, first_rows)
+        buckets[:, SPEED_MEAN_COL] = (
+            np.add.reduceat(speeds, first_rows) / buckets[:, COUNT_COL]
+        )
+        buckets[:, DIST_MIN_COL] = np.minimum.reduceat(distances, first_rows)
+        buckets[:, DIST_MAX_COL] = np.maximum.reduceat(distances, first_rows)
+        buckets[:, DIST_LAST_COL] = distances[
+            np.append(first_rows[1:], len(a_times)) - 1
+        ]
+        for bucket in buckets:
+            self._cascade(finest.add_bucket(bucket), 1)
+
+    def summaries(
+        self, start_time: float = -math.inf, end_time: float = math.inf
+    ) -> npt.NDArray[np.float64]:
+        """
+        Buckets covering start_time to end_time from the finest tier that
+        still holds start_time (the coarsest tier if none does).
+        """
+        finer_open_buckets: npt.NDArray[np.float64] | None = None
+        for tier in self._tiers[:-1]:
+            if tier.oldest_start() <= start_time:
+                return tier.summaries(start_time, end_time, finer_open_buckets)
+            finer_open_buckets = tier.open_buckets(finer_open_buckets)
+        return self._tiers[-1].summaries(start_time, end_time, finer_open_buckets)
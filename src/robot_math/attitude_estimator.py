@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Pitch Estimation from Raw Gyro and Accelerometer Samples
+
+The BNO055 fused Euler angles lag its filter and come at its fusion rate.
+These estimators blend the integrated gyro pitch rate, accurate over short
+times, with the pitch of the gravity vector from the accelerometer, right on
+average but noisy, one sample at a time, for as fast as the raw samples come.
+
+Both are linear with coefficients fixed by the sample rate, worked out once
+on construction: a complementary filter, and a Kalman filter of pitch and
+gyro bias run at its steady state gain. filter() runs either over whole
+arrays of recorded samples, to check against the logged euler_angles:
+
+    estimator = KalmanPitchEstimator(rate_hz=100)
+    pitches, pitch_rates = estimator.filter(gyro_y, accel_pitch(x, y, z))
+"""
+
+import math
+
+import numpy as np
+import numpy.typing as npt
+
+MAX_BLOCK_LEN: int = 1024
+
+
+def accel_pitch(
+    accel_x: npt.ArrayLike, accel_y: npt.ArrayLike, accel_z: npt.ArrayLike
+) -> npt.NDArray[np.float64]:
+    """
+    Pitch (degrees) from acceleration including gravity, in robot axes: the
+    angle of the gravity vector from the y-z plane, positive toward +x.
+    """
+    return np.degrees(np.arctan2(accel_x, np.hypot(accel_y, accel_z)))
+
+
+def first_order_recurrence(
+    a: complex, u: npt.ArrayLike, y_before: complex = 0
+) -> npt.NDArray:
+    """
+    y[k] = a * y[k - 1] + u[k] for all k, with y[-1] = y_before, for |a| <= 1.
+
+    In each block y[k] = a**k * (a * y_before + cumsum(a**-j * u[j])), so the
+    work is vectorized; blocks are kept short enough for a**-j to stay finite.
+    """
+    u = np.asarray(u)
+    y: npt.NDArray = np.empty(len(u), dtype=np.result_type(u, a, y_before))
+    if a == 0:
+        y[:] = u
+        return y
+    block_len: int = MAX_BLOCK_LEN
+    if abs(a) < 1:  # a**-block_len below 1e100
+        block_len = max(1, min(block_len, int(100 * math.log(10) / -math.log(abs(a)))))
+    exponents: npt.NDArray[np.float64] = np.arange(block_len, dtype=float)
+    powers: npt.NDArray = np.power(a, exponents)
+    inverse_powers: npt.NDArray = np.power(a, -exponents)
+    previous: complex = y_before
+    for start in range(0, len(u), block_len):
+        block: npt.NDArray = u[start : start + block_len]
+        n: int = len(block)
+        y[start : start + n] = powers[:n] * (
+            a * previous + np.cumsum(inverse_powers[:n] * block)
+        )
+        previous = y[start + n - 1]
+    return y
+
+
+class ComplementaryPitchEstimator:
+    """
+    Pitch as the integrated gyro rate, pulled toward the accelerometer pitch
+    with time constant time_constant:
+
+        pitch = alpha * (pitch + rate * dt) + (1 - alpha) * accel_pitch
+        alpha = time_constant / (time_constant + dt)
+
+    Attributes:
+        pitch: float: degrees
+        pitch_rate: float: degrees per second, the latest gyro rate
+
+    Methods:
+        update: float: Add one gyro and accel. pitch sample, returning pitch
+        filter: tuple: update() over arrays of samples, vectorized
+        reset: None: Start again from the next accelerometer pitch
+    """
+
+    def __init__(self, *, rate_hz: float, time_constant: float = 0.5) -> None:
+        self._dt: float = 1 / rate_hz
+        self._alpha: float = time_constant / (time_constant + self._dt)
+        self._rate_gain: float = self._alpha * self._dt
+        self.reset()
+
+    def reset(self) -> None:
+        self.pitch: float = math.nan
+        self.pitch_rate: float = 0.0
+        self._initialized: bool = False
+
+    def update(self, gyro_rate: float, pitch_from_accel: float) -> float:
+        """Add a sample: gyro pitch rate (rad/s) and accel. pitch (degrees)"""
+        if not self._initialized:
+            self.pitch = pitch_from_accel
+            self._initialized = True
+        self.pitch_rate = math.degrees(gyro_rate)
+        self.pitch = (
+            self._alpha * self.pitch
+            + self._rate_gain * self.pitch_rate
+            + (1 - self._alpha) * pitch_from_accel
+        )
+        return self.pitch
+
+    def filter(
+        self, gyro_rates: npt.ArrayLike, pitches_from_accel: npt.ArrayLike
+    ) -> tuple[npt.NDArray[np.float64], npt.NDArray[np.float64]]:
+        """Pitches and pitch rates for arrays of samples, as update() on each"""
+        pitch_rates: npt.NDArray[np.float64] = np.degrees(gyro_rates)
+        pitches_from_accel = np.asarray(pitches_from_accel, dtype=float)
+        if len(pitch_rates) == 0:
+            return np.empty(0), np.empty(0)
+        if not self._initialized:
+            self.pitch = float(pitches_from_accel[0])
+            self._initialized = True
+        inputs: npt.NDArray[np.float64] = (
+            self._rate_gain * pitch_rates + (1 - self._alpha) * pitches_from_accel
+        )
+        pitches: npt.NDArray[np.float64] = first_order_recurrence(
+            self._alpha, inputs, self.pitch
+        )
+        self.pitch = float(pitches[-1])
+        self.pitch_rate = float(pitch_rates[-1])
+        return pitches, pitch_rates
+
+
+class KalmanPitchEstimator:
+    """
+    Kalman filter of pitch and gyro bias, with the gyro rate as the control
+    input and the accelerometer pitch as the measurement:
+
+        pitch' = pitch + dt * (rate - bias),  bias' = bias
+
+    With the rate and noises fixed, the gain converges to a constant, which is
+    worked out on construction, so an update is a few multiplications.
+    Noises are variances per second, in degrees (and degrees per second for
+    the bias); the defaults are the usual ones for MEMS gyros.
+
+    Attributes:
+        pitch: float: degrees
+        pitch_rate: float: degrees per second, gyro rate less the bias
+        bias: float: gyro bias, degrees per second
+        gain: tuple[float, float]: steady state Kalman gain, pitch and bias
+
+    Methods:
+        update: float: Add one gyro and accel. pitch sample, returning pitch
+        filter: tuple: update() over arrays of samples, vectorized
+        reset: None: Start again from the next accelerometer pitch
+    """
+
+    def __init__(
+        self,
+        *,
+        rate_hz: float,
+        pitch_noise: float = 0.001,
+        bias_noise: float = 0.003,
+        measurement_noise: float = 0.03,
+    ) -> None:
+        dt: float = 1 / rate_hz
+        self._dt: float = dt
+        transition: npt.NDArray[np.float64] = np.array([[1, -dt], [0, 1]])
+        process_noise: npt.NDArray[np.float64] = np.diag([pitch_noise, bias_noise]) * dt
+        covariance: npt.NDArray[np.float64] = np.diag([measurement_noise, 1.0])
+        gain: npt.NDArray[np.float64] = np.zeros(2)
+        for _ in range(100_000):  # Riccati iteration to the steady state
+            predicted = transition @ covariance @ transition.T + process_noise
+            new_gain = predicted[:, 0] / (predicted[0, 0] + measurement_noise)
+            covariance = predicted - np.outer(new_gain, predicted[0, :])
+            if np.allclose(new_gain, gain, rtol=1e-12, atol=0):
+                break
+            gain = new_gain
+        self.gain: tuple[float, float] = (float(new_gain[0]), float(new_gain[1]))
+        # x_k = A x_(k-1) + rate_input * rate_k + gain * accel_pitch_k
+        correction: npt.NDArray[np.float64] = np.eye(2) - np.outer(new_gain, [1, 0])
+        self._state_transition: npt.NDArray[np.float64] = correction @ transition
+        self._rate_input: npt.NDArray[np.float64] = correction @ np.array([dt, 0.0])
+        self._eigenvalues, self._eigenvectors = np.linalg.eig(self._state_transition)
+        self._inverse_eigenvectors: npt.NDArray = np.linalg.inv(self._eigenvectors)
+        self.reset()
+
+    def reset(self) -> None:
+        self.pitch: float = math.nan
+        self.pitch_rate: float = 0.0
+        self.bias: float = 0.0
+        self._initialized: bool = False
+
+    def update(self, gyro_rate: float, pitch_from_accel: float) -> float:
+        """Add a sample: gyro pitch rate (rad/s) and accel. pitch (degrees)"""
+        if not self._initialized:
+            self.pitch = pitch_from_accel
+            self._initialized = True
+        rate: float = math.degrees(gyro_rate)
+        predicted_pitch: float = self.pitch + self._dt * (rate - self.bias)
+        innovation: float = pitch_from_accel - predicted_pitch
+        self.pitch = predicted_pitch + self.gain[0] * innovation
+        self.bias += self.gain[1] * innovation
+        self.pitch_rate = rate - self.bias
+        return self.pitch
+
+    def filter(
+        self, gyro_rates: npt.ArrayLike, pitches_from_accel: npt.ArrayLike
+    ) -> tuple[npt.NDArray[np.float64], npt.NDArray[np.float64]]:
+        """Pitches and pitch rates for arrays of samples, as update() on each"""
+        rates: npt.NDArray[np.float64] = np.degrees(gyro_rates)
+        pitches_from_accel = np.asarray(pitches_from_accel, dtype=float)
+        if len(rates) == 0:
+            return np.empty(0), np.empty(0)
+        if not self._initialized:
+            self.pitch = float(pitches_from_accel[0])
+            self._initialized = True
+        inputs: npt.NDArray[np.float64] = np.outer(rates, self._rate_input) + np.outer(
+            pitches_from_accel, self.gain
+        )
+        # Decoupled along the eigenvectors of A, each state is first order
+        modal_inputs: npt.NDArray = inputs @ self._inverse_eigenvectors.T
+        modal_before: npt.NDArray = self._inverse_eigenvectors @ [self.pitch, self.bias]
+        modal_states: npt.NDArray = np.column_stack(
+            [
+                first_order_recurrence(eigenvalue, modal_inputs[:, i], modal_before[i])
+                for i, eigenvalue in enumerate(self._eigenvalues)
+            ]
+        )
+        states: npt.NDArray[np.float64] = (modal_states @ self._eigenvectors.T).real
+        pitches: npt.NDArray[np.float64] = states[:, 0]
+        pitch_rates: npt.NDArray[np.float64] = rates - states[:, 1]
+        self.pitch = float(pitches[-1])
+        self.bias = float(states[-1, 1])
+        self.pitch_rate = float(pitch_rates[-1])
+        return pitches, pitch_rates
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Balance State Estimation from the Wheel Encoders and the IMU
+
+A linear Kalman filter of wheel position, wheel velocity, pitch and pitch
+rate, updated once per control tick with the mean wheel distance, the pitch
+and, if there is one, the gyro pitch rate. Every matrix is allocated once and
+updated in place, so a tick is a few 4x4 products.
+"""
+
+import math
+
+import numpy as np
+import numpy.typing as npt
+
+# Elements of BalanceStateEstimator.state
+WHEEL_POSITION: int = 0  # revolutions
+WHEEL_VELOCITY: int = 1  # revolutions per second
+PITCH: int = 2  # degrees
+PITCH_RATE: int = 3  # degrees per second
+NUM_STATES: int = 4
+
+
+class BalanceStateEstimator:
+    """
+    Kalman filter of (wheel position, wheel velocity, pitch, pitch rate).
+
+    Each pair moves at its rate, driven by white noise acceleration of
+    spectral density wheel_accel_noise ((rev/s^2)^2/Hz) or pitch_accel_noise
+    ((deg/s^2)^2/Hz). The ticks need not be evenly spaced. Measurements are
+    each of a single state, so they are applied one at a time as scalar
+    updates, needing no matrix inverse.
+
+    Attributes:
+        state: np.ndarray: read-only (4,) view of the estimate, indexed by
+            WHEEL_POSITION, WHEEL_VELOCITY, PITCH and PITCH_RATE
+        covariance: np.ndarray: read-only (4, 4) view of its covariance
+        time: float: of the latest update
+
+    Methods:
+        update: np.ndarray: Predict to a_time and add the measurements
+        reset: None: Start again from the next measurements
+    """
+
+    def __init__(
+        self,
+        *,
+        wheel_accel_noise: float = 1.0,
+        pitch_accel_noise: float = 1_000.0,
+        position_noise: float = 1 / 40**2 / 12,  # variance, a half slot of 20
+        pitch_noise: float = 0.01,  # variance, degrees^2
+        pitch_rate_noise: float = 0.1,  # variance, (degrees/s)^2
+    ) -> None:
+        self._accel_noises: tuple[tuple[int, float], ...] = (
+            (WHEEL_POSITION, wheel_accel_noise),
+            (PITCH, pitch_accel_noise),
+        )
+        self._position_noise: float = position_noise
+        self._pitch_noise: float = pitch_noise
+        self._pitch_rate_noise: float = pitch_rate_noise
+
+        self._x: npt.NDArray[np.float64] = np.zeros(NUM_STATES)
+        self._P: npt.NDArray[np.float64] = np.zeros((NUM_STATES, NUM_STATES))
+        self._F: npt.NDArray[np.float64] = np.eye(NUM_STATES)
+        self._F_T: npt.NDArray[np.float64] = self._F.T
+        self._Q: npt.NDArray[np.float64] = np.zeros((NUM_STATES, NUM_STATES))
+        self._gain: npt.NDArray[np.float64] = np.zeros(NUM_STATES)
+        self._gain_column: npt.NDArray[np.float64] = self._gain[:, np.newaxis]
+        self._x_work: npt.NDArray[np.float64] = np.zeros(NUM_STATES)
+        self._P_work: npt.NDArray[np.float64] = np.zeros((NUM_STATES, NUM_STATES))
+        # Views of the rows and columns measured, made once
+        self._P_rows: tuple[npt.NDArray[np.float64], ...] = tuple(self._P)
+        self._P_cols: tuple[npt.NDArray[np.float64], ...] = tuple(self._P.T)
+
+        self.state: npt.NDArray[np.float64] = self._x.view()
+        self.state.flags.writeable = False
+        self.covariance: npt.NDArray[np.float64] = self._P.view()
+        self.covariance.flags.writeable = False
+        self.reset()
+
+    def reset(self) -> None:
+        self._x.fill(0)
+        self._P.fill(0)
+        self.time: float = -math.inf
+        self._initialized: bool = False
+
+    def _initialize(
+        self,
+        a_time: float,
+        wheel_position: float,
+        pitch: float,
+        pitch_rate: float | None,
+    ) -> None:
+        self._x[WHEEL_POSITION] = wheel_position
+        self._x[PITCH] = pitch
+        self._P[WHEEL_POSITION, WHEEL_POSITION] = self._position_noise
+        self._P[WHEEL_VELOCITY, WHEEL_VELOCITY] = 1.0  # (rev/s)^2, from rest
+        self._P[PITCH, PITCH] = self._pitch_noise
+        if pitch_rate is None:
+            self._P[PITCH_RATE, PITCH_RATE] = 100.0  # (deg/s)^2
+        else:
+            self._x[PITCH_RATE] = pitch_rate
+            self._P[PITCH_RATE, PITCH_RATE] = self._pitch_rate_noise
+        self.time = a_time
+        self._initialized = True
+
+    def _predict(self, dt: float) -> None:
+        dt2: float = dt * dt / 2
+        dt3: float = dt * dt * dt / 3
+        for position, accel_noise in self._accel_noises:
+            rate: int = position + 1
+            self._F[position, rate] = dt
+            self._Q[position, position] = accel_noise * dt3
+            self._Q[position, rate] = self._Q[rate, position] = accel_noise * dt2
+            self._Q[rate, rate] = accel_noise * dt
+        np.matmul(self._F, self._x, out=self._x_work)
+        np.copyto(self._x, self._x_work)
+        np.matmul(self._F, self._P, out=self._P_work)
+        np.matmul(self._P_work, self._F_T, out=self._P)
+        self._P += self._Q
+
+    def _measure(self, index: int, value: float, noise: float) -> None:
+        """Scalar Kalman update with a measurement of state index"""
+        np.divide(self._P_cols[index], self._P[index, index] + noise, out=self._gain)
+        innovation: float = value - self._x[index]
+        np.multiply(self._gain, innovation, out=self._x_work)
+        self._x += self._x_work
+        np.multiply(self._gain_column, self._P_rows[index], out=self._P_work)
+        self._P -= self._P_work
+
+    def update(
+        self,
+        a_time: float,
+        wheel_position: float,
+        pitch: float,
+        pitch_rate: float | None = None,
+    ) -> npt.NDArray[np.float64]:
+        """
+        Predict to a_time (seconds) and add the measurements: the mean wheel
+        distance (revolutions), the pitch (degrees) and optionally the gyro
+        pitch rate (degrees per second). Returns state, updated in place.
+        """
+        if not self._initialized:
+            self._initialize(a_time, wheel_position, pitch, pitch_rate)
+            return self.state
+        dt: float = a_time - self.time
+        if dt > 0:
+            self._predict(dt)
+            self.time = a_time
+        self._measure(WHEEL_POSITION, wheel_position, self._position_noise)
+        self._measure(PITCH, pitch, self._pitch_noise)
+        if pitch_rate is not None:
+            self._measure(PITCH_RATE, pitch_rate, self._pitch_rate_noise)
+        return self.state
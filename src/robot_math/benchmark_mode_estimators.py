@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Benchmark the registered step duration mode estimators on recorded
+position histories.
+
+Each estimator is run, as the encoder would, on growing prefixes of the
+step durations of every file. Per-call latency percentiles and the error
+against a reference estimator are reported, along with the fastest
+estimator whose error is within tolerance.
+
+Usage:
+    python -m src.robot_math.benchmark_mode_estimators "logs/*_position_history.csv"
+"""
+
+import argparse
+import glob
+import time
+import warnings
+from typing import NamedTuple
+
+import numpy as np
+import numpy.typing as npt
+
+from src.robot_math.mode_estimators import MODE_ESTIMATORS, get_mode_estimator
+from src.robot_math.position_history_csv import load_step_durations
+
+
+class EstimatorBenchmark(NamedTuple):
+    name: str
+    calls: int
+    latency_p50: float  # seconds
+    latency_p90: float
+    latency_p99: float
+    error_mean: float  # seconds, absolute error against reference
+    error_p90: float
+    error_max: float
+
+
+def benchmark_estimators(
+    *,
+    data_sets: list[npt.NDArray[np.float64]],
+    reference: str = "gamma_powell",
+    estimator_names: list[str] | None = None,
+    min_points: int = 5,
+    stride: int = 10,
+) -> list[EstimatorBenchmark]:
+    """Time every estimator on prefixes data[:n] of each data set"""
+    if estimator_names is None:
+        estimator_names = list(MODE_ESTIMATORS)
+    prefixes: list[npt.NDArray[np.float64]] = [
+        data[:no_points]
+        for data in data_sets
+        for no_points in range(min_points, len(data) + 1, stride)
+    ]
+    reference_estimator = get_mode_estimator(reference)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        reference_modes: npt.NDArray[np.float64] = np.array(
+            [reference_estimator(prefix) for prefix in prefixes]
+        )
+
+    results: list[EstimatorBenchmark] = []
+    for name in estimator_names:
+        estimator = get_mode_estimator(name)
+        latencies: npt.NDArray[np.float64] = np.zeros(len(prefixes))
+        modes: npt.NDArray[np.float64] = np.zeros(len(prefixes))
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            for prefix_no, prefix in enumerate(prefixes):
+                start: int = time.perf_counter_ns()
+                modes[prefix_no] = estimator(prefix)
+                latencies[prefix_no] = (time.perf_counter_ns() - start) * 1e-9
+        errors: npt.NDArray[np.float64] = np.abs(modes - reference_modes)
+        errors = errors[np.isfinite(errors)]
+        if len(errors) == 0:
+            errors = np.array([np.inf])
+        results.append(
+            EstimatorBenchmark(
+                name=name,
+                calls=len(prefixes),
+                latency_p50=float(np.percentile(latencies, 50)),
+                latency_p90=float(np.percentile(latencies, 90)),
+                latency_p99=float(np.percentile(latencies, 99)),
+                error_mean=float(np.mean(errors)),
+                error_p90=float(np.percentile(errors, 90)),
+                error_max=float(np.max(errors)),
+            )
+        )
+    return results
+
+
+def fastest_accurate_estimator(
+    results: list[EstimatorBenchmark], tolerance: float
+) -> str | None:
+    """Name of the estimator with lowest median latency whose p90 error <= tolerance"""
+    accurate: list[EstimatorBenchmark] = [
+        result for result in results if result.error_p90 <= tolerance
+    ]
+    if not accurate:
+        return None
+    return min(accurate, key=lambda result: result.latency_p50).name
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "files",
+        nargs="*",
+        default=["logs/*_position_history.csv"],
+        help="position history csv files or glob patterns",
+    )
+    parser.add_argument("--reference", default="gamma_powell")
+    parser.add_argument(
+        "--estimators", nargs="+", default=None, choices=list(MODE_ESTIMATORS)
+    )
+    parser.add_argument("--min-points", type=int, default=5)
+    parser.add_argument("--stride", type=int, default=10)
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.005,
+        help="acceptable p90 absolute error against reference (seconds)",
+    )
+    args = parser.parse_args(argv)
+
+    fnames: list[str] = sorted(
+        {fname for pattern in args.files for fname in glob.glob(pattern)}
+    )
+    if not fnames:
+        print(f"No position history files found matching: {args.files}")
+        return
+    print(f"Benchmarking on {len(fnames)} files against {args.reference}")
+    data_sets = [load_step_durations(fname) for fname in fnames]
+
+    results = benchmark_estimators(
+        data_sets=data_sets,
+        reference=args.reference,
+        estimator_names=args.estimators,
+        min_points=args.min_points,
+        stride=args.stride,
+    )
+
+    print(
+        f"{'estimator':<14}{'calls':>7}"
+        f"{'p50 us':>10}{'p90 us':>10}{'p99 us':>10}"
+        f"{'err mean ms':>13}{'err p90 ms':>12}{'err max ms':>12}"
+    )
+    for result in results:
+        print(
+            f"{result.name:<14}{result.calls:>7}"
+            f"{result.latency_p50 * 1e6:>10.1f}"
+            f"{result.latency_p90 * 1e6:>10.1f}"
+            f"{result.latency_p99 * 1e6:>10.1f}"
+            f"{result.error_mean * 1e3:>13.3f}"
+            f"{result.error_p90 * 1e3:>12.3f}"
+            f"{result.error_max * 1e3:>12.3f}"
+        )
+    print(
+        f"Fastest estimator within {args.tolerance * 1e3:.1f} ms: "
+        f"{fastest_accurate_estimator(results, args.tolerance)}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -5,8 +5,6 @@ import numpy as np
 import numpy.typing as npt
 from scipy import stats
 from scipy.optimize import minimize
-import timeit
-import matplotlib.pyplot as plt
 
 """
 def gamma_mode(data: npt.ArrayLike) -> float:
@@ -17,7 +15,9 @@ def gamma_mode(data: npt.ArrayLike) -> float:
 """
 
 
-def find_gamma_mode(data: npt.ArrayLike, initial_guess: float = 0.05):
+def find_gamma_mode(
+    data: npt.ArrayLike, initial_guess: float = 0.05, method: str = "Powell"
+):
     def gamma_density(data: float, *params: tuple[float, float, float]):
         return -stats.gamma.pdf(data, *params)[0]
 
@@ -30,6 +30,8 @@ def find_gamma_mode(data: npt.ArrayLike, initial_guess: float = 0.05):
         print(f"Fit Error: {e}")
         return 0
     """
+    import matplotlib.pyplot as plt
+
     print(f"data:/n{data}")
     print(f"a: {a} loc: {loc} scale: {scale}")
 
@@ -53,7 +55,7 @@ def find_gamma_mode(data: npt.ArrayLike, initial_guess: float = 0.05):
     plt.show()
     """
     return minimize(
-        fun=gamma_density, x0=initial_guess, args=(a, loc, scale), method="Powell"
+        fun=gamma_density, x0=initial_guess, args=(a, loc, scale), method=method
     ).x[
         0
     ]  # COBYLA - correct result, success=True, time=0.025 s - see initial commit of file for other method results
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Least Squares (Savitzky-Golay Style) Position Derivatives
+
+A polynomial is fitted to the positions over a window and differentiated,
+rather than chaining first differences (each divided by one short step
+duration) and averaging the result. The fit at the end of a window of
+window_points evenly spaced samples is a fixed linear combination of the
+samples, so it is a single matrix product with a coefficient matrix that
+depends only on window_points and degree, computed once and cached.
+
+Encoder position points are spaced by edges rather than in time, so the
+window is first resampled onto evenly spaced times with np.interp.
+"""
+
+import math
+from functools import lru_cache
+from typing import NamedTuple
+
+import numpy as np
+import numpy.typing as npt
+
+COMMON_WINDOW_POINTS: tuple[int, ...] = (9, 17, 33, 65)
+DEFAULT_WINDOW_POINTS: int = 33
+DEFAULT_DEGREE: int = 3  # cubic, for position, speed, accel. and jerk
+
+
+class Kinematics(NamedTuple):
+    distance: float  # fitted position at the end of the window
+    speed: float
+    accel: float
+    jerk: float
+
+
+@lru_cache(maxsize=None)
+def end_point_coefficients(
+    window_points: int, degree: int = DEFAULT_DEGREE
+) -> npt.NDArray[np.float64]:
+    """
+    (degree + 1, window_points) matrix whose row k times window_points evenly
+    spaced samples over a window of unit duration is the k-th derivative, at
+    the last sample, of the least squares polynomial of the given degree.
+    Read-only, shared by all callers.
+    """
+    if window_points <= degree:
+        raise ValueError(
+            f"window_points must be more than degree {degree}, got {window_points}"
+        )
+    # Sample times relative to the end of the window, in window durations
+    times: npt.NDArray[np.float64] = np.linspace(-1, 0, window_points)
+    vandermonde: npt.NDArray[np.float64] = np.vander(
+        times, N=degree + 1, increasing=True
+    )
+    # Polynomial coefficients c = pinv(V) y; the k-th derivative at 0 is k! c_k
+    factorials: npt.NDArray[np.float64] = np.array(
+        [math.factorial(k) for k in range(degree + 1)], dtype=float
+    )
+    coefficients: npt.NDArray[np.float64] = (
+        np.linalg.pinv(vandermonde) * factorials[:, np.newaxis]
+    )
+    coefficients.flags.writeable = False
+    return coefficients
+
+
+for _window_points in COMMON_WINDOW_POINTS:  # precompute the common sizes
+    end_point_coefficients(_window_points)
+
+
+def fitted_derivatives(
+    times: npt.ArrayLike,
+    positions: npt.ArrayLike,
+    *,
+    duration: float,
+    window_points: int = DEFAULT_WINDOW_POINTS,
+    degree: int = DEFAULT_DEGREE,
+) -> npt.NDArray[np.float64]:
+    """
+    Position and its first degree derivatives at the last of time ordered
+    points, fitted over the duration before it. positions may be
+    (points, channels) to fit several series with the same times at once.
+    Returns (degree + 1,) or (degree + 1, channels).
+    """
+    times = np.asarray(times, dtype=float)
+    positions = np.asarray(positions, dtype=float)
+    end_time: float = times[-1]
+    duration = min(duration, end_time - times[0])
+    if duration <= 0:  # a single point, no derivatives
+        derivatives: npt.NDArray[np.float64] = np.zeros(
+            shape=(degree + 1, *positions.shape[1:])
+        )
+        derivatives[0] = positions[-1]
+        return derivatives
+    sample_times: npt.NDArray[np.float64] = np.linspace(
+        end_time - duration, end_time, window_points
+    )
+    if positions.ndim == 1:
+        samples: npt.NDArray[np.float64] = np.interp(sample_times, times, positions)
+    else:
+        samples = np.column_stack(
+            [np.interp(sample_times, times, series) for series in positions.T]
+        )
+    derivatives = end_point_coefficients(window_points, degree) @ samples
+    # Derivatives per window duration to per second
+    scale: npt.NDArray[np.float64] = duration ** -np.arange(degree + 1, dtype=float)
+    return derivatives * (scale if positions.ndim == 1 else scale[:, np.newaxis])
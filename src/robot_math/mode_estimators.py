@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Named registry of step duration mode estimators.
+
+Every estimator takes the step durations seen so far and returns the most
+likely step duration. They are interchangeable so their accuracy and
+latency can be compared on recorded position histories (see
+benchmark_mode_estimators.py).
+"""
+
+from typing import Callable
+
+import numpy as np
+import numpy.typing as npt
+from scipy import stats
+
+from src.robot_math.find_mode import find_gamma_mode
+from src.robot_math.streaming_gamma_mode import gamma_mode_from_moments
+
+ModeEstimator = Callable[[npt.NDArray[np.float64]], float]
+
+MODE_ESTIMATORS: dict[str, ModeEstimator] = {}
+
+HISTOGRAM_BIN_WIDTH: float = 0.0025  # seconds
+KDE_GRID_POINTS: int = 256
+
+
+def register_mode_estimator(name: str) -> Callable[[ModeEstimator], ModeEstimator]:
+    """Decorator adding a mode estimator to MODE_ESTIMATORS under name"""
+
+    def register(estimator: ModeEstimator) -> ModeEstimator:
+        if name in MODE_ESTIMATORS:
+            raise ValueError(f"Mode estimator {name} already registered")
+        MODE_ESTIMATORS[name] = estimator
+        return estimator
+
+    return register
+
+
+def get_mode_estimator(name: str) -> ModeEstimator:
+    try:
+        return MODE_ESTIMATORS[name]
+    except KeyError:
+        raise ValueError(
+            f"Unknown mode estimator {name}, must be one of: {list(MODE_ESTIMATORS)}"
+        )
+
+
+def _register_gamma_fit(name: str, method: str) -> None:
+    def gamma_fit_mode(data: npt.NDArray[np.float64]) -> float:
+        return float(
+            find_gamma_mode(data=data, initial_guess=np.average(data), method=method)
+        )
+
+    register_mode_estimator(name)(gamma_fit_mode)
+
+
+_register_gamma_fit("gamma_powell", "Powell")
+_register_gamma_fit("gamma_cobyla", "COBYLA")
+_register_gamma_fit("gamma_tnc", "TNC")
+
+
+@register_mode_estimator("gamma_moments")
+def gamma_moments_mode(data: npt.NDArray[np.float64]) -> float:
+    """Closed form mode of the method-of-moments gamma fit"""
+    mean: float = float(np.mean(data))
+    deviations: npt.NDArray[np.float64] = data - mean
+    return gamma_mode_from_moments(
+        mean=mean,
+        variance=float(np.mean(deviations**2)),
+        third_central_moment=float(np.mean(deviations**3)),
+    )
+
+
+@register_mode_estimator("histogram")
+def histogram_mode(data: npt.NDArray[np.float64]) -> float:
+    """Centre of the most populated HISTOGRAM_BIN_WIDTH wide bin"""
+    bin_numbers: npt.NDArray[np.int64] = np.floor(data / HISTOGRAM_BIN_WIDTH).astype(
+        np.int64
+    )
+    first_bin: int = int(bin_numbers.min())
+    peak_bin: int = int(np.argmax(np.bincount(bin_numbers - first_bin))) + first_bin
+    return (peak_bin + 0.5) * HISTOGRAM_BIN_WIDTH
+
+
+@register_mode_estimator("kde")
+def kde_mode(data: npt.NDArray[np.float64]) -> float:
+    """Peak of a gaussian kernel density estimate"""
+    if len(data) < 2 or np.ptp(data) == 0:
+        return float(np.mean(data))
+    grid: npt.NDArray[np.float64] = np.linspace(data.min(), data.max(), KDE_GRID_POINTS)
+    return float(grid[np.argmax(stats.gaussian_kde(data)(grid))])
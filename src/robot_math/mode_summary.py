@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Summarise the step duration mode of position history logs.
+
+For every prefix of the step durations in each file, the method-of-moments
+gamma mode is computed incrementally (StreamingGammaMode) in a single pass,
+rather than refitting every prefix. Files are processed in parallel and
+results are cached by file content hash, so rerunning over the same logs
+only reads the cache.
+
+Usage:
+    python -m src.robot_math.mode_summary "logs/*_position_history.csv"
+"""
+
+import argparse
+import glob
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple
+
+import numpy as np
+import numpy.typing as npt
+
+from src.robot_math.position_history_csv import load_step_durations
+from src.robot_math.streaming_gamma_mode import StreamingGammaMode
+
+CACHE_VERSION: int = 1  # increment if the summary calculation changes
+DEFAULT_CACHE_FOLDER: str = os.path.join("logs", ".mode_summary_cache")
+DEFAULT_OUTPUT_POSTFIX: str = "_mode_summary_moments"
+
+
+class SummaryResult(NamedTuple):
+    fname: str
+    fname_results: str
+    no_data_points: int
+    from_cache: bool
+
+
+def prefix_modes(
+    step_durations: npt.NDArray[np.float64], forgetting_factor: float = 1.0
+) -> npt.NDArray[np.float64]:
+    """(number of rows, mode of step_durations[:number of rows + 1]) for every prefix"""
+    estimator = StreamingGammaMode(forgetting_factor=forgetting_factor)
+    result_data: npt.NDArray[np.float64] = np.zeros((len(step_durations), 2))
+    result_data[:, 0] = np.arange(len(step_durations))
+    for no_data, step_duration in enumerate(step_durations.tolist()):
+        result_data[no_data, 1] = estimator.update(step_duration)
+    return result_data
+
+
+def _cache_key(fname: str, forgetting_factor: float) -> str:
+    file_hash = hashlib.sha256()
+    with open(fname, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            file_hash.update(chunk)
+    file_hash.update(f"v{CACHE_VERSION}:ff{forgetting_factor!r}".encode())
+    return file_hash.hexdigest()
+
+
+def summarize_file(
+    fname: str,
+    *,
+    forgetting_factor: float = 1.0,
+    cache_folder: str = DEFAULT_CACHE_FOLDER,
+    output_postfix: str = DEFAULT_OUTPUT_POSTFIX,
+) -> SummaryResult:
+    """Write the prefix mode summary of fname next to it, using the cache if possible"""
+    cache_path: str = os.path.join(
+        cache_folder, _cache_key(fname, forgetting_factor) + ".npy"
+    )
+    from_cache: bool = os.path.exists(cache_path)
+    if from_cache:
+        result_data = np.load(cache_path)
+    else:
+        result_data = prefix_modes(
+            load_step_durations(fname), forgetting_factor=forgetting_factor
+        )
+        os.makedirs(cache_folder, exist_ok=True)
+        # write then rename so a parallel or interrupted run never sees half a file
+        temp_cache_path: str = f"{cache_path}.{os.getpid()}.tmp.npy"
+        np.save(temp_cache_path, result_data)
+        os.replace(temp_cache_path, cache_path)
+
+    fname_results: str = os.path.splitext(fname)[0] + output_postfix + ".csv"
+    np.savetxt(
+        fname=fname_results,
+        X=result_data,
+        delimiter=",",
+        header="Number of Rows, Mode",
+    )
+    return SummaryResult(
+        fname=fname,
+        fname_results=fname_results,
+        no_data_points=len(result_data),
+        from_cache=from_cache,
+    )
+
+
+def summarize_files(
+    fnames: list[str],
+    *,
+    forgetting_factor: float = 1.0,
+    cache_folder: str = DEFAULT_CACHE_FOLDER,
+    output_postfix: str = DEFAULT_OUTPUT_POSTFIX,
+    max_workers: int | None = None,
+) -> list[SummaryResult]:
+    """Summarise every file, spread across a process pool"""
+    if max_workers == 1 or len(fnames) <= 1:
+        return [
+            summarize_file(
+                fname,
+                forgetting_factor=forgetting_factor,
+                cache_folder=cache_folder,
+                output_postfix=output_postfix,
+            )
+            for fname in fnames
+        ]
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            executor.submit(
+                summarize_file,
+                fname,
+                forgetting_factor=forgetting_factor,
+                cache_folder=cache_folder,
+                output_postfix=output_postfix,
+            )
+            for fname in fnames
+        ]
+        return [future.result() for future in futures]
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "files",
+        nargs="*",
+        default=[os.path.join("logs", "*_position_history.csv")],
+        help="position history csv files or glob patterns",
+    )
+    parser.add_argument("--forgetting-factor", type=float, default=1.0)
+    parser.add_argument("--cache-folder", default=DEFAULT_CACHE_FOLDER)
+    parser.add_argument("--output-postfix", default=DEFAULT_OUTPUT_POSTFIX)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    fnames: list[str] = sorted(
+        {fname for pattern in args.files for fname in glob.glob(pattern)}
+    )
+    if not fnames:
+        print(f"No position history files found matching: {args.files}")
+        return
+
+    for result in summarize_files(
+        fnames,
+        forgetting_factor=args.forgetting_factor,
+        cache_folder=args.cache_folder,
+        output_postfix=args.output_postfix,
+        max_workers=args.workers,
+    ):
+        print(
+            f"{result.fname}: {result.no_data_points} points"
+            f"{' (cached)' if result.from_cache else ''} -> {result.fname_results}"
+        )
+
+
+if __name__ == "__main__":
+    main()
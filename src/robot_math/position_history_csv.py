@@ -0,0 +1,26 @@
+#!/usr/bin/env python3
+"""Read Position History csv Files Saved by the Encoders"""
+
+import numpy as np
+import numpy.typing as npt
+
+# Position history csv layouts: current (9 columns) and early 2023 logs (6 or 7)
+_STEP_DURATION_COL_BY_NUM_COLS: dict[int, int] = {9: 2, 7: 1, 6: 1}
+
+
+def load_step_durations(fname: str) -> npt.NDArray[np.float64]:
+    """
+    Read step durations from a position history csv file, either layout.
+    The starting point of the history (no step) and empty values are dropped.
+    """
+    all_data: npt.NDArray[np.float64] = np.genfromtxt(
+        fname=fname, delimiter=",", dtype=float, ndmin=2
+    )
+    try:
+        step_duration_col: int = _STEP_DURATION_COL_BY_NUM_COLS[all_data.shape[1]]
+    except KeyError:
+        raise ValueError(
+            f"{fname} has {all_data.shape[1]} columns, not a position history file"
+        )
+    step_durations: npt.NDArray[np.float64] = all_data[:, step_duration_col]
+    return step_durations[np.isfinite(step_durations) & (step_durations > 0)]
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Streaming (O(1) per sample) estimate of the mode of step durations, based
+on a method-of-moments fit of a three parameter gamma distribution.
+"""
+
+import math
+
+
+def gamma_mode_from_moments(
+    *, mean: float, variance: float, third_central_moment: float
+) -> float:
+    """
+    Mode of the gamma distribution (shape a, location loc, scale theta) with
+    the given first three moments, as fitted by stats.gamma.fit(method="MM").
+
+        skew = 2 / sqrt(a), theta = sd * skew / 2, loc = mean - a * theta
+        mode = loc + (a - 1) * theta = mean - theta   (a >= 1, skew <= 2)
+        mode = loc                                    (a < 1, density peaks at loc)
+
+    A non-positive skew cannot be fitted by a gamma distribution, the mean is
+    returned instead.
+    """
+    if variance <= 0:
+        return mean
+    std_dev: float = math.sqrt(variance)
+    skew: float = third_central_moment / (variance * std_dev)
+    if skew <= 0:
+        return mean
+    if skew > 2:
+        return mean - 2 * std_dev / skew
+    return mean - std_dev * skew / 2
+
+
+class StreamingGammaMode:
+    """
+    Running estimate of the gamma distribution mode of a series of values.
+
+    Keeps a weighted count, mean and second and third central moments that
+    are updated in O(1) for each new value (Welford/Pebay update). With a
+    forgetting factor below 1, older values are exponentially down-weighted
+    so the estimate follows changes in wheel speed.
+
+    Attributes:
+        mode: float: most likely value of the fitted gamma distribution
+        mean: float: weighted mean of the values
+        count: float: weighted number of values (1/(1-forgetting_factor) max.)
+
+    Methods:
+        update: float: Add a value and return the updated mode
+        reset: None: Forget all values
+    """
+
+    def __init__(self, *, forgetting_factor: float = 1.0) -> None:
+        if not 0 < forgetting_factor <= 1:
+            raise ValueError(
+                f"forgetting_factor must be in (0, 1], got {forgetting_factor}"
+            )
+        self._forgetting_factor: float = forgetting_factor
+        self.reset()
+
+    def reset(self) -> None:
+        self._count: float = 0
+        self._mean: float = 0
+        self._m2: float = 0  # sum of weighted squared deviations from mean
+        self._m3: float = 0  # sum of weighted cubed deviations from mean
+        self._mode: float = 0
+
+    @property
+    def count(self) -> float:
+        return self._count
+
+    @property
+    def mean(self) -> float:
+        return self._mean
+
+    @property
+    def mode(self) -> float:
+        return self._mode
+
+    def update(self, value: float) -> float:
+        """Add value to the running moments and return the updated mode"""
+        prev_count: float = self._count * self._forgetting_factor
+        prev_m2: float = self._m2 * self._forgetting_factor
+        count: float = prev_count + 1
+        delta: float = value - self._mean
+        delta_n: float = delta / count
+
+        self._mean += delta_n
+        self._m3 = (
+            self._m3 * self._forgetting_factor
+            + delta * delta_n * delta_n * prev_count * (prev_count - 1)
+            - 3 * delta_n * prev_m2
+        )
+        self._m2 = prev_m2 + delta * delta_n * prev_count
+        self._count = count
+
+        self._mode = gamma_mode_from_moments(
+            mean=self._mean,
+            variance=self._m2 / count,
+            third_central_moment=self._m3 / count,
+        )
+        return self._mode
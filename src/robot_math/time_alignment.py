@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Time Alignment of Encoder and Sensor Histories
+
+Encoder rows are timed by wheel edges and sensor readings by whenever the
+control loop polled the sensor. interpolate_rows linearly interpolates
+history columns at any times; align_histories puts encoder distance and
+speed alongside every sensor reading, in one table.
+
+Usage:
+    python -m src.robot_math.time_alignment logs/sensor_history-2021-02-18_052117.csv \
+        left=logs/2023-01-02_23_45_12_position_history.csv
+"""
+
+import argparse
+import datetime
+import os
+
+import numpy as np
+import numpy.typing as npt
+
+from src.encoder.position_history_recorder import load_recording
+
+# Columns of encoder position history rows (files and in memory)
+T_COL: int = 0
+DIST_COL: int = 5
+SPEED_COL: int = 6
+
+
+def interpolate_rows(
+    rows: npt.NDArray[np.float64],
+    times: npt.ArrayLike,
+    cols: list[int],
+    *,
+    time_col: int = T_COL,
+    outside: float | None = None,
+) -> npt.NDArray[np.float64]:
+    """
+    Columns cols of time ordered rows, linearly interpolated at times, as a
+    (len(times), len(cols)) array. Times outside the rows get the first or
+    last row's values, or outside (e.g. np.nan) if given.
+    """
+    times = np.asarray(times, dtype=float)
+    row_times: npt.NDArray[np.float64] = rows[:, time_col]
+    values: npt.NDArray[np.float64] = np.empty(shape=(len(times), len(cols)))
+    for col_no, col in enumerate(cols):
+        values[:, col_no] = np.interp(
+            times, row_times, rows[:, col], left=outside, right=outside
+        )
+    return values
+
+
+def load_position_history(fname: str) -> npt.NDArray[np.float64]:
+    """Position history rows from a .pos recording or a position history csv"""
+    if os.path.splitext(fname)[1] == ".pos":
+        return load_recording(fname)
+    rows: npt.NDArray[np.float64] = np.genfromtxt(
+        fname=fname, delimiter=",", dtype=float, ndmin=2
+    )
+    if rows.shape[1] < SPEED_COL + 1:
+        raise ValueError(
+            f"{fname} has {rows.shape[1]} columns, not a 9 column position history"
+        )
+    return rows
+
+
+def load_sensor_history(
+    fname: str,
+) -> tuple[npt.NDArray[np.float64], npt.NDArray[np.float64], list[str]]:
+    """
+    Times (epoch seconds), values and column names of a sensor history csv,
+    whose first column is the local date and time of each reading.
+    """
+    with open(fname) as f:
+        names: list[str] = f.readline().rstrip("\n").split(",")[1:]
+    stamps: npt.NDArray[np.str_] = np.loadtxt(
+        fname, delimiter=",", skiprows=1, usecols=0, dtype=str, ndmin=1
+    )
+    times: npt.NDArray[np.float64] = np.array(
+        [datetime.datetime.fromisoformat(stamp).timestamp() for stamp in stamps]
+    )
+    values: npt.NDArray[np.float64] = np.genfromtxt(
+        fname,
+        delimiter=",",
+        skip_header=1,
+        usecols=range(1, len(names) + 1),
+        dtype=float,
+        ndmin=2,
+    )  # missing values are nan
+    return times, values, names
+
+
+def align_histories(
+    *,
+    sensor_times: npt.NDArray[np.float64],
+    sensor_values: npt.NDArray[np.float64],
+    sensor_names: list[str],
+    encoder_histories: dict[str, npt.NDArray[np.float64]],
+) -> tuple[npt.NDArray[np.float64], list[str]]:
+    """
+    One row per sensor reading: its time, the sensor values, then the
+    distance and speed of each encoder interpolated at that time (nan
+    outside the encoder history). Returns the table and its column names.
+    """
+    columns: list[npt.NDArray[np.float64]] = [
+        sensor_times[:, np.newaxis],
+        sensor_values,
+    ]
+    names: list[str] = ["time", *sensor_names]
+    for encoder_name, rows in encoder_histories.items():
+        columns.append(
+            interpolate_rows(rows, sensor_times, [DIST_COL, SPEED_COL], outside=np.nan)
+        )
+        names += [f"{encoder_name}_distance", f"{encoder_name}_speed"]
+    return np.hstack(columns), names
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Align encoder position histories to a sensor history"
+    )
+    parser.add_argument("sensor_history", help="sensor history csv")
+    parser.add_argument(
+        "encoder_histories",
+        nargs="+",
+        help="name=file of each position history (.csv or .pos recording)",
+    )
+    parser.add_argument("-o", "--output", help="aligned csv, default *_aligned.csv")
+    args = parser.parse_args(argv)
+
+    sensor_times, sensor_values, sensor_names = load_sensor_history(args.sensor_history)
+    encoder_histories: dict[str, npt.NDArray[np.float64]] = {}
+    for name_fname in args.encoder_histories:
+        name, _, fname = name_fname.rpartition("=")
+        encoder_histories[name or os.path.basename(fname)] = load_position_history(
+            fname
+        )
+    table, names = align_histories(
+        sensor_times=sensor_times,
+        sensor_values=sensor_values,
+        sensor_names=sensor_names,
+        encoder_histories=encoder_histories,
+    )
+    fname_out: str = (
+        args.output or os.path.splitext(args.sensor_history)[0] + "_aligned.csv"
+    )
+    np.savetxt(
+        fname=fname_out,
+        X=table,
+        fmt="%.7f",
+        delimiter=",",
+        header=",".join(names),
+        comments="",
+    )
+    print(f"{args.sensor_history} -> {fname_out}")
+
+
+if __name__ == "__main__":
+    main()
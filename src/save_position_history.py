@@ -2,20 +2,33 @@
 
 import datetime as dt
 import os
+from logging import Logger
 from typing import Any
 
 import numpy as np
 import numpy.typing as npt
 
 from src.config.config_logging import log_cfg
+from src.encoder.position_history_recorder import PositionHistoryRecorder
 
 
-# Position History Event Handler
-def save_position_history(pos_history: npt.ArrayLike) -> None:
+def _position_history_fname(extension: str | None = None) -> str:
     now = dt.datetime.now()
     log_folder = log_cfg.handler["position_history_file"].folder
     log_filename = (
         f"{now:%Y-%m-%d_%H_%M_%S}_{log_cfg.handler['position_history_file'].filename}"
     )
-    log_filename_path = os.path.join(log_folder, log_filename)
+    if extension is not None:
+        log_filename = os.path.splitext(log_filename)[0] + extension
+    return os.path.join(log_folder, log_filename)
+
+
+# Position History Event Handler
+def save_position_history(pos_history: npt.ArrayLike) -> None:
+    log_filename_path = _position_history_fname()
     np.savetxt(fname=log_filename_path, X=pos_history, fmt="%.7f", delimiter=",")
+
+
+def position_history_recorder(logger: Logger) -> PositionHistoryRecorder:
+    """Recorder streaming position history to a binary file in the logs folder"""
+    return PositionHistoryRecorder(fname=_position_history_fname(".pos"), logger=logger)
@@ -5,18 +5,26 @@ Create representation of Adafruit 9-DOF Abs. Orientation IMU BNO055.
 This is needed to rotate axes on BNO055 Chip to Robot Axes.
 """
 
+import asyncio
+import logging
 import math
 import time
 from abc import abstractmethod
 from logging import Logger
-from typing import Optional, Protocol
+from typing import Callable, Optional, Protocol
 
 import adafruit_bno055 as bno055
 import busio
+import numpy as np
+import numpy.typing as npt
 from box import Box
 from box.exceptions import BoxError
 
 from src.config.config_main import cfg
+from src.sensor import bno055_calibration
+from src.sensor.bno055_calibration import CalibrationEvent
+from src.sensor.bno055_frame import DATA_START_REGISTER, BNO055Frame, Vector3
+from src.sensor.imu_acquisition import IMUAcquisition, NoFrameError
 
 
 class AbsoluteSensor(Protocol):
@@ -107,6 +115,26 @@ class AbsoluteSensor(Protocol):
 class BB_BNO055Sensor_I2C(bno055.BNO055_I2C):
     """
     A class to represent the Adafruit BNO055 Sensor mounted in Balance Bot
+
+    read_frame() reads every output in one I2C burst. The getters (accel,
+    bb_magnetic, bb_gyro, euler_angles, gravity_dir, gravity_mag,
+    bb_quaternion, bb_temperature) are served from the frame taken by
+    refresh(). Call it once per control tick so every reading in the tick
+    comes from the same frame; without it, the getters refresh the frame
+    when it was taken more than max_frame_age ago. The frames are read by a
+    background thread at the fusion rate, so start_acquisition() must be
+    called first: refresh() only takes the latest frame read, it never waits
+    on the bus.
+
+    A failed read never reaches the getters: they serve the last good frame,
+    whose age is frame_age. Until the first good read there is none, and
+    they raise NoFrameError, an OSError. After max_consecutive_errors
+    failures recover() runs in the background. The counters are on
+    acquisition.
+
+    accel_xyz, raw_accel_xyz, magnetic_xyz, gyro_xyz, euler_xyz and
+    gravity_xyz return a Vector3 record per output, reused by every call, for
+    the control loop. The Box getters wrap them for compatibility.
     """
 
     _calibration_items = (
@@ -121,8 +149,34 @@ class BB_BNO055Sensor_I2C(bno055.BNO055_I2C):
         "gyro.offset",
     )
 
-    def __init__(self, *, i2c: busio.I2C, logger: Logger) -> None:
+    def __init__(
+        self,
+        *,
+        i2c: busio.I2C,
+        max_frame_age: float = 0.01,  # seconds, the 100 Hz fusion period
+        read_deadline: float = 0.005,  # seconds
+        max_consecutive_errors: int = 3,
+        logger: Logger,
+    ) -> None:
         super().__init__(i2c=i2c)
+        self._max_frame_age: float = max_frame_age
+        self._operation_mode: int = self.mode
+        self._frame: BNO055Frame = BNO055Frame()
+        self._refresh_time: float = -math.inf  # monotonic seconds
+        self._frame_register: bytes = bytes([DATA_START_REGISTER])
+        self._acquisition: IMUAcquisition = IMUAcquisition(
+            source=self,
+            read_deadline=read_deadline,
+            max_consecutive_errors=max_consecutive_errors,
+            recover=self.recover,
+            logger=logger,
+        )
+        self._accel_xyz: Vector3 = Vector3()
+        self._raw_accel_xyz: Vector3 = Vector3()
+        self._magnetic_xyz: Vector3 = Vector3()
+        self._gyro_xyz: Vector3 = Vector3()
+        self._euler_xyz: Vector3 = Vector3()
+        self._gravity_xyz: Vector3 = Vector3()
         self._sensor_calibration_data: Box = Box(
             {
                 "accel": {
@@ -136,39 +190,66 @@ class BB_BNO055Sensor_I2C(bno055.BNO055_I2C):
                 "gyro": {"offset": {"x": 0, "y": 0, "z": 0}},
             }
         )
+        # True once _sensor_calibration_data holds real offsets, read from the
+        # sensor or the file or written to the sensor, not the zeros above
+        self._calibration_loaded: bool = False
         self._logger = logger
 
+    def _log_calibration_event(self, event: CalibrationEvent) -> None:
+        self._logger.info(msg=f"9DOF sensor: {event.message}, status: {event.status}")
+
     def calibrate_sensor(self) -> None:
         """
         Wait for sensor calibrations and notify of status regularly.
         """
-
-        # Wait for and read calibration information
-        while self.calibration_status[2] != 0x03:  # Accel
-            self._logger.info(
-                msg="9DOF sensor: Waiting for accel calibration. Rotate robot slowly to 6 stable positions for a few seconds.",
+        asyncio.run(
+            bno055_calibration.interactive_calibration(
+                self, on_event=self._log_calibration_event
             )
-            time.sleep(1)
-        self._logger.info(msg="9DOF sensor: Accelerometer calibrated")
+        )
 
-        while self.calibration_status[1] != 0x03:  # Gyro
-            self._logger.info(
-                msg="9DOF sensor: Waiting for gyro calibration. Place robot in a stable position.",
-            )
-            time.sleep(1)
-        self._logger.info(msg="9DOF sensor: Gyro calibrated")
+    async def calibrate_at_startup(
+        self, *, on_event: Optional[Callable[[CalibrationEvent], None]] = None
+    ) -> bool:
+        """
+        Restore the calibration saved in the configuration file, if
+        bno055_sensor.restore_calibration_available, falling back to
+        interactive calibration, reporting progress to on_event (by default
+        the log). Returns True when calibrated.
+        """
+        return await bno055_calibration.calibrate_at_startup(
+            self,
+            restore=bool(cfg.bno055_sensor.restore_calibration_available),
+            on_event=on_event or self._log_calibration_event,
+        )
 
-        while self.calibration_status[3] != 0x03:  # Mag
-            self._logger.info(
-                msg="9DOF sensor: Waiting for magnetrometer calibration. Rotate robot in random directions.",
+    def restore_calibration(self) -> None:
+        """Write the calibration saved in the configuration file to the sensor"""
+        self.write_calibration_data_to_sensor(self.read_calibration_data_from_file())
+
+    def calibration_restored(self) -> bool:
+        """
+        True if the offsets and radii read back from the sensor equal those
+        last restored or written to it
+        """
+        if not self._calibration_loaded:
+            return False
+        written: tuple[float, ...] = self._calibration_values(
+            self._sensor_calibration_data
+        )
+        read: tuple[float, ...] = self._calibration_values(
+            self.read_calibration_data_from_sensor()
+        )
+        if read != written:
+            self._logger.warning(
+                msg=f"9DOF sensor: Calibration read back {read}, written {written}"
             )
-            time.sleep(2)
-        self._logger.info(msg="9DOF sensor: Magnetrometer calibrated")
+            return False
+        return True
 
-        while self.calibration_status[0] != 0x03:  # System
-            self._logger.info(msg="9DOF sensor: Waiting for system calibration")
-            time.sleep(2)
-        self._logger.info(msg="9DOF sensor: System calibrated")
+    def save_calibration(self) -> None:
+        """Save the sensor's calibration to the configuration file"""
+        self.write_calibration_data_to_file(self.read_calibration_data_from_sensor())
 
     def read_calibration_data_from_sensor(self) -> Box:
         # if self.calibration_status[0] != 0x03:
@@ -204,6 +285,7 @@ class BB_BNO055Sensor_I2C(bno055.BNO055_I2C):
                 },
             }
         )
+        self._calibration_loaded = True
         self._logger.info(
             msg=f"9DOF sensor: Calibration Values:\n{self._sensor_calibration_data}",
         )
@@ -212,13 +294,21 @@ class BB_BNO055Sensor_I2C(bno055.BNO055_I2C):
     def write_calibration_data_to_sensor(
         self, sensor_calibration_data: Optional[Box]
     ) -> None:
+        """
+        Write calibration data to the sensor, keeping it to restore after a
+        reset. None writes the data last read or written, ValueError if none.
+        """
         if sensor_calibration_data is None:
+            if not self._calibration_loaded:
+                raise ValueError("9DOF sensor: No calibration data loaded")
             sensor_calibration_data = self._sensor_calibration_data
         if not self._validate_calibration_data(sensor_calibration_data):
             self._logger.error(
                 msg="9DOF sensor: Could not save calibration data. Data invalid"
             )
             raise ValueError("9DOF sensor: Could not save calibration data")
+        self._sensor_calibration_data = sensor_calibration_data
+        self._calibration_loaded = True
         self.offsets_accelerometer = (
             sensor_calibration_data.accel.offset.x,
             sensor_calibration_data.accel.offset.y,
@@ -240,18 +330,20 @@ class BB_BNO055Sensor_I2C(bno055.BNO055_I2C):
     def read_calibration_data_from_file(self) -> Box:
         """Loads calibration data from configuration file, saves it in object and returns it"""
         try:
-            self._sensor_calibration_data = Box.from_yaml(
+            sensor_calibration_data: Box = Box.from_yaml(
                 filename=cfg.path.ninedof_sensor_calibration
             )
-            if not self._validate_calibration_data(self._sensor_calibration_data):
+            if not self._validate_calibration_data(sensor_calibration_data):
                 self._logger.error(
-                    msg=f"9DOF sensor: Cal. Data:{self._sensor_calibration_data}"
+                    msg=f"9DOF sensor: Cal. Data:{sensor_calibration_data}"
                 )
                 raise ValueError("9DOF sensor: Calibration data from file is invalid")
         except BoxError as e:
             raise ValueError(e)
         except ValueError as e:
             raise ValueError(e)
+        self._sensor_calibration_data = sensor_calibration_data
+        self._calibration_loaded = True
         self._logger.info(
             msg=f"9DOF sensor: Calibration values read from {cfg.path.calibration}: {self._sensor_calibration_data}"
         )
@@ -262,6 +354,8 @@ class BB_BNO055Sensor_I2C(bno055.BNO055_I2C):
     ) -> None:
         """Saves calibration data from Box to yaml file in configs folder"""
         if sensor_calibration_data is None:
+            if not self._calibration_loaded:
+                raise ValueError("9DOF sensor: No calibration data loaded")
             sensor_calibration_data = self._sensor_calibration_data
         if not self._validate_calibration_data(sensor_calibration_data):
             self._logger.error(msg="9DOF sensor: Could not save calibration data")
@@ -271,96 +365,210 @@ class BB_BNO055Sensor_I2C(bno055.BNO055_I2C):
             msg=f"9DOF sensor: Calibration data saved to {cfg.path.ninedof_sensor_calibration}: {sensor_calibration_data}"
         )
 
+    @classmethod
+    def _calibration_values(cls, sensor_calibration_data: Box) -> tuple[float, ...]:
+        """The offsets and radii of calibration data, in a fixed order"""
+        return (
+            float(sensor_calibration_data.accel.offset.x),
+            float(sensor_calibration_data.accel.offset.y),
+            float(sensor_calibration_data.accel.offset.z),
+            float(sensor_calibration_data.magnet.offset.x),
+            float(sensor_calibration_data.magnet.offset.y),
+            float(sensor_calibration_data.magnet.offset.z),
+            float(sensor_calibration_data.gyro.offset.x),
+            float(sensor_calibration_data.gyro.offset.y),
+            float(sensor_calibration_data.gyro.offset.z),
+            float(sensor_calibration_data.accel.radius),
+            float(sensor_calibration_data.magnet.radius),
+        )
+
     @classmethod
     def _validate_calibration_data(cls, sensor_calibration_data: Box) -> bool:
         """Validate passed calibration data"""
         try:
-            float(sensor_calibration_data.accel.offset.x)
-            float(sensor_calibration_data.accel.offset.y)
-            float(sensor_calibration_data.accel.offset.z)
-            float(sensor_calibration_data.magnet.offset.x)
-            float(sensor_calibration_data.magnet.offset.y)
-            float(sensor_calibration_data.magnet.offset.z)
-            float(sensor_calibration_data.gyro.offset.x)
-            float(sensor_calibration_data.gyro.offset.y)
-            float(sensor_calibration_data.gyro.offset.z)
-            float(sensor_calibration_data.accel.radius)
-            float(sensor_calibration_data.magnet.radius)
+            cls._calibration_values(sensor_calibration_data)
             return True
-        except (ValueError, AttributeError, BoxError):
+        except (ValueError, AttributeError, BoxError, TypeError):
             return False
 
+    def read_frame(self, frame: Optional[BNO055Frame] = None) -> BNO055Frame:
+        """
+        Read all outputs, registers 0x08 to 0x35, in one I2C transaction into
+        frame, by default the sensor's own frame, and return it. The frame is
+        reused by every read.
+        """
+        if frame is None:
+            frame = self._frame
+        with self.i2c_device as i2c:
+            i2c.write_then_readinto(self._frame_register, frame.raw)
+        frame.decode(time.monotonic())
+        return frame
+
+    def recover(self) -> None:
+        """
+        Bring the sensor back after repeated read errors: set its operation
+        mode again, or if it does not answer, reset it (0.7 s) and restore
+        the mode and the calibration offsets, if any were loaded. Otherwise
+        the sensor calibrates itself again from its reset defaults.
+        """
+        try:
+            self.mode = self._operation_mode
+            return
+        except OSError as e:
+            self._logger.warning(msg=f"9DOF sensor: Resetting, no answer: {e}")
+        self._reset()
+        self.mode = self._operation_mode
+        if self._calibration_loaded:
+            self.write_calibration_data_to_sensor(None)
+        else:
+            self._logger.warning(msg="9DOF sensor: Reset, no calibration to restore")
+
+    @property
+    def acquisition(self) -> IMUAcquisition:
+        """Frame reading, with its error, recovery and stale frame counters"""
+        return self._acquisition
+
+    @property
+    def frame_age(self) -> float:
+        """Seconds since the frame the getters last served was read"""
+        return time.monotonic() - self._frame.time
+
+    def start_acquisition(
+        self, rate_hz: float = 100, first_frame_timeout: float = 0.1
+    ) -> bool:
+        """
+        Read frames in a background thread, for the getters to use. Returns
+        True once the first good frame is read, False if none is within
+        first_frame_timeout seconds; the getters raise NoFrameError until then.
+        """
+        self._acquisition.start(rate_hz)
+        if self._acquisition.wait_for_frame(first_frame_timeout):
+            return True
+        self._logger.error(
+            msg=f"9DOF sensor: No frame read within {first_frame_timeout} s of starting"
+        )
+        return False
+
+    def stop_acquisition(self) -> None:
+        self._acquisition.stop()
+
+    def refresh(self) -> BNO055Frame:
+        """
+        Take the latest good frame read by the acquisition thread for the
+        getters to serve. Returns the frame, reused by every call.
+        NoFrameError if start_acquisition() has not been called, or no good
+        frame has been read yet.
+        """
+        if not self._acquisition.running:
+            raise NoFrameError("9DOF sensor: Frame acquisition not started")
+        self._acquisition.latest(self._frame)
+        self._refresh_time = time.monotonic()
+        return self._frame
+
+    def _recent_frame(self) -> BNO055Frame:
+        """The frame of the last refresh(), refreshed if max_frame_age ago"""
+        if time.monotonic() - self._refresh_time > self._max_frame_age:
+            self.refresh()
+        return self._frame
+
+    def _log_xyz(self, name: str, vector: Vector3) -> Vector3:
+        if self._logger.isEnabledFor(logging.INFO):  # skip formatting if not
+            self._logger.info(
+                msg=f"9DOF sensor: {name}: x: {vector.x:.2f}, y: {vector.y:.2f}, z: {vector.z:.2f}"
+            )
+        return vector
+
     def bb_temperature(self, units: str = "degrees celsius") -> int:
         """Getter for temperature readings"""
         temperature: int
         if units in ("degrees Fahrenheit", "degrees F", "deg F", "deg. F", "°F"):
-            temperature = int(self.temperature * 9 / 5 + 32)
+            temperature = int(self._recent_frame().temperature * 9 / 5 + 32)
         else:
-            temperature = self.temperature
-        self._logger.info(msg=f"9DOF sensor: Temperature: {temperature} {units}")
+            temperature = self._recent_frame().temperature
+        if self._logger.isEnabledFor(logging.INFO):
+            self._logger.info(msg=f"9DOF sensor: Temperature: {temperature} {units}")
         return temperature
 
+    def accel_xyz(self) -> Vector3:
+        """Linear acceleration (m/s^2) in robot axes. Reused record."""
+        linear_accel: npt.NDArray[np.float64] = self._recent_frame().linear_accel
+        accel: Vector3 = self._accel_xyz
+        accel.x = linear_accel.item(1)
+        accel.y = linear_accel.item(0)
+        accel.z = linear_accel.item(2)
+        return self._log_xyz("Accel", accel)
+
+    def raw_accel_xyz(self) -> Vector3:
+        """
+        Acceleration including gravity (m/s^2) in robot axes, as
+        attitude_estimator.accel_pitch takes. Reused record.
+        """
+        frame_accel: npt.NDArray[np.float64] = self._recent_frame().accel
+        raw_accel: Vector3 = self._raw_accel_xyz
+        raw_accel.x = frame_accel.item(1)
+        raw_accel.y = frame_accel.item(0)
+        raw_accel.z = frame_accel.item(2)
+        return self._log_xyz("Raw accel", raw_accel)
+
+    def magnetic_xyz(self) -> Vector3:
+        """Magnetic field (micro Tesla). Reused record."""
+        magnetic: npt.NDArray[np.float64] = self._recent_frame().magnetic
+        mag: Vector3 = self._magnetic_xyz
+        # ORDER NOT VERIFIED
+        mag.x = magnetic.item(0)
+        mag.y = magnetic.item(1)
+        mag.z = magnetic.item(2)
+        return self._log_xyz("Magnetic Field", mag)
+
+    def gyro_xyz(self) -> Vector3:
+        """Angular velocity (rad/s) in robot axes. Reused record."""
+        frame_gyro: npt.NDArray[np.float64] = self._recent_frame().gyro
+        gyro: Vector3 = self._gyro_xyz
+        # Ordered for BB Axes ?
+        gyro.x = frame_gyro.item(1)
+        gyro.y = frame_gyro.item(0)
+        gyro.z = frame_gyro.item(2)
+        return self._log_xyz("Gyro", gyro)
+
+    def euler_xyz(self) -> Vector3:
+        """Roll (x), pitch (y) and yaw (z), degrees. Reused record."""
+        frame_euler: npt.NDArray[np.float64] = self._recent_frame().euler
+        euler: Vector3 = self._euler_xyz
+        euler.x = frame_euler.item(1)
+        euler.y = frame_euler.item(2)
+        euler.z = frame_euler.item(0)
+        return self._log_xyz("Euler angles", euler)
+
+    def gravity_xyz(self) -> Vector3:
+        """Gravity vector (m/s^2). Reused record."""
+        frame_gravity: npt.NDArray[np.float64] = self._recent_frame().gravity
+        gravity: Vector3 = self._gravity_xyz
+        # ORDER NOT VERIFIED
+        gravity.x = frame_gravity.item(0)
+        gravity.y = frame_gravity.item(1)
+        gravity.z = frame_gravity.item(2)
+        return self._log_xyz("Gravity", gravity)
+
     @property
     def accel(self) -> Box:
-        accel_x: Optional[float]
-        accel_y: Optional[float]
-        accel_z: Optional[float]
-        accel_y, accel_x, accel_z = self.linear_acceleration
-        if accel_x is None or accel_y is None or accel_z is None:
-            self._logger.error(msg="9DOF sensor: Accel not available, check mode")
-            raise ValueError("9DOF sensor: Accel not available, check mode")
-        self._logger.info(
-            msg=f"9DOF sensor: Accel: x: {accel_x}, y: {accel_y}, z: {accel_z}"
-        )
-        return Box({"x": accel_x, "y": accel_y, "z": accel_z})
+        accel: Vector3 = self.accel_xyz()
+        return Box({"x": accel.x, "y": accel.y, "z": accel.z})
 
     @property
     def bb_magnetic(self) -> Box:
-        mag_x: Optional[float]
-        mag_y: Optional[float]
-        mag_z: Optional[float]
-        mag_x, mag_y, mag_z = self.magnetic  # ORDER NOT VERIFIED
-        if mag_x is None or mag_y is None or mag_z is None:
-            self._logger.error(
-                msg="9DOF sensor: Magnetic reading not available, check moe"
-            )
-            raise ValueError("9DOF sensor: Magnetic reading not available, check mode")
-        self._logger.info(
-            msg=f"9DOF sensor: Magnetic Field: x: {mag_x}, y: {mag_y}, z: {mag_z}"
-        )
-        return Box({"x": mag_x, "y": mag_y, "z": mag_z})
+        mag: Vector3 = self.magnetic_xyz()
+        return Box({"x": mag.x, "y": mag.y, "z": mag.z})
 
     @property
     def bb_gyro(self) -> Box:
-        gyro_x: Optional[float]
-        gyro_y: Optional[float]
-        gyro_z: Optional[float]
-        gyro_y, gyro_x, gyro_z = self.gyro  # Ordered for BB Axes ?
-        if gyro_x is None or gyro_y is None or gyro_z is None:
-            self._logger.error(msg="9DOF sensor: Gyro not available, check mode")
-            raise ValueError("Gyro not available, check mode")
-        self._logger.info(
-            msg=f"9DOF sensor: Gyro: x: {gyro_x:.2f}, y: {gyro_y:.2f}, z: {gyro_z:.2f}"
-        )
-        return Box({"x": gyro_x, "y": gyro_y, "z": gyro_z})
+        gyro: Vector3 = self.gyro_xyz()
+        return Box({"x": gyro.x, "y": gyro.y, "z": gyro.z})
 
     @property
     def euler_angles(self) -> Box:
         """Getter for Euler angle orientation of sensor"""
-        yaw_z: Optional[float]
-        roll_x: Optional[float]
-        pitch_y: Optional[float]
-        yaw_z, roll_x, pitch_y = self.euler
-        if yaw_z is None or roll_x is None or pitch_y is None:
-            self._logger.error(
-                msg="9DOF sensor: Euler angles not available, please try again"
-            )
-            raise ValueError("9DOF sensor: Euler angles not available, check mode")
-            # return Box({"x": 0, "y": 0, "z": 0})
-        self._logger.info(
-            msg=f"9DOF sensor: roll: x: {roll_x:.2f}, pitch y: {pitch_y:.2f}, yaw z: {yaw_z:.2f}"
-        )
-        return Box({"x": roll_x, "y": pitch_y, "z": yaw_z})
+        euler: Vector3 = self.euler_xyz()
+        return Box({"x": euler.x, "y": euler.y, "z": euler.z})
 
     @property
     def gravity_dir(self) -> Box:
@@ -370,42 +578,27 @@ class BB_BNO055Sensor_I2C(bno055.BNO055_I2C):
         Returns:
             2-tuple of XY and XZ angle orientations of gravity vector
         """
-        x_grav: Optional[float]
-        y_grav: Optional[float]
-        z_grav: Optional[float]
-        x_grav, y_grav, z_grav = self.gravity
-        if x_grav is None or y_grav is None or z_grav is None:
-            self._logger.error(msg="9DOF sensor: Gravity not available, check mode")
-            raise ValueError("9DOF sensor: Gravity not available, check mode")
-        xy_grav_angle: float = math.atan2(y_grav, x_grav)
-        xz_grav_angle: float = math.atan2(z_grav, x_grav)
-        self._logger.info(
-            msg=f"9DOF sensor: Gravity Dir: xy_angle: {xy_grav_angle}, xz_angle: {xz_grav_angle}"
-        )
+        gravity: Vector3 = self.gravity_xyz()
+        xy_grav_angle: float = math.atan2(gravity.y, gravity.x)
+        xz_grav_angle: float = math.atan2(gravity.z, gravity.x)
         return Box({"xy": xy_grav_angle, "xz": xz_grav_angle})  # ORDER NOT VERIVIED
 
     @property
     def gravity_mag(self) -> float:
         """Getter for gravity magnitude readings"""
-        x_grav: Optional[float]
-        y_grav: Optional[float]
-        z_grav: Optional[float]
-        x_grav, y_grav, z_grav = self.gravity  # ORDER NOT VERIFIED
-        x_grav = x_grav if x_grav is not None else 0
-        y_grav = y_grav if y_grav is not None else 0
-        z_grav = z_grav if z_grav is not None else 0
-        grav_mag: float = math.sqrt(sum([x_grav**2, y_grav**2, z_grav**2]))
-        self._logger.info(msg=f"9DOF sensor: Gravity Magnitude: {grav_mag}")
-        return grav_mag
+        gravity: Vector3 = self.gravity_xyz()
+        return math.sqrt(gravity.x**2 + gravity.y**2 + gravity.z**2)
 
     @property
     def bb_quaternion(self) -> tuple[float, float, float, float]:
         """Getter for quaternion giving orientation"""
-        quaternion: tuple[
-            Optional[float], Optional[float], Optional[float], Optional[float]
-        ] = self.quaternion
-        if None in quaternion:
-            self._logger.error(msg="9DOF sensor: Quaternion is not available")
-            raise ValueError("9DOF sensor: Quaternion is not available")
-        self._logger.info(msg=f"9DOF sensor: Quaternion: {quaternion}")
+        frame_quaternion: npt.NDArray[np.float64] = self._recent_frame().quaternion
+        quaternion: tuple[float, float, float, float] = (
+            frame_quaternion.item(0),
+            frame_quaternion.item(1),
+            frame_quaternion.item(2),
+            frame_quaternion.item(3),
+        )
+        if self._logger.isEnabledFor(logging.INFO):
+            self._logger.info(msg=f"9DOF sensor: Quaternion: {quaternion}")
         return quaternion
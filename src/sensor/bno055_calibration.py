@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Start-up Calibration of the BNO055
+
+Restores the saved calibration offsets and checks, reading them back, that
+the sensor took them, falling back to calibrating interactively, moving the
+robot as asked, only if that fails. The calibration status is polled in a
+coroutine and progress reported as events, so other start-up tasks run
+meanwhile.
+"""
+
+import asyncio
+import math
+import time
+from typing import Awaitable, Callable, NamedTuple, Protocol
+
+# Elements of calibration_status, each 0 (uncalibrated) to 3 (calibrated)
+SYSTEM: int = 0
+GYRO: int = 1
+ACCEL: int = 2
+MAG: int = 3
+CALIBRATED: int = 3
+
+# Interactive calibration steps, in order: status element, name, instruction
+_STEPS: tuple[tuple[int, str, str], ...] = (
+    (ACCEL, "accel", "Rotate robot slowly to 6 stable positions for a few seconds."),
+    (GYRO, "gyro", "Place robot in a stable position."),
+    (MAG, "magnetometer", "Rotate robot in random directions."),
+    (SYSTEM, "system", "Keep moving the robot."),
+)
+
+
+class CalibrationEvent(NamedTuple):
+    stage: str  # restore_failed, restored, waiting, calibrated, saved, timed_out
+    status: tuple[int, int, int, int]  # system, gyro, accel., mag.
+    message: str
+
+
+class CalibratableSensor(Protocol):
+    @property
+    def calibration_status(self) -> tuple[int, int, int, int]:
+        raise NotImplementedError
+
+    def restore_calibration(self) -> None:
+        """Write the saved offsets to the sensor. ValueError if there are none."""
+        raise NotImplementedError
+
+    def calibration_restored(self) -> bool:
+        """True if the offsets read back from the sensor are those restored"""
+        raise NotImplementedError
+
+    def save_calibration(self) -> None:
+        raise NotImplementedError
+
+
+def _read_status(sensor: CalibratableSensor) -> tuple[int, int, int, int]:
+    try:
+        return sensor.calibration_status
+    except OSError:  # a failed read shows no progress
+        return (0, 0, 0, 0)
+
+
+async def interactive_calibration(
+    sensor: CalibratableSensor,
+    *,
+    on_event: Callable[[CalibrationEvent], None],
+    poll_interval: float = 0.1,  # seconds
+    reminder_interval: float = 2.0,  # seconds
+    timeout: float | None = None,  # seconds, None to wait as long as it takes
+    sleep: Callable[[float], Awaitable[None]] = asyncio.sleep,
+    clock: Callable[[], float] = time.monotonic,
+) -> bool:
+    """
+    Wait for the accelerometer, gyro, magnetometer and then the system to
+    calibrate, reporting each instruction, repeated every reminder_interval,
+    and each completion. False if timeout passed first.
+    """
+    start_time: float = clock()
+    for element, name, instruction in _STEPS:
+        reminder_time: float = -math.inf
+        while (status := _read_status(sensor))[element] != CALIBRATED:
+            now: float = clock()
+            if timeout is not None and now - start_time > timeout:
+                on_event(
+                    CalibrationEvent(
+                        "timed_out", status, f"Timed out waiting for {name} calibration"
+                    )
+                )
+                return False
+            if now - reminder_time >= reminder_interval:
+                reminder_time = now
+                on_event(
+                    CalibrationEvent(
+                        "waiting",
+                        status,
+                        f"Waiting for {name} calibration. {instruction}",
+                    )
+                )
+            await sleep(poll_interval)
+        on_event(
+            CalibrationEvent("calibrated", status, f"{name.capitalize()} calibrated")
+        )
+    return True
+
+
+async def calibrate_at_startup(
+    sensor: CalibratableSensor,
+    *,
+    restore: bool,
+    on_event: Callable[[CalibrationEvent], None],
+    restore_timeout: float = 1.0,  # seconds
+    restored_status: tuple[int, int, int, int] = (0, CALIBRATED, 0, 0),
+    poll_interval: float = 0.1,  # seconds
+    timeout: float | None = None,  # seconds, of interactive calibration
+    sleep: Callable[[float], Awaitable[None]] = asyncio.sleep,
+    clock: Callable[[], float] = time.monotonic,
+) -> bool:
+    """
+    Restore the saved offsets, if restore, and accept them if they read back
+    from the sensor as saved and every status element then reaches
+    restored_status within restore_timeout. The status is only a secondary
+    check: the gyro settles in well under a second at rest, while the
+    accelerometer and magnetometer statuses only rise with motion, offsets
+    restored or not. Otherwise calibrate interactively and save the new
+    offsets. Returns True when calibrated.
+    """
+    if restore:
+        message: str | None = None
+        try:
+            sensor.restore_calibration()
+            if not sensor.calibration_restored():
+                message = "Offsets read back differ from those restored"
+        except (ValueError, OSError) as e:
+            message = f"Restore failed: {e}"
+        if message is not None:
+            on_event(CalibrationEvent("restore_failed", _read_status(sensor), message))
+        else:
+            start_time: float = clock()
+            while True:
+                status: tuple[int, int, int, int] = _read_status(sensor)
+                if all(s >= r for s, r in zip(status, restored_status)):
+                    on_event(
+                        CalibrationEvent(
+                            "restored",
+                            status,
+                            f"Calibration restored in {clock() - start_time:.2f} s",
+                        )
+                    )
+                    return True
+                if clock() - start_time > restore_timeout:
+                    on_event(
+                        CalibrationEvent(
+                            "restore_failed",
+                            status,
+                            f"Restored calibration not taken after {restore_timeout} s",
+                        )
+                    )
+                    break
+                await sleep(poll_interval)
+    if not await interactive_calibration(
+        sensor,
+        on_event=on_event,
+        poll_interval=poll_interval,
+        timeout=timeout,
+        sleep=sleep,
+        clock=clock,
+    ):
+        return False
+    sensor.save_calibration()
+    on_event(CalibrationEvent("saved", _read_status(sensor), "Calibration saved"))
+    return True
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Decoding of the BNO055 Data Register Block
+
+Every output of the BNO055, from accelerometer (0x08) to calibration status
+(0x35), is one contiguous block of page 0 registers, so all of it can be read
+in a single 46 byte I2C burst and decoded here into a preallocated frame.
+"""
+
+import numpy as np
+import numpy.typing as npt
+
+DATA_START_REGISTER: int = 0x08  # ACC_DATA_X_LSB
+FRAME_LEN: int = 0x35 - DATA_START_REGISTER + 1  # to CALIB_STAT, 46 bytes
+_NUM_VECTOR_VALUES: int = 22  # little-endian int16 values, 0x08 to 0x33
+_TEMP_OFFSET: int = 0x34 - DATA_START_REGISTER
+_CALIB_STAT_OFFSET: int = 0x35 - DATA_START_REGISTER
+
+# Slices of BNO055Frame.values, in register order
+ACCEL: slice = slice(0, 3)  # m/s^2, x, y, z
+MAGNETIC: slice = slice(3, 6)  # micro Tesla
+GYRO: slice = slice(6, 9)  # rad/s
+EULER: slice = slice(9, 12)  # degrees, heading, roll, pitch
+QUATERNION: slice = slice(12, 16)  # w, x, y, z
+LINEAR_ACCEL: slice = slice(16, 19)  # m/s^2
+GRAVITY: slice = slice(19, 22)  # m/s^2
+
+# Scale of each int16 value to the units above, as adafruit_bno055 uses
+_SCALES: npt.NDArray[np.float64] = np.empty(_NUM_VECTOR_VALUES)
+_SCALES[ACCEL] = 1 / 100
+_SCALES[MAGNETIC] = 1 / 16
+_SCALES[GYRO] = 0.001090830782496456  # 1/16 degree per second in rad/s
+_SCALES[EULER] = 1 / 16
+_SCALES[QUATERNION] = 1 / (1 << 14)
+_SCALES[LINEAR_ACCEL] = 1 / 100
+_SCALES[GRAVITY] = 1 / 100
+_SCALES.flags.writeable = False
+
+
+class Vector3:
+    """
+    x, y and z of a reading in robot axes. Getters return the same record
+    each time, updated in place: copy the values to keep them.
+    """
+
+    __slots__ = ("x", "y", "z")
+
+    def __init__(self) -> None:
+        self.x: float = 0.0
+        self.y: float = 0.0
+        self.z: float = 0.0
+
+    def __repr__(self) -> str:
+        return f"Vector3(x={self.x}, y={self.y}, z={self.z})"
+
+
+class BNO055Frame:
+    """
+    One reading of every BNO055 output, decoded from the raw register block.
+
+    raw is the buffer an I2C burst read writes into; decode() converts it in
+    place into values, with views for each output, so reading a frame
+    allocates nothing.
+
+    Attributes:
+        raw: bytearray: the 46 bytes read from registers 0x08 to 0x35
+        values: np.ndarray: the 22 scaled vector values, in register order
+        accel, magnetic, gyro, euler, quaternion, linear_accel,
+            gravity: np.ndarray: views of values
+        temperature: int: degrees Celsius
+        calibration_status: tuple[int, int, int, int]: system, gyro, accel., mag.
+        time: float: when the frame was read, monotonic seconds
+
+    Methods:
+        decode: None: Convert raw into the values
+        copy_from: None: Make this frame a copy of another, in place
+    """
+
+    __slots__ = (
+        "raw",
+        "values",
+        "accel",
+        "magnetic",
+        "gyro",
+        "euler",
+        "quaternion",
+        "linear_accel",
+        "gravity",
+        "temperature",
+        "calibration_status",
+        "time",
+        "_int16_values",
+    )
+
+    def __init__(self) -> None:
+        self.raw: bytearray = bytearray(FRAME_LEN)
+        self._int16_values: npt.NDArray[np.int16] = np.frombuffer(
+            self.raw, dtype="<i2", count=_NUM_VECTOR_VALUES
+        )
+        self.values: npt.NDArray[np.float64] = np.zeros(_NUM_VECTOR_VALUES)
+        self.accel: npt.NDArray[np.float64] = self.values[ACCEL]
+        self.magnetic: npt.NDArray[np.float64] = self.values[MAGNETIC]
+        self.gyro: npt.NDArray[np.float64] = self.values[GYRO]
+        self.euler: npt.NDArray[np.float64] = self.values[EULER]
+        self.quaternion: npt.NDArray[np.float64] = self.values[QUATERNION]
+        self.linear_accel: npt.NDArray[np.float64] = self.values[LINEAR_ACCEL]
+        self.gravity: npt.NDArray[np.float64] = self.values[GRAVITY]
+        self.temperature: int = 0
+        self.calibration_status: tuple[int, int, int, int] = (0, 0, 0, 0)
+        self.time: float = -np.inf  # never read
+
+    def decode(self, a_time: float) -> None:
+        """Convert the raw register bytes, read at a_time, into the values"""
+        np.multiply(self._int16_values, _SCALES, out=self.values)
+        temperature: int = self.raw[_TEMP_OFFSET]
+        self.temperature = temperature - 256 if temperature > 127 else temperature
+        calib_stat: int = self.raw[_CALIB_STAT_OFFSET]
+        self.calibration_status = (
+            (calib_stat >> 6) & 0x03,  # system
+            (calib_stat >> 4) & 0x03,  # gyro
+            (calib_stat >> 2) & 0x03,  # accel.
+            calib_stat & 0x03,  # mag.
+        )
+        self.time = a_time
+
+    def copy_from(self, other: "BNO055Frame") -> None:
+        """Copy another frame into this one, without allocating"""
+        self.raw[:] = other.raw
+        np.copyto(self.values, other.values)
+        self.temperature = other.temperature
+        self.calibration_status = other.calibration_status
+        self.time = other.time
@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Background Acquisition of BNO055 Frames
+
+A worker thread reads the sensor at its fusion rate and publishes each new
+frame into a double buffer, so the control loop reads the latest frame in
+constant time without waiting on the I2C bus. Read errors and bus recovery
+stay on the acquisition side; the control loop gets the last good frame, or
+NoFrameError until the first one has been read.
+"""
+
+import threading
+import time
+from logging import Logger
+from typing import Callable, Protocol
+
+from src.sensor.bno055_frame import BNO055Frame
+
+
+class NoFrameError(OSError):
+    """No good frame has been read from the sensor yet"""
+
+
+class FrameSource(Protocol):
+    def read_frame(self, frame: BNO055Frame | None = None) -> BNO055Frame:
+        raise NotImplementedError
+
+
+class FrameDoubleBuffer:
+    """
+    The latest of a stream of frames, written by one thread and read by others
+    without locks.
+
+    The writer fills the back frame and publishes it by swapping the front
+    index, a single atomic assignment. Each slot carries the sequence number
+    of the frame in it, set to -1 while the slot is being written, so a
+    reader whose copy overlapped the writer reusing that slot sees the number
+    change and copies again.
+
+    Attributes:
+        sequence: int: number of frames published, 0 before the first
+
+    Methods:
+        begin_write: BNO055Frame: The back frame, to write the next reading into
+        publish: None: Make the back frame the latest
+        latest: int: Copy the latest frame out, returning its sequence number
+    """
+
+    def __init__(self) -> None:
+        self._frames: tuple[BNO055Frame, BNO055Frame] = (BNO055Frame(), BNO055Frame())
+        self._sequences: list[int] = [0, 0]
+        self._front: int = 0
+        self.sequence: int = 0
+
+    @property
+    def front(self) -> BNO055Frame:
+        """The latest frame itself, only safe to read from the writer's thread"""
+        return self._frames[self._front]
+
+    def begin_write(self) -> BNO055Frame:
+        back: int = 1 - self._front
+        self._sequences[back] = -1
+        return self._frames[back]
+
+    def publish(self) -> None:
+        back: int = 1 - self._front
+        self.sequence += 1
+        self._sequences[back] = self.sequence
+        self._front = back
+
+    def latest(self, frame: BNO055Frame) -> int:
+        """Copy the latest frame into frame. Returns its sequence number."""
+        while True:
+            front: int = self._front
+            sequence: int = self._sequences[front]
+            if sequence < 0:  # became the back frame and is being written
+                continue
+            frame.copy_from(self._frames[front])
+            if self._sequences[front] == sequence:
+                return sequence
+
+
+class IMUAcquisition:
+    """
+    Reads frames from a sensor at a fixed rate in a background thread, or on
+    demand with read_once().
+
+    Frames identical to the previous one, read before the sensor fusion
+    produced new data, are dropped rather than published. A failed read
+    leaves the last good frame as the latest, so readers never wait on or see
+    a bus error, only a frame whose time shows its age. Before the first good
+    read there is no such frame, and latest() raises NoFrameError. latest()
+    never reads the sensor, so a read longer than read_deadline only delays
+    the next frame; it is counted as an overrun.
+    After max_consecutive_errors failed reads, recover() runs in its own
+    thread; reads are skipped, serving the last good frame, until it returns.
+
+    Attributes:
+        no_reads: int: frames read from the sensor
+        no_duplicates: int: frames dropped as unchanged
+        no_errors: int: reads that raised OSError
+        no_overruns: int: reads that took longer than read_deadline
+        no_stale_frames: int: frames handed out older than stale_age
+        no_recoveries: int: recoveries run
+        recovery_time: float: seconds spent recovering
+        consecutive_errors: int: failed reads since the last good read
+
+    Methods:
+        latest: int: Copy the latest frame out, returning its sequence number
+        running: bool: Whether the reading thread is running
+        wait_for_frame: bool: Wait for the first good frame
+        read_once: bool: Read one frame, True if it was new
+        start: None: Start the reading thread
+        stop: None: Stop the reading thread
+    """
+
+    def __init__(
+        self,
+        *,
+        source: FrameSource,
+        rate_hz: float = 100,  # BNO055 fusion output rate
+        read_deadline: float = 0.005,  # seconds
+        stale_age: float = 0.02,  # seconds, two fusion periods
+        max_consecutive_errors: int = 3,
+        recover: Callable[[], None] | None = None,
+        clock: Callable[[], float] = time.monotonic,
+        logger: Logger,
+    ) -> None:
+        self._source: FrameSource = source
+        self._period: float = 1 / rate_hz
+        self._read_deadline: float = read_deadline
+        self._stale_age: float = stale_age
+        self._max_consecutive_errors: int = max_consecutive_errors
+        self._recover: Callable[[], None] | None = recover
+        self._clock: Callable[[], float] = clock
+        self._logger: Logger = logger
+        self._buffer: FrameDoubleBuffer = FrameDoubleBuffer()
+        self._thread: threading.Thread | None = None
+        self._recovery: threading.Thread | None = None
+        self._stop_event = threading.Event()
+        self._first_frame = threading.Event()
+        self.no_reads: int = 0
+        self.no_duplicates: int = 0
+        self.no_errors: int = 0
+        self.no_overruns: int = 0
+        self.no_stale_frames: int = 0
+        self.no_recoveries: int = 0
+        self.recovery_time: float = 0.0
+        self.consecutive_errors: int = 0
+
+    @property
+    def sequence(self) -> int:
+        """Number of frames published, 0 before the first"""
+        return self._buffer.sequence
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    @property
+    def recovering(self) -> bool:
+        return self._recovery is not None and self._recovery.is_alive()
+
+    def latest(self, frame: BNO055Frame) -> int:
+        """
+        Copy the latest frame into frame in constant time. Returns its
+        sequence. NoFrameError if no good frame has been read yet.
+        """
+        if self._buffer.sequence == 0:
+            raise NoFrameError("9DOF sensor: No good frame read yet")
+        sequence: int = self._buffer.latest(frame)
+        if self._clock() - frame.time > self._stale_age:
+            self.no_stale_frames += 1
+        return sequence
+
+    def read_once(self) -> bool:
+        """Read a frame, publishing it if it differs from the latest"""
+        if self.recovering:  # the bus is the recovery's until it is done
+            return False
+        back: BNO055Frame = self._buffer.begin_write()
+        start_time: float = self._clock()
+        try:
+            self._source.read_frame(back)
+        except OSError as e:
+            self._read_failed(e)
+            return False
+        if self._clock() - start_time > self._read_deadline:
+            self.no_overruns += 1
+        self.no_reads += 1
+        self.consecutive_errors = 0
+        if self._buffer.sequence and back.raw == self._buffer.front.raw:
+            self.no_duplicates += 1
+            return False
+        self._buffer.publish()
+        if self._buffer.sequence == 1:
+            self._first_frame.set()
+        return True
+
+    def wait_for_frame(self, timeout: float | None = None) -> bool:
+        """Wait up to timeout seconds for the first good frame. True if read."""
+        return self._first_frame.wait(timeout)
+
+    def _read_failed(self, e: OSError) -> None:
+        self.no_errors += 1
+        self.consecutive_errors += 1
+        self._logger.warning(msg=f"9DOF sensor: Frame read failed: {e}")
+        if (
+            self._recover is not None
+            and self.consecutive_errors >= self._max_consecutive_errors
+        ):
+            self._recovery = threading.Thread(
+                target=self._run_recovery, name="imu_recovery", daemon=True
+            )
+            self._recovery.start()
+
+    def _run_recovery(self) -> None:
+        self._logger.warning(
+            msg=f"9DOF sensor: {self.consecutive_errors} consecutive read errors, recovering"
+        )
+        start_time: float = self._clock()
+        try:
+            self._recover()
+        except OSError as e:  # try again after the next errors
+            self._logger.error(msg=f"9DOF sensor: Recovery failed: {e}")
+        duration: float = self._clock() - start_time
+        self.recovery_time += duration
+        self.no_recoveries += 1
+        self.consecutive_errors = 0
+        self._logger.info(msg=f"9DOF sensor: Recovery took {duration:.3f} s")
+
+    def _run(self) -> None:
+        next_time: float = self._clock()
+        while not self._stop_event.is_set():
+            self.read_once()
+            next_time += self._period
+            delay: float = next_time - self._clock()
+            if delay < 0:  # overran, keep to the rate from now on
+                next_time -= delay
+                delay = 0
+            self._stop_event.wait(delay)
+
+    def start(self, rate_hz: float | None = None) -> None:
+        if self._thread is not None:
+            return
+        if rate_hz is not None:
+            self._period = 1 / rate_hz
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="imu_acquisition", daemon=True
+        )
+        self._thread.start()
+        self._logger.info(msg="9DOF sensor: Started frame acquisition")
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stop_event.set()
+        self._thread.join()
+        self._thread = None
+        if self._recovery is not None:
+            self._recovery.join()
+        self._logger.info(
+            msg=f"9DOF sensor: Stopped frame acquisition: {self.sequence} frames, {self.no_duplicates} duplicates, {self.no_errors} errors, {self.no_overruns} overruns, {self.no_stale_frames} stale frames, {self.no_recoveries} recoveries in {self.recovery_time:.3f} s"
+        )
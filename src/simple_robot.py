@@ -52,6 +52,9 @@ class EncoderGeneral(Protocol):
     def jerk(self) -> float:
         raise NotImplementedError
 
+    def snapshot(self) -> tuple[float, float, float, float, float, float, float]:
+        raise NotImplementedError
+
 
 class BBAbsoluteSensorGeneral(Protocol):
     def __init__(self) -> None:
@@ -194,11 +197,9 @@ class SimpleRobot:
                         min(fwd_vel - right_turn, 1), -1
                     )
             self._eh.post(event_type="robot encoder sensor", message="Left Wheel:")
-            _ = self._enc_wheel_left.distance  # trigger posting of distance
-            _ = self._enc_wheel_left.jerk
+            _ = self._enc_wheel_left.snapshot()  # trigger posting of kinematics
             self._eh.post(event_type="robot encoder sensor", message="Right Wheel:")
-            _ = self._enc_wheel_right.distance  # trigger posting of distance
-            _ = self._enc_wheel_right.jerk
+            _ = self._enc_wheel_right.snapshot()  # trigger posting of kinematics
             time.sleep(interval / 5)
 
     def drive_program(self, steps: list[tuple[int, int, int]]) -> None:
@@ -7,6 +7,8 @@ import random
 import math
 from typing import Protocol, Dict
 
+from src.sensor.bno055_frame import Vector3
+
 # from box import Box
 # from config import cfg
 
@@ -37,6 +39,9 @@ class BB9DOFSensorSimulator:
 
         """
         self._eh = eh
+        self._euler_xyz: Vector3 = Vector3()
+        self._gyro_xyz: Vector3 = Vector3()
+        self._raw_accel_xyz: Vector3 = Vector3()
 
         self.calibrate_sensor()
 
@@ -143,6 +148,36 @@ class BB9DOFSensorSimulator:
         )
         return {"x": roll_x, "y": pitch_y, "z": yaw_z}
 
+    def refresh(self) -> None:
+        """Readings are simulated when read, there is no frame to take"""
+
+    def euler_xyz(self) -> Vector3:
+        """Roll (x), pitch (y) and yaw (z), degrees. Reused record."""
+        euler_angles: Dict[str, float] = self.euler_angles
+        self._euler_xyz.x = euler_angles["x"]
+        self._euler_xyz.y = euler_angles["y"]
+        self._euler_xyz.z = euler_angles["z"]
+        return self._euler_xyz
+
+    def gyro_xyz(self) -> Vector3:
+        """Angular velocity (rad/s), as the BNO055 sensor. Reused record."""
+        gyro_bb: Dict[str, float] = self.gyro_bb
+        self._gyro_xyz.x = math.radians(gyro_bb["x"])
+        self._gyro_xyz.y = math.radians(gyro_bb["y"])
+        self._gyro_xyz.z = math.radians(gyro_bb["z"])
+        return self._gyro_xyz
+
+    def raw_accel_xyz(self) -> Vector3:
+        """
+        Acceleration including gravity (m/s^2), as the BNO055 sensor, with the
+        robot upright. Reused record.
+        """
+        accel: Dict[str, float] = self.accel
+        self._raw_accel_xyz.x = accel["x"]
+        self._raw_accel_xyz.y = accel["y"]
+        self._raw_accel_xyz.z = accel["z"] + 9.80665
+        return self._raw_accel_xyz
+
     @property
     def gravity_dir(self) -> Dict[str, float]:
         """
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""Edge Event Source Simulator, in place of the GPIO Character Device"""
+
+import threading
+
+from src.encoder.gpio_edge_events import EdgeEvent
+
+
+class EdgeEventSourceSim:
+    """
+    Edge events pushed by a test or simulation, read back by an
+    EdgeEventReader as they would be from the kernel.
+    """
+
+    def __init__(self) -> None:
+        self._events: list[EdgeEvent] = []
+        self._ready = threading.Condition()
+        self.closed: bool = False
+
+    def push(self, events: list[EdgeEvent]) -> None:
+        with self._ready:
+            self._events.extend(events)
+            self._ready.notify_all()
+
+    def push_edges(self, *, line: int, times_ns: list[int]) -> None:
+        """Alternating rising and falling edges on line"""
+        self.push(
+            [
+                EdgeEvent(line=line, time_ns=time_ns, rising=edge_no % 2 == 0)
+                for edge_no, time_ns in enumerate(times_ns)
+            ]
+        )
+
+    def wait_edge_events(self, timeout: float) -> bool:
+        with self._ready:
+            return self._ready.wait_for(lambda: bool(self._events), timeout=timeout)
+
+    def read_edge_events(self) -> list[EdgeEvent]:
+        with self._ready:
+            events, self._events = self._events, []
+        return events
+
+    def close(self) -> None:
+        self.closed = True
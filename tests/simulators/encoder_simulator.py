@@ -1,41 +1,67 @@
 #!/usr/bin/env python3
-"""Encoder Simulator"""
+"""Encoder Simulator, running on a real or virtual clock"""
 
 import asyncio
+import math
 import time
-from typing import Union  # Protocol
+from logging import Logger
+from typing import Awaitable, Callable, Protocol
 
-from gpiozero import Motor
+import numpy as np
+import numpy.typing as npt
 
-from config import cfg_sim
-from encoder_sensor_general import EncoderGeneral
-from event import EventHandler
-from motor_simulator import MotorSim
-
-
-class EventHandlerTemplate(Protocol):
-    def post(self, *, event_type: str, message: str) -> None:
-        raise NotImplementedError
+from src.encoder.encoder_sensor_general import EncoderGeneral
 
 
 class MotorGeneral(Protocol):
-    def __init__(self) -> None:
-        raise NotImplementedError
-
     @property
     def value(self) -> float:
         raise NotImplementedError
 
 
+class VirtualClock:
+    """
+    Simulated time in seconds, only moving when advanced. Called like
+    time.time; sleep() advances it, so simulations run as fast as they can.
+    """
+
+    def __init__(self, start: float = 0.0) -> None:
+        self.now: float = start
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+    async def sleep(self, seconds: float) -> None:
+        """Like asyncio.sleep, but advancing this clock rather than waiting"""
+        self.now += seconds
+        await asyncio.sleep(0)  # let other tasks run
+
+
 class EncoderSim(EncoderGeneral):
     """
-    A class to represent a simulated distance encoder.
+    A simulated two-state encoder, like EncoderDigital, driven by a motor.
+
+    The wheel turns at revs_per_second_at_full_motor times the motor value.
+    Each update() works out analytically the times the wheel passed every
+    half slot edge since the last update and adds them as a block, so an
+    update costs about the same however long the interval. Updates happen
+    when the kinematics are read, when update() is called or in run(), a
+    cooperative task. The motor value read at an update applies since the
+    previous update, so update before changing the motor value.
+
+    With a VirtualClock as clock, a 10 minute drive simulates in
+    milliseconds and is the same every run.
 
     Attributes:
         position: float: number and fractions of rotations
         moving_forward: bool: True if moving forward, False if moving backwards
 
     Methods:
+        update: None: Add the edges passed up to the clock's current time
+        run: coroutine: Update every interval until stopped
         speed: float: Returns average speed over a give time duration
         accel: float: Returns average acceleration over a give time duration
         jerk: float: Returns average jerk over a give time duration
@@ -46,76 +72,93 @@ class EncoderSim(EncoderGeneral):
     def __init__(
         self,
         *,
-        sample_freq: float = 100,  # per second
+        slots_per_rev: int = 20,
+        revs_per_second_at_full_motor: float = 1.0,
         max_no_position_points: int = 10_000,
-        average_duration: int = 1,  # seconds
-        motor: Union[Motor, MotorSim],
-        eh: EventHandler,
+        average_duration: float = 1,  # seconds
+        summary_tiers: tuple[tuple[float, int], ...] = (),  # for summaries()
+        motor: MotorGeneral,
+        logger: Logger,
+        clock: Callable[[], float] = time.time,
+        sleep: Callable[[float], Awaitable[None]] = asyncio.sleep,
     ) -> None:
-        """
-        Constructs all the necessary attributes for the EncoderSim object
-        Args:
-            sample_freq: Frequency to sample Sensor (Hz)
-            slots_per_rev: Number of slots per revolutoin
-            history_len: Length of distance history to maintain in seconds
-            average_duration: Length to average speed, accel, jerk over
-        Returns:
-            None, other than object itself
-        Raises:
-            None.
-        """
         super().__init__(
             max_no_position_points=max_no_position_points,
             average_duration=average_duration,
+            summary_tiers=summary_tiers,
             motor=motor,
-            eh=eh,
+            logger=logger,
+            clock=clock,
         )
-        self._position_change_to_motor_value_ratio: float = (
-            cfg_sim.encoder.position_change_to_motor_value_ratio
+        self._revs_per_edge: float = 1 / slots_per_rev / 2
+        self._revs_per_second_at_full_motor: float = revs_per_second_at_full_motor
+        self._sleep: Callable[[float], Awaitable[None]] = sleep
+        self.position: float = 0
+
+    def reset_history(self) -> None:
+        super().reset_history()
+        self._update_time: float = self._start_time
+        self._exact_position: float = 0  # revs, between edges
+        self.position = 0
+
+    def _edges(
+        self, start_time: float, end_time: float, rate: float
+    ) -> tuple[npt.NDArray[np.float64], npt.NDArray[np.float64]]:
+        """
+        Times the edges were passed at rate revs per second, and positions
+        after them. Each edge is a half slot step in the direction of motion
+        from the last position, as EncoderDigital counts it, so after a
+        reversal between edges the position is a half slot behind the wheel.
+        An edge the wheel starts exactly on is not passed again.
+        """
+        start_edge: float = self._exact_position / self._revs_per_edge
+        end_edge: float = (
+            start_edge + rate * (end_time - start_time) / self._revs_per_edge
         )
-        self._position_change_rate = (  # distance / time (s)
-            float(self._motor.value) * self._position_change_to_motor_value_ratio
+        if rate > 0:
+            edges = np.arange(math.floor(start_edge) + 1, math.floor(end_edge) + 1)
+        else:
+            edges = np.arange(math.ceil(start_edge) - 1, math.ceil(end_edge) - 1, -1)
+        times: npt.NDArray[np.float64] = (
+            start_time + (edges * self._revs_per_edge - self._exact_position) / rate
         )
-        self._sample_freq: float = sample_freq
-
-        # Initialize these now to save time each encoding loop
-        self._new_time: float
-        self._old_time: float
-        self._time_delta: float
-        self._old_position: float
-        self._new_position: float
-
-        self.start()
-
-    async def _encoding_loop(self) -> None:
+        steps: npt.NDArray[np.float64] = np.arange(1, len(edges) + 1) * math.copysign(
+            self._revs_per_edge, rate
+        )
+        return times, self.position + steps
+
+    def update(self) -> None:
+        """Add the edges passed since the last update, at the current motor value"""
+        now: float = self._clock()
+        duration: float = now - self._update_time
+        if duration <= 0:
+            return
+        rate: float = self._motor.value * self._revs_per_second_at_full_motor
+        if rate != 0:
+            times, positions = self._edges(self._update_time, now, rate)
+            self._exact_position += rate * duration
+            if len(times):
+                self.add_positions(times, positions)
+                self.position = float(positions[-1])
+        self._update_time = now
+
+    def _add_pending_positions(self) -> None:
+        self.update()
+
+    async def run(self, interval: float = 0.01) -> None:
+        """Update every interval seconds until stopped. Schedule as a task."""
+        self._logger.info(msg="encoder sensor: Encoder Simulator running")
         while self._running:
-            self._new_time = time.time()
-            self._old_time = self._position_history[self._current_history_len - 1, 0]
-            self._time_delta: float = self._new_time - self._old_time
-
-            self._old_position = self._position_history[
-                self._current_history_len - 1, 2
-            ]
-            self._new_position = (
-                self._old_position + self._position_change_rate * self._time_delta
-            )
-
-            self.add_position(a_time=self._new_time, position=self._new_position)
-
-            await asyncio.sleep(1 / self._sample_freq)
+            self.update()
+            await self._sleep(interval)
+        self._logger.info(msg="encoder sensor: Encoder Simulator loop complete")
 
     def start(self) -> None:
+        super().start()
         self._running = True
-        self.reset_history()
-        self._eh.post(event_type="Encoder Sensor", message="Encoder Simulator starting")
-        loop = asyncio.get_event_loop()
-        tasks = [loop.create_task(self._encoding_loop())]
-        loop.run_until_complete(asyncio.wait(tasks))
-        loop.close()
-        self._eh.post(
-            event_type="Encoder Sensor", message="Encoder Simulator loop complete"
-        )
+        self._logger.info(msg="encoder sensor: Encoder Simulator started")
 
     def stop(self) -> None:
+        self.update()
         self._running = False
-        self._eh.post(event_type="Encoder Sensor", message="Encoder Simulator stopped")
+        self._logger.info(msg="encoder sensor: Encoder Simulator stopped")
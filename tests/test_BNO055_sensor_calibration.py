@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 """ Tester for BNO055 9-Degree of Freedom Sensor Calibration, Saving and Restoring """
 
+import asyncio
 from typing import Protocol, Optional, Any
 
 import board
@@ -10,6 +11,7 @@ import busio
 from src.sensor import bb_bno055_sensor as bno055
 from src import robot_listener
 from src.event import EventHandler
+from src.robot_logging.logging_setup import bb_logger as logger
 
 
 class EventHandlerTemplate(Protocol):
@@ -28,7 +30,7 @@ def test_BNO055_sensor_calibrate():
     # Initialize i2C Connection to sensor
     # TODO: need check/try?
     i2c = busio.I2C(board.SCL, board.SDA)
-    sensor = bno055.BB_BNO055Sensor_I2C(i2c=i2c, eh=eh)
+    sensor = bno055.BB_BNO055Sensor_I2C(i2c=i2c, logger=logger)
 
     # Read Sensor Mode to verify connected
     sensor.mode
@@ -47,8 +49,8 @@ def test_BNO055_sensor_calibrate():
         message=f"Initial Sensor Calibration File Values:\n{initial_config_file_calibration_data}",
     )
 
-    # Calibrate Sensor and read calibration values
-    sensor.calibrate_sensor()
+    # Restore the saved calibration, or calibrate and save it, as at start-up
+    assert asyncio.run(sensor.calibrate_at_startup())
     post_calibration_sensor_calibration_data: Box = (
         sensor.read_calibration_data_from_sensor()
     )
@@ -57,9 +59,6 @@ def test_BNO055_sensor_calibrate():
         message=f"Sensor Calibration Values after calibration:\n{post_calibration_sensor_calibration_data}",
     )
 
-    # Save New Calibration Data to Configuration File
-    sensor.write_calibration_data_to_file(post_calibration_sensor_calibration_data)
-
 
 if __name__ == "__main__":
     test_BNO055_sensor_calibrate()
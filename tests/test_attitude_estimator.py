@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+
+import math
+
+import numpy as np
+import pytest
+
+from src.robot_math.attitude_estimator import (
+    ComplementaryPitchEstimator,
+    KalmanPitchEstimator,
+    accel_pitch,
+    first_order_recurrence,
+)
+
+RATE_HZ = 100
+
+
+def _samples(n=3_000, gyro_bias=2.0, accel_noise=2.0):
+    """Gyro rates (rad/s) and accel. pitches (degrees) of a swaying robot"""
+    times = np.arange(n) / RATE_HZ
+    pitches = 10 * np.sin(2 * np.pi * 0.5 * times)
+    rng = np.random.default_rng(1)
+    gyro_rates = np.radians(np.gradient(pitches, 1 / RATE_HZ) + gyro_bias)
+    accel_pitches = pitches + rng.normal(0, accel_noise, n)
+    return pitches, gyro_rates, accel_pitches
+
+
+def test_accel_pitch():
+    assert accel_pitch(0, 0, 9.81) == pytest.approx(0)
+    assert accel_pitch(9.81, 0, 0) == pytest.approx(90)
+    assert accel_pitch(-1, 0, 1) == pytest.approx(-45)
+    np.testing.assert_allclose(accel_pitch([1, 1], [0, 1], [1, 0]), [45, 45])
+
+
+@pytest.mark.parametrize("a", [0.0, 0.5, 0.999, 0.9 + 0.05j])
+def test_first_order_recurrence_matches_loop(a):
+    u = np.random.default_rng(2).normal(size=5_000)
+    expected = np.empty(len(u), dtype=complex)
+    y = 3.0
+    for k, u_k in enumerate(u):
+        y = a * y + u_k
+        expected[k] = y
+    np.testing.assert_allclose(first_order_recurrence(a, u, 3.0), expected, atol=1e-9)
+
+
+@pytest.mark.parametrize(
+    "estimator_class", [ComplementaryPitchEstimator, KalmanPitchEstimator]
+)
+def test_filter_matches_updates(estimator_class):
+    _, gyro_rates, accel_pitches = _samples()
+    streaming = estimator_class(rate_hz=RATE_HZ)
+    pitches = [streaming.update(g, a) for g, a in zip(gyro_rates, accel_pitches)]
+    batch = estimator_class(rate_hz=RATE_HZ)
+    filtered, pitch_rates = batch.filter(gyro_rates[:1_000], accel_pitches[:1_000])
+    more, _ = batch.filter(gyro_rates[1_000:], accel_pitches[1_000:])
+    np.testing.assert_allclose(np.concatenate([filtered, more]), pitches, atol=1e-9)
+    assert filtered.dtype == np.float64
+    assert batch.pitch == pytest.approx(streaming.pitch)
+    assert batch.pitch_rate == pytest.approx(streaming.pitch_rate)
+
+
+def test_kalman_estimates_gyro_bias():
+    pitches, gyro_rates, accel_pitches = _samples()
+    estimator = KalmanPitchEstimator(rate_hz=RATE_HZ)
+    estimated, pitch_rates = estimator.filter(gyro_rates, accel_pitches)
+    assert estimator.bias == pytest.approx(2.0, abs=0.5)
+    settled = slice(1_000, None)
+    error = np.sqrt(np.mean((estimated[settled] - pitches[settled]) ** 2))
+    assert error < 0.5  # accel. pitch alone is 2 degrees rms
+    true_rates = np.gradient(pitches, 1 / RATE_HZ)
+    assert np.abs(pitch_rates[settled] - true_rates[settled]).max() < 1.0
+
+
+def test_complementary_follows_gyro_between_accel_pitches():
+    estimator = ComplementaryPitchEstimator(rate_hz=RATE_HZ, time_constant=0.5)
+    estimator.update(0.0, 0.0)
+    for _ in range(10):  # 0.1 s of 10 deg/s with the accel. still reading 0
+        estimator.update(math.radians(10), 0.0)
+    assert estimator.pitch_rate == pytest.approx(10)
+    assert 0.8 < estimator.pitch < 1.0
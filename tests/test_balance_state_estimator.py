@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+
+import numpy as np
+import pytest
+
+from src.robot_math.balance_state_estimator import (
+    PITCH,
+    PITCH_RATE,
+    WHEEL_POSITION,
+    WHEEL_VELOCITY,
+    BalanceStateEstimator,
+)
+
+
+def _run(estimator, *, with_pitch_rate=True, n=3_000, dt=0.02):
+    """Estimates and true states of a robot rocking as it drives forward"""
+    rng = np.random.default_rng(0)
+    times = np.arange(n) * dt
+    true = np.column_stack(
+        [
+            0.3 * times + 0.5 * np.sin(times),
+            0.3 + 0.5 * np.cos(times),
+            5 * np.sin(3 * times),
+            15 * np.cos(3 * times),
+        ]
+    )
+    positions = np.round(true[:, WHEEL_POSITION] * 40) / 40  # half slot edges
+    pitches = true[:, PITCH] + rng.normal(0, 0.1, n)
+    pitch_rates = true[:, PITCH_RATE] + rng.normal(0, 0.3, n)
+    estimates = np.empty((n, 4))
+    for k in range(n):
+        estimates[k] = estimator.update(
+            times[k],
+            positions[k],
+            pitches[k],
+            pitch_rates[k] if with_pitch_rate else None,
+        )
+    return estimates, true
+
+
+def _rms_errors(estimates, true, settled=200):
+    return np.sqrt(np.mean((estimates[settled:] - true[settled:]) ** 2, axis=0))
+
+
+def test_tracks_wheel_and_pitch_states():
+    errors = _rms_errors(*_run(BalanceStateEstimator()))
+    assert errors[WHEEL_POSITION] < 0.01
+    assert errors[WHEEL_VELOCITY] < 0.15  # of up to 0.8 rev/s
+    assert errors[PITCH] < 0.05  # measured to 0.1 degrees
+    assert errors[PITCH_RATE] < 0.5  # measured to 0.3 deg/s
+
+
+def test_estimates_pitch_rate_without_gyro():
+    errors = _rms_errors(*_run(BalanceStateEstimator(), with_pitch_rate=False))
+    assert errors[PITCH] < 0.1
+    assert errors[PITCH_RATE] < 5  # of up to 15 deg/s
+
+
+def test_state_is_one_read_only_array_updated_in_place():
+    estimator = BalanceStateEstimator()
+    state = estimator.update(0.0, 1.0, 2.0, 3.0)
+    assert state is estimator.state
+    np.testing.assert_array_equal(state, [1, 0, 2, 3])
+    assert estimator.update(0.02, 1.0, 2.0) is state
+    assert estimator.time == 0.02
+    with pytest.raises(ValueError):
+        state[0] = 0
+    covariance = estimator.covariance
+    np.testing.assert_allclose(covariance, covariance.T, atol=1e-12)
+    estimator.reset()
+    np.testing.assert_array_equal(state, 0)
+    assert estimator.update(5.0, 2.0, 0.0) is state
+    assert state[WHEEL_POSITION] == 2
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+
+import asyncio
+
+from src.sensor.bno055_calibration import (
+    calibrate_at_startup,
+    interactive_calibration,
+)
+from tests.simulators.encoder_simulator import VirtualClock
+
+
+class CalibrationSensorSim:
+    """Sensor whose calibration status follows a script of (time, status)"""
+
+    def __init__(self, clock, script, saved=True, offsets_taken=True) -> None:
+        self._clock = clock
+        self._script = script
+        self._saved = saved
+        self._offsets_taken = offsets_taken
+        self.restored = False
+        self.saves = 0
+
+    @property
+    def calibration_status(self):
+        status = (0, 0, 0, 0)
+        for a_time, a_status in self._script:
+            if self._clock() >= a_time:
+                status = a_status
+        return status
+
+    def restore_calibration(self) -> None:
+        if not self._saved:
+            raise ValueError("9DOF sensor: Calibration data from file is invalid")
+        self.restored = True
+
+    def calibration_restored(self) -> bool:
+        return self.restored and self._offsets_taken
+
+    def save_calibration(self) -> None:
+        self.saves += 1
+
+
+def _calibrate(sensor, clock, **kwargs):
+    events = []
+    calibrated = asyncio.run(
+        calibrate_at_startup(
+            sensor,
+            on_event=events.append,
+            sleep=clock.sleep,
+            clock=clock,
+            **kwargs,
+        )
+    )
+    return calibrated, events
+
+
+def test_restored_calibration_is_ready_within_a_second():
+    clock = VirtualClock()
+    sensor = CalibrationSensorSim(clock, [(0.3, (0, 3, 1, 0))])
+    calibrated, events = _calibrate(sensor, clock, restore=True)
+    assert calibrated
+    assert sensor.restored
+    assert sensor.saves == 0
+    assert [event.stage for event in events] == ["restored"]
+    assert clock() < 1
+
+
+def test_falls_back_to_interactive_calibration_and_saves():
+    clock = VirtualClock()
+    script = [(5, (0, 0, 3, 0)), (6, (0, 3, 3, 0)), (20, (1, 3, 3, 3))]
+    script.append((25, (3, 3, 3, 3)))
+    sensor = CalibrationSensorSim(clock, script, saved=False)
+    calibrated, events = _calibrate(sensor, clock, restore=True)
+    assert calibrated
+    assert sensor.saves == 1
+    stages = [event.stage for event in events]
+    assert stages[0] == "restore_failed"
+    assert stages[-1] == "saved"
+    assert stages.count("calibrated") == 4
+    # Reminders every 2 s, not every 0.1 s poll
+    assert 10 < stages.count("waiting") < 20
+    assert 25 <= clock() < 25.2
+
+
+def test_restored_offsets_must_read_back():
+    clock = VirtualClock()
+    script = [(0.3, (0, 3, 1, 0)), (10, (3, 3, 3, 3))]
+    sensor = CalibrationSensorSim(clock, script, offsets_taken=False)
+    calibrated, events = _calibrate(sensor, clock, restore=True)
+    assert calibrated
+    assert sensor.restored
+    assert sensor.saves == 1
+    stages = [event.stage for event in events]
+    assert stages[0] == "restore_failed"
+    assert "restored" not in stages
+    assert clock() >= 10
+
+
+def test_restored_calibration_not_taken():
+    clock = VirtualClock()
+    sensor = CalibrationSensorSim(clock, [(10, (3, 3, 3, 3))])
+    calibrated, events = _calibrate(sensor, clock, restore=True, timeout=5)
+    assert not calibrated
+    assert sensor.restored
+    assert [events[0].stage, events[-1].stage] == ["restore_failed", "timed_out"]
+    assert sensor.saves == 0
+
+
+def test_interactive_calibration_tolerates_read_errors():
+    clock = VirtualClock()
+
+    class FlakySensorSim(CalibrationSensorSim):
+        @property
+        def calibration_status(self):
+            if clock() < 1:
+                raise OSError(121, "Remote I/O error")
+            return (3, 3, 3, 3)
+
+    events = []
+    calibrated = asyncio.run(
+        interactive_calibration(
+            FlakySensorSim(clock, []),
+            on_event=events.append,
+            sleep=clock.sleep,
+            clock=clock,
+        )
+    )
+    assert calibrated
+    assert events[0].status == (0, 0, 0, 0)
+    assert clock() >= 1
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+
+import struct
+
+import numpy as np
+import pytest
+
+from src.sensor.bno055_frame import FRAME_LEN, BNO055Frame, Vector3
+
+
+def _register_block(
+    *,
+    accel=(981, -5, 12),
+    magnetic=(320, -16, 48),
+    gyro=(16, -32, 0),
+    euler=(5760, -160, 32),
+    quaternion=(1 << 14, 0, -8192, 0),
+    linear_accel=(100, 200, -300),
+    gravity=(0, 0, 981),
+    temperature=-5,
+    calib_stat=0b11_10_01_00,
+) -> bytes:
+    block = struct.pack(
+        "<22h",
+        *accel,
+        *magnetic,
+        *gyro,
+        *euler,
+        *quaternion,
+        *linear_accel,
+        *gravity,
+    ) + struct.pack("<bB", temperature, calib_stat)
+    assert len(block) == FRAME_LEN
+    return block
+
+
+def test_decode_register_block():
+    frame = BNO055Frame()
+    frame.raw[:] = _register_block()
+    frame.decode(12.5)
+    np.testing.assert_allclose(frame.accel, [9.81, -0.05, 0.12])
+    np.testing.assert_allclose(frame.magnetic, [20, -1, 3])
+    np.testing.assert_allclose(frame.gyro, np.radians([1, -2, 0]))
+    np.testing.assert_allclose(frame.euler, [360, -10, 2])
+    np.testing.assert_allclose(frame.quaternion, [1, 0, -0.5, 0])
+    np.testing.assert_allclose(frame.linear_accel, [1, 2, -3])
+    np.testing.assert_allclose(frame.gravity, [0, 0, 9.81])
+    assert frame.temperature == -5
+    assert frame.calibration_status == (3, 2, 1, 0)
+    assert frame.time == 12.5
+
+
+def test_frame_is_reused_in_place():
+    frame = BNO055Frame()
+    euler = frame.euler
+    frame.raw[:] = _register_block(euler=(16, 0, 0))
+    frame.decode(1)
+    assert euler[0] == pytest.approx(1)
+    frame.raw[:] = _register_block(euler=(32, 0, 0))
+    frame.decode(2)
+    assert euler[0] == pytest.approx(2)
+    assert np.shares_memory(euler, frame.values)
+
+
+def test_vector3_is_slotted():
+    vector = Vector3()
+    assert (vector.x, vector.y, vector.z) == (0, 0, 0)
+    vector.y, vector.x, vector.z = 1.5, -2.0, 3.0
+    assert repr(vector) == "Vector3(x=-2.0, y=1.5, z=3.0)"
+    with pytest.raises(AttributeError):
+        vector.w = 0  # no __dict__ to allocate
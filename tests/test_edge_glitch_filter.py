@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+
+import pytest
+
+from src.encoder.edge_glitch_filter import EdgeGlitchFilter
+
+US: int = 1_000  # ns
+
+
+def _accepted(
+    glitch_filter: EdgeGlitchFilter, edges: list[tuple[int, bool]]
+) -> list[int]:
+    accepted: list[int] = []
+    for time_ns, level in edges:
+        edge_time_ns = glitch_filter.edge(time_ns, level)
+        if edge_time_ns is not None:
+            accepted.append(edge_time_ns)
+    return accepted
+
+
+def test_no_minimum_width_accepts_every_change_of_level():
+    glitch_filter = EdgeGlitchFilter()
+    edges = [(0, True), (1, False), (2, True), (3, True), (4, False)]
+    assert _accepted(glitch_filter, edges) == [0, 1, 2, 4]
+    assert glitch_filter.no_rejected == 1  # repeated level at 3
+
+
+def test_short_pulse_is_dropped_with_both_edges():
+    glitch_filter = EdgeGlitchFilter(min_pulse_width_us=50, initial_level=True)
+    edges = [
+        (1_000 * US, False),  # real edge
+        (3_000 * US, True),  # real edge
+        (4_000 * US, False),  # 10 us glitch
+        (4_010 * US, True),
+        (5_000 * US, False),  # real edge
+    ]
+    assert _accepted(glitch_filter, edges) == [1_000 * US, 3_000 * US]
+    assert glitch_filter.flush(5_020 * US) is None  # not yet min width
+    assert glitch_filter.flush(5_050 * US) == 5_000 * US
+    assert glitch_filter.no_accepted == 3
+    assert glitch_filter.no_rejected == 1
+
+
+def test_contact_bounce_keeps_time_of_last_bounce():
+    glitch_filter = EdgeGlitchFilter(min_pulse_width_us=50, initial_level=True)
+    edges = [(1_000 * US, False), (1_005 * US, True), (1_010 * US, False)]
+    assert _accepted(glitch_filter, edges) == []
+    assert glitch_filter.flush(2_000 * US) == 1_010 * US
+
+
+def test_negative_width_rejected():
+    with pytest.raises(ValueError):
+        EdgeGlitchFilter(min_pulse_width_us=-1)
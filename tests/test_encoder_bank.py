@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+
+import logging
+
+import numpy as np
+import pytest
+
+from src.encoder.encoder_bank import (
+    ACCEL_COL,
+    DISTANCE_COL,
+    JERK_COL,
+    SPEED_COL,
+    EncoderBank,
+)
+from tests.test_encoder_general import FakeClock, _drive, _started_encoder
+
+
+def _bank_of_four(clock: FakeClock) -> tuple[EncoderBank, dict]:
+    encoders = {
+        "wheel_left": _started_encoder(max_no_position_points=200, clock=clock),
+        "wheel_right": _started_encoder(max_no_position_points=200, clock=clock),
+        "arm_left": _started_encoder(max_no_position_points=50, clock=clock),
+        "arm_right": _started_encoder(
+            max_no_position_points=400, clock=clock, history_revs_per_tick=1 / 40
+        ),
+    }
+    return EncoderBank(encoders=encoders, logger=logging.getLogger("test")), encoders
+
+
+def test_snapshot_matches_each_encoder():
+    clock = FakeClock()
+    bank, encoders = _bank_of_four(clock)
+    _drive(encoders["wheel_left"], no_steps=300, step_duration=0.01)
+    _drive(encoders["wheel_right"], no_steps=100, step_duration=0.02)
+    _drive(encoders["arm_left"], no_steps=80, step_duration=0.03)
+    a_time = encoders["arm_right"]._position_history.last[0]
+    for step in range(1, 120):  # accelerating
+        a_time += 0.05 / step**0.5
+        encoders["arm_right"].add_position(a_time=a_time, position=step / 40)
+
+    kinematics = bank.snapshot()
+    assert kinematics.shape == (4, 4)
+    assert bank.channels == ("wheel_left", "wheel_right", "arm_left", "arm_right")
+    for name, encoder in encoders.items():
+        expected = encoder.snapshot()
+        row = kinematics[bank.channel_index(name)]
+        assert row[DISTANCE_COL] == pytest.approx(expected.distance)
+        assert row[SPEED_COL] == pytest.approx(expected.speed)
+        assert row[ACCEL_COL] == pytest.approx(expected.accel)
+        assert row[JERK_COL] == pytest.approx(expected.jerk)
+
+
+def test_encoders_share_one_array_and_keep_their_history():
+    clock = FakeClock()
+    encoder = _started_encoder(max_no_position_points=100, clock=clock)
+    _drive(encoder, no_steps=30, step_duration=0.01)
+    rows_before = encoder.position_history_rows().copy()
+    bank = EncoderBank(
+        encoders={"wheel": encoder, "idle": _started_encoder(clock=clock)},
+        logger=logging.getLogger("test"),
+    )
+    assert np.shares_memory(encoder._position_history.view(), bank._storage)
+    np.testing.assert_array_equal(encoder.position_history_rows(), rows_before)
+
+    _drive(encoder, no_steps=200, step_duration=0.01)  # wraps around
+    encoder.reset_history()
+    assert np.shares_memory(encoder._position_history.view(), bank._storage)
+    kinematics = bank.snapshot()
+    np.testing.assert_array_equal(kinematics, np.zeros((2, 4)))
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+
+import logging
+import time
+
+import numpy as np
+import pytest
+
+from src.encoder.encoder_sensor_general import LONG_RUN_SUMMARY_TIERS, EncoderGeneral
+
+
+class FakeMotor:
+    value: float = 1
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now: float = 1_700_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _started_encoder(
+    max_no_position_points: int = 10_000,
+    clock: FakeClock | None = None,
+    history_revs_per_tick: float | None = None,
+    summary_tiers: tuple[tuple[float, int], ...] = (),
+) -> EncoderGeneral:
+    encoder = EncoderGeneral(
+        max_no_position_points=max_no_position_points,
+        history_revs_per_tick=history_revs_per_tick,
+        summary_tiers=summary_tiers,
+        average_duration=1,
+        motor=FakeMotor(),
+        logger=logging.getLogger("test encoder"),
+        clock=clock if clock is not None else time.time,
+    )
+    encoder.start()
+    return encoder
+
+
+def _drive(encoder: EncoderGeneral, no_steps: int, step_duration: float) -> float:
+    """Add no_steps half slot (1/40 rev.) moves, returns time of last move"""
+    a_time = encoder._position_history.last[encoder._T_COL]
+    position = encoder.distance
+    for _ in range(no_steps):
+        a_time += step_duration
+        position += 1 / 40
+        encoder.add_position(a_time=a_time, position=position)
+    return a_time
+
+
+def test_constant_speed():
+    encoder = _started_encoder()
+    _drive(encoder, no_steps=200, step_duration=0.05)
+    assert encoder.distance == pytest.approx(5)
+    assert encoder.speed == pytest.approx(0.5)
+    assert encoder.accel == pytest.approx(0, abs=1e-6)
+    assert encoder.jerk == pytest.approx(0, abs=1e-3)
+
+
+def test_history_wraps_beyond_max_no_position_points():
+    encoder = _started_encoder(max_no_position_points=50)
+    _drive(encoder, no_steps=500, step_duration=0.01)
+    history = encoder._position_history.view()
+    assert len(history) == 50
+    assert (history[1:, encoder._T_COL] > history[:-1, encoder._T_COL]).all()
+    assert history[-1, encoder._DIST_COL] == pytest.approx(500 / 40)
+    assert history[-1, encoder._T_SINCE_START_COL] == pytest.approx(5)
+    assert encoder.speed == pytest.approx(2.5)
+
+
+def test_step_duration_mode():
+    encoder = _started_encoder()
+    _drive(encoder, no_steps=100, step_duration=0.05)
+    assert encoder._position_history.last[encoder._S_D_MODE_COL] == pytest.approx(0.05)
+
+
+def test_snapshot_matches_brute_force_window_averages():
+    encoder = _started_encoder(max_no_position_points=300)
+    a_time = encoder._position_history.last[encoder._T_COL]
+    position = 0.0
+    for step_no in range(1000):
+        a_time += 0.01 + 0.005 * (step_no % 7) / 7
+        position += 1 / 40 if step_no % 50 < 40 else -1 / 40
+        encoder.add_position(a_time=a_time, position=position)
+
+    history = encoder._position_history.view()
+    window = history[history[:, encoder._T_COL] >= a_time - 1]
+    snapshot = encoder.snapshot()
+    assert snapshot.time == a_time
+    assert snapshot.distance == pytest.approx(position)
+    assert snapshot.speed == pytest.approx(window[:, encoder._SPEED_COL].mean())
+    assert snapshot.accel == pytest.approx(window[:, encoder._ACCEL_COL].mean())
+    assert snapshot.jerk == pytest.approx(window[:, encoder._JERK_COL].mean())
+    assert snapshot.window_distance == pytest.approx(
+        window[-1, encoder._DIST_COL] - window[0, encoder._DIST_COL]
+    )
+    assert (snapshot.speed, snapshot.accel, snapshot.jerk) == (
+        encoder.speed,
+        encoder.accel,
+        encoder.jerk,
+    )
+
+
+def test_snapshot_before_enough_history():
+    encoder = _started_encoder()
+    assert encoder.snapshot().speed == 0
+    _drive(encoder, no_steps=1, step_duration=0.05)
+    assert encoder.snapshot()[1:5] == (pytest.approx(1 / 40), 0, 0, 0)
+
+
+def test_points_at_same_time_keep_speed_finite():
+    encoder = _started_encoder()
+    a_time = _drive(encoder, no_steps=10, step_duration=0.05)
+    encoder.add_position(a_time=a_time, position=encoder.distance + 1 / 40)
+    assert encoder._position_history.last[encoder._SPEED_COL] == pytest.approx(0.5)
+    assert np.isfinite(encoder.snapshot()[1:5]).all()
+
+
+@pytest.mark.parametrize("block_size", [1, 7, 64])
+def test_add_positions_matches_add_position(block_size):
+    rng = np.random.default_rng(0)
+    step_durations = rng.gamma(shape=4, scale=0.005, size=400)
+    step_durations[[20, 21, 150]] = 0  # points at the same time
+    directions = np.where(rng.random(400) < 0.9, 1, -1)
+
+    one_by_one = _started_encoder(max_no_position_points=100)
+    in_blocks = _started_encoder(max_no_position_points=100)
+    in_blocks._start_time = one_by_one._start_time
+    in_blocks._position_history.last[:] = one_by_one._position_history.last
+    a_times = one_by_one._start_time + np.cumsum(step_durations)
+    positions = np.cumsum(directions) / 40
+    for a_time, position in zip(a_times, positions):
+        one_by_one.add_position(a_time=a_time, position=position)
+    for first in range(0, len(a_times), block_size):
+        in_blocks.add_positions(
+            a_times[first : first + block_size], positions[first : first + block_size]
+        )
+
+    np.testing.assert_allclose(
+        in_blocks._position_history.view(), one_by_one._position_history.view()
+    )
+    assert in_blocks.snapshot() == pytest.approx(one_by_one.snapshot())
+
+
+def test_raw_edges_keep_their_capture_times():
+    encoder = _started_encoder()
+    encoder._enable_raw_edge_capture(revs_per_edge=1 / 40)
+    encoder.reset_history()
+    step_durations_ns = np.array([5_000_000, 5_001_000, 4_999_000] * 20)
+    times_ns = time.monotonic_ns() + np.cumsum(step_durations_ns)
+    encoder._capture_raw_edges(times_ns[:30])
+    for time_ns in times_ns[30:]:
+        encoder._capture_raw_edge(int(time_ns))
+    assert len(encoder._position_history) == 1  # nothing derived until read
+
+    assert encoder.distance == pytest.approx(60 / 40)
+    history = encoder._position_history.view()
+    np.testing.assert_allclose(
+        history[2:, encoder._S_D_COL], step_durations_ns[1:] * 1e-9, atol=1e-6
+    )
+    assert history[-1, encoder._T_COL] == pytest.approx(
+        time.time() + (times_ns[-1] - time.monotonic_ns()) * 1e-9, abs=0.01
+    )
+
+
+def test_flush_adds_pending_raw_edges():
+    encoder = _started_encoder()
+    encoder._enable_raw_edge_capture(revs_per_edge=1 / 40)
+    encoder.reset_history()
+    start_time = encoder.start_time
+    encoder._capture_raw_edges(time.monotonic_ns() + np.arange(1, 11) * 5_000_000)
+    assert encoder.history_len == 1
+    encoder.flush()
+    assert encoder.history_len == 11
+    assert encoder.start_time == start_time
+
+
+def test_period_speed_decays_after_stall():
+    clock = FakeClock()
+    encoder = _started_encoder(clock=clock)
+    assert encoder.period_speed == 0
+    clock.now = _drive(encoder, no_steps=40, step_duration=0.05)
+    assert encoder.period_speed == pytest.approx(0.5)
+    clock.now += 0.04  # next step not yet due
+    assert encoder.period_speed == pytest.approx(0.5)
+    clock.now += 0.06  # 0.1 s since last step: at most 1/40 rev. in that time
+    assert encoder.period_speed == pytest.approx(0.25)
+    assert encoder.snapshot().period_speed == pytest.approx(0.25)
+    assert encoder.speed == pytest.approx(0.5)  # average still waits for a step
+    clock.now += 0.5
+    assert encoder.period_speed == 0
+
+
+def test_period_speed_keeps_direction():
+    clock = FakeClock()
+    encoder = _started_encoder(clock=clock)
+    a_time = clock.now
+    for step_no in range(1, 11):
+        a_time += 0.02
+        encoder.add_position(a_time=a_time, position=-step_no / 40)
+    clock.now = a_time + 0.1
+    assert encoder.period_speed == pytest.approx(-0.25)
+
+
+# The original position history: 10,000 rows of 9 floats
+UNCOMPACT_HISTORY_BYTES: int = 10_000 * 9 * 8
+
+
+def _drive_back_and_forth(encoder: EncoderGeneral, clock: FakeClock) -> None:
+    a_time = clock.now
+    position = 0.0
+    for step_no in range(3000):
+        a_time += 0.01 + 0.005 * (step_no % 7) / 7
+        position += 1 / 40 if step_no % 50 < 40 else -1 / 40
+        encoder.add_position(a_time=a_time, position=position)
+
+
+def test_compact_history_matches_full_rows():
+    full = _started_encoder(clock=FakeClock())
+    compact = _started_encoder(clock=FakeClock(), history_revs_per_tick=1 / 40)
+    _drive_back_and_forth(full, FakeClock())
+    _drive_back_and_forth(compact, FakeClock())
+
+    compact_rows = compact.position_history_rows()
+    full_rows = full.position_history_rows()
+    # times are kept to the ns as ticks, so differ slightly from float seconds
+    np.testing.assert_allclose(compact_rows[:, :7], full_rows[:, :7], rtol=1e-4)
+    np.testing.assert_allclose(compact_rows[:, 7:], full_rows[:, 7:], rtol=0.02)
+    assert compact.snapshot()[:3] == pytest.approx(full.snapshot()[:3])
+    compact_bytes = compact._position_history.nbytes + compact._tick_history.nbytes
+    # 10,000 ticks of 12 bytes and 2 copies of 256 rows of 12 floats
+    assert compact_bytes == 169_152
+    assert UNCOMPACT_HISTORY_BYTES / compact_bytes > 4
+
+
+def test_tick_history_export_import_round_trip():
+    compact = _started_encoder(clock=FakeClock(), history_revs_per_tick=1 / 40)
+    _drive_back_and_forth(compact, FakeClock())
+    data = compact.export_tick_history()
+    assert len(data) == 3001 * 12
+
+    imported = _started_encoder(clock=FakeClock(), history_revs_per_tick=1 / 40)
+    imported.import_tick_history(data)
+    np.testing.assert_array_equal(
+        imported.position_history_rows(), compact.position_history_rows()
+    )
+    assert imported.export_tick_history() == data
+    with pytest.raises(ValueError):
+        _started_encoder().export_tick_history()
+
+
+def test_summaries_cover_every_point():
+    clock = FakeClock()
+    encoder = _started_encoder(
+        max_no_position_points=100, clock=clock, summary_tiers=LONG_RUN_SUMMARY_TIERS
+    )
+    _drive(encoder, no_steps=3_000, step_duration=0.05)  # 150 s
+    seconds = encoder.summaries(clock.now + 140)
+    assert (np.diff(seconds[:, 0]) == 1).all()
+    assert seconds[:, 1].sum() == pytest.approx(200, abs=20)
+    minutes = encoder.summaries(clock.now)
+    assert minutes[:, 1].sum() == 3_000
+    assert minutes[-1, 7] == pytest.approx(3_000 / 40)
+
+
+def test_summaries_are_opt_in():
+    encoder = _started_encoder(max_no_position_points=100)
+    assert encoder._summaries is None
+    with pytest.raises(ValueError):
+        encoder.summaries(0)
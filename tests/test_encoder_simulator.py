@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+
+import asyncio
+import logging
+import time
+
+import pytest
+
+from tests.simulators.encoder_simulator import EncoderSim, VirtualClock
+from tests.test_encoder_general import FakeMotor
+
+
+def _simulator(clock: VirtualClock, **kwargs) -> EncoderSim:
+    encoder = EncoderSim(
+        motor=FakeMotor(),
+        logger=logging.getLogger("test encoder simulator"),
+        clock=clock,
+        sleep=clock.sleep,
+        **kwargs,
+    )
+    encoder._motor.value = 0.5
+    encoder.start()
+    return encoder
+
+
+def test_ten_minute_drive_faster_than_real_time():
+    clock = VirtualClock()
+    encoder = _simulator(clock)
+    real_start = time.perf_counter()
+    for _ in range(600):
+        clock.advance(1)
+        encoder.update()
+    assert time.perf_counter() - real_start < 1
+    assert encoder.distance == pytest.approx(300)  # 0.5 revs per second
+    assert encoder._current_history_len == 300 * 40 + 1
+    assert encoder.speed == pytest.approx(0.5)
+    history = encoder.position_history_rows()
+    assert history[-1, encoder._T_COL] == pytest.approx(600)
+    assert history[-1, encoder._S_D_COL] == pytest.approx(0.05)
+
+
+def test_edges_follow_motor_value_and_direction():
+    clock = VirtualClock()
+    encoder = _simulator(clock, slots_per_rev=10)
+    clock.advance(0.33)  # 0.165 revs, 3 edges of 0.05
+    assert encoder.distance == pytest.approx(0.15)
+    encoder._motor.value = -1
+    clock.advance(0.1)  # back 0.1 revs to 0.065, past the edges at 0.15 and 0.1
+    assert encoder.distance == pytest.approx(0.05)
+    assert encoder.position_history_rows()[-2:, encoder._T_COL] == pytest.approx(
+        [0.33 + 0.015, 0.33 + 0.065]
+    )
+    encoder._motor.value = 0
+    clock.advance(5)
+    assert encoder.distance == pytest.approx(0.05)
+
+
+def test_run_as_cooperative_task():
+    clock = VirtualClock()
+    encoder = _simulator(clock)
+
+    async def drive() -> None:
+        task = asyncio.create_task(encoder.run(interval=0.01))
+        while clock() < 10:
+            await asyncio.sleep(0)
+        encoder.stop()
+        await task
+
+    asyncio.run(drive())
+    assert encoder.distance == pytest.approx(5, abs=1 / 40)
+
+
+def test_reverse_from_rest():
+    clock = VirtualClock()
+    encoder = _simulator(clock)
+    encoder._motor.value = -1
+    clock.advance(1)
+    history = encoder.position_history_rows()
+    assert history[1:3, encoder._DIST_COL] == pytest.approx([-1 / 40, -2 / 40])
+    assert history[1, encoder._T_COL] == pytest.approx(1 / 40)
+    assert encoder.distance == pytest.approx(-1)
+    assert encoder._current_history_len == 40 + 1
+
+
+def test_reverse_exactly_on_an_edge():
+    clock = VirtualClock()
+    encoder = _simulator(clock)
+    encoder._motor.value = 1
+    clock.advance(0.5)  # to the edge at 0.5 revs
+    assert encoder.distance == pytest.approx(0.5)
+    encoder._motor.value = -1
+    clock.advance(0.5)  # back to the start, on the edge at 0
+    assert encoder.distance == pytest.approx(0)
+    steps = encoder.position_history_rows()[1:, encoder._DIST_COL]
+    assert abs(steps[1:] - steps[:-1]) == pytest.approx(1 / 40)
+    encoder._motor.value = 1
+    clock.advance(0.25)
+    assert encoder.distance == pytest.approx(0.25)
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+
+import logging
+import time
+
+import numpy as np
+
+from src.encoder.gpio_edge_events import EdgeEvent, EdgeEventReader, gpio_line_offset
+from tests.simulators.edge_event_source_simulator import EdgeEventSourceSim
+
+
+class RecordingEncoder:
+    def __init__(self) -> None:
+        self.batches: list[list[int]] = []
+
+    def add_edge_times(self, times_ns: np.ndarray) -> None:
+        self.batches.append(times_ns.tolist())
+
+
+def _reader(source: EdgeEventSourceSim) -> EdgeEventReader:
+    return EdgeEventReader(
+        source=source, poll_timeout=0.01, logger=logging.getLogger("test edges")
+    )
+
+
+def test_gpio_line_offset():
+    assert gpio_line_offset("GPIO26") == 26
+    assert gpio_line_offset("BCM21") == 21
+    assert gpio_line_offset(16) == 16
+
+
+def test_batch_is_split_by_line_in_time_order():
+    source = EdgeEventSourceSim()
+    reader = _reader(source)
+    left, right = RecordingEncoder(), RecordingEncoder()
+    reader.add_encoder(pin="GPIO26", encoder=left)
+    reader.add_encoder(pin="GPIO21", encoder=right)
+    source.push(
+        [
+            EdgeEvent(line=26, time_ns=100, rising=True),
+            EdgeEvent(line=21, time_ns=150, rising=True),
+            EdgeEvent(line=26, time_ns=200, rising=False),
+            EdgeEvent(line=20, time_ns=250, rising=True),
+            EdgeEvent(line=26, time_ns=300, rising=True),
+        ]
+    )
+    assert reader.read_batch(timeout=0) == 5
+    assert left.batches == [[100, 200, 300]]
+    assert right.batches == [[150]]
+    assert reader.no_unclaimed_events == 1
+    assert reader.read_batch(timeout=0) == 0
+
+
+def test_reader_thread_delivers_every_edge():
+    source = EdgeEventSourceSim()
+    reader = _reader(source)
+    encoder = RecordingEncoder()
+    reader.add_encoder(pin=26, encoder=encoder)
+    reader.start()
+    for first in range(0, 1000, 100):
+        source.push_edges(line=26, times_ns=list(range(first, first + 100)))
+    deadline = time.monotonic() + 5
+    while reader.no_events < 1000 and time.monotonic() < deadline:
+        time.sleep(0.001)
+    reader.close()
+    assert source.closed
+    assert sum(encoder.batches, []) == list(range(1000))
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+
+import numpy as np
+import pytest
+
+from src.encoder.history_ring_buffer import TICK_DTYPE, HistoryRingBuffer
+
+
+def _filled_buffer(capacity: int, no_rows: int) -> HistoryRingBuffer:
+    history = HistoryRingBuffer(capacity=capacity, num_cols=3)
+    for row_no in range(no_rows):
+        history.append([row_no, row_no * 10, row_no * 100])
+    return history
+
+
+def test_append_before_full():
+    history = _filled_buffer(capacity=5, no_rows=3)
+    assert len(history) == 3
+    np.testing.assert_array_equal(history.view()[:, 0], [0, 1, 2])
+    np.testing.assert_array_equal(history.last, [2, 20, 200])
+
+
+def test_wrap_around_keeps_columns_and_order():
+    history = _filled_buffer(capacity=5, no_rows=12)
+    assert len(history) == 5
+    np.testing.assert_array_equal(history.view()[:, 0], [7, 8, 9, 10, 11])
+    np.testing.assert_array_equal(history.view()[:, 1], [70, 80, 90, 100, 110])
+    np.testing.assert_array_equal(history.last_n(2)[:, 2], [1000, 1100])
+
+
+def test_views_are_zero_copy():
+    history = _filled_buffer(capacity=4, no_rows=6)
+    assert np.shares_memory(history.view(), history.last_n(2))
+    assert history.last_n(3).base is not None
+
+
+def test_since_selects_time_window():
+    history = _filled_buffer(capacity=8, no_rows=20)
+    np.testing.assert_array_equal(history.since(15.5)[:, 0], [16, 17, 18, 19])
+    np.testing.assert_array_equal(history.since(0)[:, 0], np.arange(12, 20))
+
+
+def test_clear_and_empty():
+    history = _filled_buffer(capacity=4, no_rows=6)
+    history.clear()
+    assert len(history) == 0
+    assert len(history.view()) == 0
+    with pytest.raises(IndexError):
+        history.last
+
+
+@pytest.mark.parametrize(
+    "block_sizes", [[3, 4, 5], [7, 1, 9], [2, 2, 2, 2, 2, 2], [11]]
+)
+def test_extend_matches_append(block_sizes):
+    appended = HistoryRingBuffer(capacity=5, num_cols=2)
+    extended = HistoryRingBuffer(capacity=5, num_cols=2)
+    row_no = 0
+    for block_size in block_sizes:
+        block = np.array([[row_no + i, -(row_no + i)] for i in range(block_size)])
+        for row in block:
+            appended.append(row)
+        extended.extend(block)
+        row_no += block_size
+        np.testing.assert_array_equal(extended.view(), appended.view())
+        np.testing.assert_array_equal(extended.last, appended.last)
+
+
+def test_structured_records():
+    ticks = HistoryRingBuffer(capacity=4, dtype=TICK_DTYPE, time_col="time_ns")
+    for tick in range(6):
+        ticks.append((tick * 1_000, -tick))
+    ticks.extend(np.array([(6_000, -6)], dtype=TICK_DTYPE))
+    np.testing.assert_array_equal(ticks.view()["ticks"], [-3, -4, -5, -6])
+    np.testing.assert_array_equal(ticks.since(4_500)["time_ns"], [5_000, 6_000])
+    assert ticks.nbytes == 2 * 4 * 12
+
+
+def test_supplied_buffer():
+    storage = np.zeros((2, 8, 2))
+    history = HistoryRingBuffer(capacity=4, num_cols=2, buffer=storage[1])
+    for row_no in range(6):
+        history.append([row_no, -row_no])
+    assert np.shares_memory(history.view(), storage)
+    first, end = history.bounds_since(3)
+    np.testing.assert_array_equal(storage[1, first:end, 0], [3, 4, 5])
+    first, end = history.bounds()
+    np.testing.assert_array_equal(storage[1, first:end, 0], [2, 3, 4, 5])
+    with pytest.raises(ValueError):
+        HistoryRingBuffer(capacity=3, num_cols=2, buffer=storage[1])
+
+
+@pytest.mark.parametrize("no_rows", [0, 3, 5, 7, 10, 12])
+def test_single_copy_matches_mirrored(no_rows):
+    mirrored = _filled_buffer(capacity=5, no_rows=no_rows)
+    single = HistoryRingBuffer(capacity=5, num_cols=3, mirrored=False)
+    single.extend(np.arange(no_rows)[:, np.newaxis] * [1, 10, 100])
+    assert single.nbytes == mirrored.nbytes // 2
+    np.testing.assert_array_equal(single.view(), mirrored.view())
+    np.testing.assert_array_equal(single.last_n(4), mirrored.last_n(4))
+    np.testing.assert_array_equal(single.since(6), mirrored.since(6))
+    if no_rows:
+        np.testing.assert_array_equal(single.last, mirrored.last)
+    with pytest.raises(ValueError):
+        single.bounds_since(0)
+    with pytest.raises(ValueError):
+        single.bounds()
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+
+import logging
+import struct
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from src.sensor.bno055_frame import BNO055Frame
+from src.sensor.imu_acquisition import FrameDoubleBuffer, IMUAcquisition, NoFrameError
+from tests.simulators.encoder_simulator import VirtualClock
+
+
+class FrameSourceSim:
+    """Sensor whose fusion output changes every fusion_period reads"""
+
+    def __init__(self, fusion_period: int = 1, clock=None) -> None:
+        self._fusion_period: int = fusion_period
+        self._clock = clock  # VirtualClock, advanced by read_duration per read
+        self.read_duration: float = 0.001
+        self.no_reads: int = 0
+        self.fail: bool = False
+
+    def read_frame(self, frame: BNO055Frame | None = None) -> BNO055Frame:
+        if self.fail:
+            raise OSError(121, "Remote I/O error")
+        heading = self.no_reads // self._fusion_period
+        self.no_reads += 1
+        frame.raw[18:20] = struct.pack("<h", heading)  # euler heading, 0x1A
+        if self._clock is None:
+            frame.decode(time.monotonic())
+        else:
+            self._clock.advance(self.read_duration)
+            frame.decode(self._clock())
+        return frame
+
+
+def _acquisition(source) -> IMUAcquisition:
+    return IMUAcquisition(
+        source=source, rate_hz=1_000, logger=logging.getLogger("test imu")
+    )
+
+
+def test_duplicate_frames_are_dropped():
+    acquisition = _acquisition(FrameSourceSim(fusion_period=3))
+    published = [acquisition.read_once() for _ in range(9)]
+    assert published == [True, False, False] * 3
+    assert acquisition.sequence == 3
+    assert acquisition.no_duplicates == 6
+    frame = BNO055Frame()
+    assert acquisition.latest(frame) == 3
+    assert frame.euler[0] == 2 / 16
+
+
+def test_reader_never_sees_a_torn_frame():
+    buffer = FrameDoubleBuffer()
+    stop = threading.Event()
+
+    def write() -> None:
+        value = 0
+        while not stop.is_set():
+            value = (value + 1) % 30_000
+            frame = buffer.begin_write()
+            frame.raw[:44] = struct.pack("<22h", *([value] * 22))
+            frame.decode(value)
+            buffer.publish()
+
+    writer = threading.Thread(target=write)
+    writer.start()
+    frame = BNO055Frame()
+    last_sequence = 0
+    try:
+        for _ in range(2_000):
+            sequence = buffer.latest(frame)
+            assert sequence >= last_sequence
+            last_sequence = sequence
+            assert len(set(struct.unpack("<22h", frame.raw[:44]))) == 1
+            assert np.all(frame.values[9:12] == frame.values[9])
+    finally:
+        stop.set()
+        writer.join()
+
+
+def test_background_thread_reads_and_counts_errors():
+    source = FrameSourceSim()
+    acquisition = _acquisition(source)
+    assert not acquisition.running
+    acquisition.start()
+    assert acquisition.running
+    deadline = time.monotonic() + 2
+    while acquisition.sequence < 5 and time.monotonic() < deadline:
+        time.sleep(0.001)
+    source.fail = True
+    while acquisition.no_errors < 2 and time.monotonic() < deadline:
+        time.sleep(0.001)
+    acquisition.stop()
+    assert not acquisition.running
+    assert acquisition.sequence >= 5
+    assert acquisition.no_errors >= 2
+
+
+def test_failed_reads_serve_last_good_frame_then_recover():
+    source = FrameSourceSim()
+    recovered = threading.Event()
+    acquisition = IMUAcquisition(
+        source=source,
+        max_consecutive_errors=3,
+        recover=recovered.set,
+        logger=logging.getLogger("test imu"),
+    )
+    assert acquisition.read_once()
+    source.fail = True
+    frame = BNO055Frame()
+    for _ in range(3):
+        assert not acquisition.read_once()
+        assert acquisition.latest(frame) == 1
+    assert recovered.wait(timeout=2)
+    while acquisition.recovering:
+        time.sleep(0.001)
+    assert acquisition.no_errors == 3
+    assert acquisition.no_recoveries == 1
+    assert acquisition.consecutive_errors == 0
+    assert acquisition.recovery_time >= 0
+    source.fail = False
+    assert acquisition.read_once()
+    assert acquisition.latest(frame) == 2
+
+
+def test_reads_are_skipped_while_recovering():
+    source = FrameSourceSim()
+    release = threading.Event()
+    acquisition = IMUAcquisition(
+        source=source,
+        max_consecutive_errors=1,
+        recover=release.wait,
+        logger=logging.getLogger("test imu"),
+    )
+    source.fail = True
+    acquisition.read_once()
+    assert acquisition.recovering
+    source.fail = False
+    assert not acquisition.read_once()
+    assert source.no_reads == 0
+    release.set()
+    while acquisition.recovering:
+        time.sleep(0.001)
+    assert acquisition.read_once()
+
+
+def test_overruns_and_stale_frames_are_counted():
+    clock = VirtualClock()
+    source = FrameSourceSim(clock=clock)
+    acquisition = IMUAcquisition(
+        source=source,
+        read_deadline=0.005,
+        stale_age=0.02,
+        clock=clock,
+        logger=logging.getLogger("test imu"),
+    )
+    frame = BNO055Frame()
+    source.read_duration = 0.008
+    acquisition.read_once()
+    acquisition.latest(frame)
+    assert acquisition.no_overruns == 1
+    assert acquisition.no_stale_frames == 0
+    clock.advance(0.005)
+    acquisition.latest(frame)  # never reads the sensor itself
+    assert acquisition.no_reads == 1
+    clock.advance(0.05)
+    source.fail = True
+    acquisition.read_once()
+    acquisition.latest(frame)
+    assert acquisition.no_errors == 1
+    assert acquisition.no_stale_frames == 1
+    assert frame.time == 0.008
+
+
+def test_no_frame_until_the_first_good_read():
+    source = FrameSourceSim()
+    acquisition = _acquisition(source)
+    source.fail = True
+    frame = BNO055Frame()
+    assert not acquisition.read_once()
+    with pytest.raises(NoFrameError):
+        acquisition.latest(frame)
+    with pytest.raises(OSError):
+        acquisition.latest(frame)
+    assert not acquisition.wait_for_frame(timeout=0)
+    source.fail = False
+    assert acquisition.read_once()
+    assert acquisition.latest(frame) == 1
+    assert acquisition.wait_for_frame(timeout=0)
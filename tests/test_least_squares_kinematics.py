@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+
+import numpy as np
+import pytest
+
+from src.robot_math.least_squares_kinematics import (
+    end_point_coefficients,
+    fitted_derivatives,
+)
+from tests.test_encoder_general import FakeClock, _drive, _started_encoder
+
+
+def test_coefficients_are_cached_and_exact_for_cubics():
+    coefficients = end_point_coefficients(17)
+    assert end_point_coefficients(17) is coefficients
+    times = np.linspace(-1, 0, 17)
+    samples = 2 + 3 * times - 4 * times**2 + 5 * times**3
+    np.testing.assert_allclose(coefficients @ samples, [2, 3, -8, 30], atol=1e-9)
+    with pytest.raises(ValueError):
+        end_point_coefficients(3)
+
+
+def test_fitted_derivatives_of_several_channels():
+    times = np.sort(np.random.default_rng(0).uniform(0, 2, 2_000))
+    positions = np.column_stack((times**3, 2 * times))
+    derivatives = fitted_derivatives(times, positions, duration=0.5)
+    end = times[-1]
+    np.testing.assert_allclose(
+        derivatives[:, 0], [end**3, 3 * end**2, 6 * end, 6], rtol=1e-3
+    )
+    np.testing.assert_allclose(derivatives[:, 1], [2 * end, 2, 0, 0], atol=1e-6)
+    np.testing.assert_array_equal(
+        fitted_derivatives([1.0], [3.0], duration=1), [3, 0, 0, 0]
+    )
+
+
+def test_encoder_fitted_kinematics_at_constant_speed():
+    encoder = _started_encoder(clock=FakeClock())
+    _drive(encoder, no_steps=200, step_duration=0.05)
+    kinematics = encoder.fitted_kinematics()
+    assert kinematics.distance == pytest.approx(5)
+    assert kinematics.speed == pytest.approx(0.5)
+    assert kinematics.accel == pytest.approx(0, abs=1e-6)
+    assert kinematics.jerk == pytest.approx(0, abs=1e-5)
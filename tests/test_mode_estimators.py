@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+
+import numpy as np
+import pytest
+
+pytest.importorskip("scipy")
+
+from src.robot_math.benchmark_mode_estimators import (
+    benchmark_estimators,
+    fastest_accurate_estimator,
+)
+from src.robot_math.mode_estimators import (
+    MODE_ESTIMATORS,
+    get_mode_estimator,
+    register_mode_estimator,
+)
+from src.robot_math.position_history_csv import load_step_durations
+
+
+def _step_durations() -> np.ndarray:
+    from scipy import stats
+
+    return stats.gamma.rvs(4, loc=0.02, scale=0.005, size=300, random_state=3)
+
+
+def test_registry_contents():
+    assert {
+        "gamma_powell",
+        "gamma_cobyla",
+        "gamma_tnc",
+        "gamma_moments",
+        "histogram",
+        "kde",
+    } <= set(MODE_ESTIMATORS)
+    with pytest.raises(ValueError):
+        get_mode_estimator("no such estimator")
+    with pytest.raises(ValueError):
+        register_mode_estimator("histogram")(lambda data: 0.0)
+
+
+def test_estimators_find_the_peak():
+    data = _step_durations()
+    true_mode = 0.02 + 3 * 0.005
+    for name, estimator in MODE_ESTIMATORS.items():
+        assert estimator(data) == pytest.approx(true_mode, abs=0.005), name
+
+
+def test_closed_form_matches_gamma_fit():
+    data = _step_durations()
+    assert get_mode_estimator("gamma_moments")(data) == pytest.approx(
+        get_mode_estimator("gamma_powell")(data), abs=1e-5
+    )
+
+
+def test_benchmark_picks_fast_accurate_estimator():
+    results = benchmark_estimators(
+        data_sets=[_step_durations()],
+        estimator_names=["gamma_powell", "gamma_moments"],
+        stride=100,
+    )
+    assert [result.name for result in results] == ["gamma_powell", "gamma_moments"]
+    assert results[0].error_max == 0
+    assert fastest_accurate_estimator(results, tolerance=0.001) == "gamma_moments"
+    assert fastest_accurate_estimator(results, tolerance=-1) is None
+
+
+def test_load_step_durations(tmp_path):
+    fname = tmp_path / "position_history.csv"
+    history = np.zeros((4, 9))
+    history[1:, 2] = [0.05, 0.04, 0.06]
+    np.savetxt(fname, history, fmt="%.7f", delimiter=",")
+    np.testing.assert_allclose(load_step_durations(str(fname)), [0.05, 0.04, 0.06])
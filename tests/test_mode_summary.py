@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+
+import numpy as np
+import pytest
+
+from src.robot_math.mode_summary import prefix_modes, summarize_files
+from src.robot_math.streaming_gamma_mode import gamma_mode_from_moments
+
+
+def _write_history(fname, step_durations) -> None:
+    history = np.zeros((len(step_durations) + 1, 9))
+    history[1:, 2] = step_durations
+    history[:, 0] = 1673326031 + np.cumsum(history[:, 2])
+    np.savetxt(fname, history, fmt="%.7f", delimiter=",")
+
+
+def test_prefix_modes_match_refit_of_each_prefix():
+    step_durations = np.array([0.05, 0.04, 0.06, 0.05, 0.09, 0.05, 0.045, 0.2])
+    result = prefix_modes(step_durations)
+    for no_data in range(len(step_durations)):
+        prefix = step_durations[: no_data + 1]
+        deviations = prefix - prefix.mean()
+        assert result[no_data, 0] == no_data
+        assert result[no_data, 1] == pytest.approx(
+            gamma_mode_from_moments(
+                mean=prefix.mean(),
+                variance=np.mean(deviations**2),
+                third_central_moment=np.mean(deviations**3),
+            )
+        )
+
+
+def test_summaries_are_cached_by_content(tmp_path):
+    rng = np.random.default_rng(5)
+    fnames = []
+    for file_no in range(3):
+        fname = tmp_path / f"2023-01-09_23_4{file_no}_00_position_history.csv"
+        _write_history(fname, rng.gamma(3, 0.01, size=50) + 0.01)
+        fnames.append(str(fname))
+    cache_folder = str(tmp_path / "cache")
+
+    first_run = summarize_files(fnames, cache_folder=cache_folder, max_workers=2)
+    assert [result.from_cache for result in first_run] == [False] * 3
+    assert [result.no_data_points for result in first_run] == [50] * 3
+    summary = np.loadtxt(first_run[0].fname_results, delimiter=",")
+    assert summary.shape == (50, 2)
+
+    second_run = summarize_files(fnames, cache_folder=cache_folder, max_workers=1)
+    assert [result.from_cache for result in second_run] == [True] * 3
+
+    _write_history(fnames[0], rng.gamma(3, 0.01, size=20) + 0.01)
+    third_run = summarize_files(fnames, cache_folder=cache_folder, max_workers=1)
+    assert [result.from_cache for result in third_run] == [False, True, True]
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+
+import logging
+import math
+
+import numpy as np
+import pytest
+
+from src.encoder.odometry import DiffDriveOdometry, wrap_angle
+from tests.test_encoder_general import FakeClock, _started_encoder
+
+WHEEL_DIAMETER = 0.1
+TRACK_WIDTH = 0.2
+
+
+def _odometry(clock: FakeClock, **kwargs):
+    left = _started_encoder(clock=clock)
+    right = _started_encoder(clock=clock)
+    odometry = DiffDriveOdometry(
+        enc_wheel_left=left,
+        enc_wheel_right=right,
+        wheel_diameter=WHEEL_DIAMETER,
+        track_width=TRACK_WIDTH,
+        logger=logging.getLogger("test odometry"),
+        **kwargs,
+    )
+    return odometry, left, right
+
+
+def _drive(encoder, duration: float, speed: float, step: float = 1 / 40) -> None:
+    """Edges of a wheel turning at speed revs per second for duration seconds"""
+    start_time = encoder._position_history.last[encoder._T_COL]
+    start_revs = encoder.distance
+    no_steps = int(round(abs(speed) * duration / step))
+    for step_no in range(1, no_steps + 1):
+        encoder.add_position(
+            a_time=start_time + step_no * step / abs(speed),
+            position=start_revs + math.copysign(step_no * step, speed),
+        )
+
+
+def test_straight_line():
+    odometry, left, right = _odometry(FakeClock())
+    _drive(left, duration=2, speed=1)
+    _drive(right, duration=2, speed=1)
+    pose = odometry.pose()
+    assert pose.x == pytest.approx(2 * math.pi * WHEEL_DIAMETER)
+    assert pose.y == pytest.approx(0, abs=1e-9)
+    assert pose.heading == pytest.approx(0, abs=1e-9)
+    assert pose.linear_vel == pytest.approx(math.pi * WHEEL_DIAMETER, rel=0.05)
+
+
+def test_turn_in_place():
+    odometry, left, right = _odometry(FakeClock())
+    _drive(left, duration=1, speed=-0.5)
+    _drive(right, duration=1, speed=0.5)
+    pose = odometry.pose()
+    expected_heading = math.pi * WHEEL_DIAMETER / TRACK_WIDTH
+    assert pose.heading == pytest.approx(expected_heading, abs=0.02)
+    assert math.hypot(pose.x, pose.y) < 0.01
+    assert pose.angular_vel == pytest.approx(expected_heading, rel=0.1)
+
+
+def test_arc_matches_circle_in_several_updates():
+    odometry, left, right = _odometry(FakeClock())
+    left_speed, right_speed = 0.5, 1.0  # revs per second
+    for _ in range(4):  # updates part way through give the same pose
+        _drive(left, duration=0.5, speed=left_speed)
+        _drive(right, duration=0.5, speed=right_speed)
+        odometry.update()
+    pose = odometry.pose()
+    v = (left_speed + right_speed) / 2 * math.pi * WHEEL_DIAMETER
+    omega = (right_speed - left_speed) * math.pi * WHEEL_DIAMETER / TRACK_WIDTH
+    radius = v / omega
+    heading = omega * 2
+    assert pose.heading == pytest.approx(heading, abs=0.02)
+    assert pose.x == pytest.approx(radius * math.sin(heading), abs=0.005)
+    assert pose.y == pytest.approx(radius * (1 - math.cos(heading)), abs=0.005)
+    history = odometry.pose_history()
+    assert (np.diff(history[:, 0]) >= 0).all()
+
+
+def test_imu_yaw_blend():
+    odometry, left, right = _odometry(FakeClock(), yaw_blend=0.5)
+    odometry.add_imu_yaw(90)  # sets the offset, heading unchanged
+    assert odometry.pose().heading == 0
+    odometry.add_imu_yaw(80)  # 10 degrees anticlockwise of the start
+    assert odometry.pose().heading == pytest.approx(math.radians(5))
+    assert wrap_angle(3 * math.pi / 2) == pytest.approx(-math.pi / 2)
+
+
+def test_encoder_history_reset_keeps_pose():
+    clock = FakeClock()
+    odometry, left, right = _odometry(clock)
+    _drive(left, duration=2, speed=1)
+    _drive(right, duration=2, speed=1)
+    odometry.update()
+    clock.now = left._position_history.last[left._T_COL] + 0.1
+    left.reset_history()  # e.g. EncoderDigital.start()
+    right.reset_history()
+    _drive(left, duration=3, speed=1)  # more points than before the reset
+    _drive(right, duration=3, speed=1)
+    pose = odometry.pose()
+    assert pose.x == pytest.approx(5 * math.pi * WHEEL_DIAMETER)
+    assert pose.heading == pytest.approx(0, abs=1e-9)
+    assert (np.diff(odometry.pose_history()[:, 0]) >= 0).all()
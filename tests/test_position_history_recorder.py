@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+
+import logging
+import time
+
+import numpy as np
+
+from src.encoder.position_history_recorder import (
+    PositionHistoryRecorder,
+    load_recording,
+    to_csv,
+)
+from tests.test_encoder_general import FakeClock, _drive, _started_encoder
+
+
+def _recorder(fname: str, **kwargs) -> PositionHistoryRecorder:
+    return PositionHistoryRecorder(
+        fname=fname, logger=logging.getLogger("test recorder"), **kwargs
+    )
+
+
+def test_recording_matches_history_and_converts_to_csv(tmp_path):
+    fname = str(tmp_path / "run_position_history.pos")
+    encoder = _started_encoder(clock=FakeClock())
+    encoder.record_history(_recorder(fname, flush_every_points=64))
+    _drive(encoder, no_steps=500, step_duration=0.01)
+    encoder._recorder.close()
+
+    recording = load_recording(fname)
+    np.testing.assert_array_equal(recording, encoder.position_history_rows())
+    fname_csv = to_csv(fname)
+    np.testing.assert_allclose(
+        np.loadtxt(fname_csv, delimiter=","), recording, atol=1e-6
+    )
+
+
+def test_rows_on_disk_before_close_and_partial_row_ignored(tmp_path):
+    fname = str(tmp_path / "crash_position_history.pos")
+    recorder = _recorder(fname, num_cols=3, flush_interval=0.01)
+    recorder.start()
+    recorder.record(np.arange(30.0).reshape(10, 3))
+    deadline = time.monotonic() + 5
+    while recorder.no_rows_written < 10 and time.monotonic() < deadline:
+        time.sleep(0.005)
+    np.testing.assert_array_equal(load_recording(fname), np.arange(30.0).reshape(10, 3))
+    recorder.close()
+
+    with open(fname, "ab") as f:  # as if killed part way through a row
+        f.write(np.array([1.0, 2.0]).tobytes())
+    assert load_recording(fname).shape == (10, 3)
+
+
+def test_history_between_reads_old_rows_from_recording(tmp_path):
+    fname = str(tmp_path / "long_position_history.pos")
+    clock = FakeClock()
+    encoder = _started_encoder(max_no_position_points=100, clock=clock)
+    encoder.record_history(_recorder(fname, flush_every_points=256))
+    _drive(encoder, no_steps=5_000, step_duration=0.01)
+
+    old_rows = encoder.history_between(clock.now + 9.995, clock.now + 20.005)
+    assert isinstance(old_rows, np.memmap)
+    assert len(old_rows) == 1_001
+    np.testing.assert_allclose(old_rows[[0, -1], encoder._DIST_COL], [25, 50])
+
+    recent_rows = encoder.history_between(clock.now + 49.495)
+    assert not isinstance(recent_rows, np.memmap)
+    np.testing.assert_array_equal(
+        recent_rows, encoder._position_history.view()[-51:, : encoder._TOT_NUM_COLS]
+    )
+    encoder._recorder.close()
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+
+import threading
+
+import numpy as np
+
+from src.encoder.raw_edge_buffer import RawEdgeBuffer
+
+
+def test_take_returns_edges_in_order_and_empties():
+    edges = RawEdgeBuffer(capacity=8)
+    for edge_no in range(5):
+        edges.append(edge_no * 1000, 1 if edge_no != 3 else -1)
+    times_ns, directions = edges.take()
+    np.testing.assert_array_equal(times_ns, [0, 1000, 2000, 3000, 4000])
+    np.testing.assert_array_equal(directions, [1, 1, 1, -1, 1])
+    assert len(edges) == 0
+    assert len(edges.take()[0]) == 0
+
+
+def test_grows_rather_than_dropping_edges():
+    edges = RawEdgeBuffer(capacity=4)
+    for edge_no in range(100):
+        edges.append(edge_no, 1)
+    times_ns, _ = edges.take()
+    np.testing.assert_array_equal(times_ns, np.arange(100))
+    edges.append(7, -1)
+    np.testing.assert_array_equal(edges.take()[1], [-1])
+
+
+def test_no_edges_lost_while_writer_and_reader_run_together():
+    edges = RawEdgeBuffer(capacity=16)
+    no_edges = 20_000
+
+    def write() -> None:
+        for edge_no in range(no_edges):
+            edges.append(edge_no, 1)
+
+    writer = threading.Thread(target=write)
+    writer.start()
+    taken: list[np.ndarray] = []
+    while writer.is_alive():
+        taken.append(edges.take()[0].copy())
+    writer.join()
+    taken.append(edges.take()[0].copy())
+    np.testing.assert_array_equal(np.concatenate(taken), np.arange(no_edges))
@@ -1,5 +1,6 @@
 #!/usr/bin/env python3
 
+import asyncio
 import time
 from abc import abstractmethod
 from typing import Callable, Optional, Protocol
@@ -113,11 +114,11 @@ def test_robot_balance() -> None:
     # Read Sensor Mode to verify connected
     sensor.mode
 
-    # Read saved sensor calibration values
-    sensor_calibration_data = sensor.read_calibration_data_from_file()
-    sensor.write_calibration_data_to_sensor(
-        sensor_calibration_data=sensor_calibration_data
-    )
+    # Restore saved calibration values, calibrating and saving if not taken
+    if not asyncio.run(sensor.calibrate_at_startup()):
+        raise RuntimeError("9DOF sensor: Not calibrated")
+    # Read frames in the background, the loop gets the latest in constant time
+    sensor.start_acquisition()
 
     # Start Balance Loop
     logger.info(msg="about to start Balance Loop")
@@ -148,21 +149,12 @@ def test_robot_balance() -> None:
     motor_output: float
     motor_left_output: float
     motor_right_output: float
-    temp_temp_euler: Box
-    good_euler_angles: int = 0
-    bad_euler_angles: int = 0
     while True:
         try:
             if (TIME_MS() - lasttime_control) >= cfg.duration.control_update:
                 # exec every CONTROL_UPDATE_INTERVAL msec.
                 lasttime_control = TIME_S()
-                temp_temp_euler = temp_euler
-                try:
-                    temp_euler = sensor.euler_angles
-                    good_euler_angles += 1
-                except OSError:
-                    temp_euler = temp_temp_euler
-                    bad_euler_angles += 1
+                temp_euler = sensor.euler_angles  # last good frame if a read fails
                 # roll = temp_euler["x"]
                 pitch = temp_euler.y
                 # yaw = temp_euler["z"]
@@ -209,12 +201,13 @@ def test_robot_balance() -> None:
                 logger.info(msg="Updating parameters")
                 cfg = load_config()
                 logger.info(
-                    msg=f"9DOF sensor: Good Eulers: {good_euler_angles:8d}, Bad Eulers: {bad_euler_angles:8d}"
+                    msg=f"9DOF sensor: Good reads: {sensor.acquisition.no_reads:8d}, Bad reads: {sensor.acquisition.no_errors:8d}, Stale frames: {sensor.acquisition.no_stale_frames:8d}, Recoveries: {sensor.acquisition.no_recoveries:4d}"
                 )
         except KeyboardInterrupt:
             print("Stopping at your request.")
             break
 
+    sensor.stop_acquisition()
     motor_wheel_left.value = 0
     motor_wheel_right.value = 0
     motor_wheel_left.close()
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+
+import numpy as np
+import pytest
+
+from src.robot_math.streaming_gamma_mode import StreamingGammaMode
+
+
+def test_matches_scipy_method_of_moments_fit():
+    stats = pytest.importorskip("scipy.stats")
+    data = stats.gamma.rvs(3, loc=0.01, scale=0.01, size=500, random_state=1)
+    estimator = StreamingGammaMode()
+    for value in data:
+        estimator.update(value)
+
+    a, loc, scale = stats.gamma.fit(data, method="MM")
+    assert estimator.mean == pytest.approx(np.mean(data))
+    assert estimator.mode == pytest.approx(loc + (a - 1) * scale)
+
+
+def test_forgetting_factor_follows_recent_values():
+    slow_steps = np.full(200, 0.1) + np.tile([0.0, 0.01, 0.03], 200)[:200]
+    fast_steps = np.full(200, 0.02) + np.tile([0.0, 0.002, 0.006], 200)[:200]
+    estimator = StreamingGammaMode(forgetting_factor=0.95)
+    for value in np.concatenate([slow_steps, fast_steps]):
+        estimator.update(value)
+
+    assert estimator.count == pytest.approx(1 / (1 - 0.95), rel=1e-3)
+    assert 0.02 <= estimator.mode <= 0.03
+
+
+def test_constant_values_return_the_value():
+    estimator = StreamingGammaMode()
+    for _ in range(10):
+        estimator.update(0.05)
+    assert estimator.mode == pytest.approx(0.05)
+
+
+def test_invalid_forgetting_factor():
+    with pytest.raises(ValueError):
+        StreamingGammaMode(forgetting_factor=0)
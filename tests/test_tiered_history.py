@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+
+import numpy as np
+import pytest
+
+from src.encoder import tiered_history as th
+from src.encoder.tiered_history import TieredHistory
+
+
+def _points(no_points: int = 20_000, step_duration: float = 0.013):
+    a_times = 1_000.0 + np.arange(no_points) * step_duration
+    speeds = 0.5 + 0.4 * np.sin(a_times / 7)
+    distances = np.cumsum(speeds) * step_duration
+    return a_times, speeds, distances
+
+
+def _brute_force(a_times, speeds, distances, bucket_duration):
+    starts = np.floor(a_times / bucket_duration) * bucket_duration
+    rows = []
+    for start in np.unique(starts):
+        in_bucket = starts == start
+        rows.append(
+            [
+                start,
+                in_bucket.sum(),
+                speeds[in_bucket].min(),
+                speeds[in_bucket].max(),
+                speeds[in_bucket].mean(),
+                distances[in_bucket].min(),
+                distances[in_bucket].max(),
+                distances[in_bucket][-1],
+            ]
+        )
+    return np.array(rows)
+
+
+@pytest.mark.parametrize("block_size", [None, 1, 333])
+def test_tiers_match_brute_force(block_size):
+    a_times, speeds, distances = _points()
+    history = TieredHistory(tiers=((1, 10_000), (60, 100)))
+    if block_size is None:
+        for point in zip(a_times, speeds, distances):
+            history.add_point(*point)
+    else:
+        for first in range(0, len(a_times), block_size):
+            block = slice(first, first + block_size)
+            history.add_points(a_times[block], speeds[block], distances[block])
+
+    np.testing.assert_allclose(
+        history.tiers[0].summaries(), _brute_force(a_times, speeds, distances, 1)
+    )
+    # the minute tier, including the second not yet folded into it
+    np.testing.assert_allclose(
+        history.summaries(), _brute_force(a_times, speeds, distances, 60)
+    )
+
+
+def test_query_uses_finest_tier_still_holding_start():
+    a_times, speeds, distances = _points()
+    history = TieredHistory(tiers=((1, 30), (60, 100)))
+    history.add_points(a_times, speeds, distances)
+    recent = history.summaries(a_times[-1] - 10)
+    assert (np.diff(recent[:, th.START_COL]) == 1).all()
+    assert len(recent) == 11
+    whole_run = history.summaries(a_times[0])
+    assert (np.diff(whole_run[:, th.START_COL]) == 60).all()
+    assert whole_run[:, th.COUNT_COL].sum() == len(a_times)
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+
+import datetime
+
+import numpy as np
+import pytest
+
+from src.robot_math.time_alignment import (
+    align_histories,
+    interpolate_rows,
+    load_sensor_history,
+)
+from tests.test_encoder_general import FakeClock, _drive, _started_encoder
+
+
+def test_interpolate_rows():
+    rows = np.array([[0.0, 0, 10], [1, 2, 20], [3, 4, 20]])
+    values = interpolate_rows(rows, [-1, 0.5, 2, 5], [1, 2])
+    np.testing.assert_allclose(values, [[0, 10], [1, 15], [3, 20], [4, 20]])
+    outside = interpolate_rows(rows, [-1, 5], [1], outside=np.nan)
+    assert np.isnan(outside).all()
+
+
+def test_encoder_interpolate_between_edges():
+    clock = FakeClock()
+    encoder = _started_encoder(clock=clock)
+    start_time = clock.now
+    _drive(encoder, no_steps=100, step_duration=0.01)  # 2.5 revs per second
+    distances, speeds = encoder.interpolate(start_time + np.array([0.105, 0.5]))
+    np.testing.assert_allclose(distances, [0.2625, 1.25], rtol=1e-5)
+    np.testing.assert_allclose(speeds, 2.5, rtol=1e-6)
+
+
+def test_align_sensor_history_with_encoders(tmp_path):
+    clock = FakeClock()
+    left = _started_encoder(clock=clock)
+    right = _started_encoder(clock=clock)
+    _drive(left, no_steps=100, step_duration=0.01)
+    _drive(right, no_steps=50, step_duration=0.02)
+
+    fname = tmp_path / "sensor_history.csv"
+    reading_times = clock.now + np.array([0.25, 0.5, 2.0])
+    with open(fname, "w") as f:
+        f.write(",mag_x,pitch(y)\n")
+        for reading_no, reading_time in enumerate(reading_times):
+            stamp = datetime.datetime.fromtimestamp(reading_time).isoformat(sep=" ")
+            f.write(f"{stamp},{reading_no},\n")
+    sensor_times, sensor_values, sensor_names = load_sensor_history(str(fname))
+    np.testing.assert_allclose(sensor_times, reading_times)
+    assert sensor_names == ["mag_x", "pitch(y)"]
+
+    table, names = align_histories(
+        sensor_times=sensor_times,
+        sensor_values=sensor_values,
+        sensor_names=sensor_names,
+        encoder_histories={
+            "left": left.position_history_rows(),
+            "right": right.position_history_rows(),
+        },
+    )
+    assert names == [
+        "time",
+        "mag_x",
+        "pitch(y)",
+        "left_distance",
+        "left_speed",
+        "right_distance",
+        "right_speed",
+    ]
+    np.testing.assert_allclose(table[:2, 3], [0.625, 1.25], rtol=1e-5)
+    np.testing.assert_allclose(table[:2, 5], [0.3125, 0.625], rtol=1e-5)
+    assert np.isnan(table[2, 3:]).all()  # after both encoder histories
+    assert np.isnan(table[:, 2]).all()
+
+
+def test_sensor_history_log():
+    times, values, names = load_sensor_history(
+        "logs/sensor_history-2021-02-18_052117.csv"
+    )
+    assert names == ["mag_x", "mag_y", "mag_z", "pitch(y)", "roll(x)", "yaw(z)"]
+    assert values.shape == (len(times), 6)
+    assert (np.diff(times) >= 0).all()